@@ -0,0 +1,128 @@
+"""
+关键帧拼图（contact sheet）
+把一个场景的多张关键帧按网格拼成一张带编号的图片，一次视觉请求即可描述整个场景的变化。
+- 用OpenCV解码、缩放，NumPy数组拼接，最后只做一次JPEG编码
+- 按图片token预算选择拼图尺寸
+"""
+
+import base64
+import math
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 可选的拼图长边尺寸（从大到小），按token预算选择能容纳的最大尺寸
+SHEET_SIZES = (1536, 1024, 768, 512)
+DEFAULT_TOKEN_BUDGET = 765
+LABEL_HEIGHT_RATIO = 0.12
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """按OpenAI高精度模式的规则估算图片token：缩放后按512像素切块，每块170，另加85"""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def grid_shape(count: int) -> Tuple[int, int]:
+    """(行数, 列数)，尽量接近正方形"""
+    cols = max(1, math.ceil(math.sqrt(count)))
+    return math.ceil(count / cols), cols
+
+
+def _read_image(path: str) -> Optional[np.ndarray]:
+    # 使用np.fromfile + cv2.imdecode以支持中文路径
+    data = np.fromfile(path, dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+
+
+def _fit_cell(image: np.ndarray, cell_w: int, cell_h: int) -> np.ndarray:
+    """等比缩放到单元格内并居中填充黑边"""
+    h, w = image.shape[:2]
+    scale = min(cell_w / w, cell_h / h)
+    new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    cell = np.zeros((cell_h, cell_w, 3), dtype=np.uint8)
+    top, left = (cell_h - new_h) // 2, (cell_w - new_w) // 2
+    cell[top:top + new_h, left:left + new_w] = resized
+    return cell
+
+
+def _draw_label(cell: np.ndarray, label: str):
+    """左上角绘制帧编号"""
+    size = max(12, int(cell.shape[0] * LABEL_HEIGHT_RATIO))
+    font_scale = size / 30.0
+    thickness = max(1, size // 12)
+    (text_w, text_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+    cv2.rectangle(cell, (0, 0), (text_w + 8, text_h + baseline + 8), (0, 0, 0), -1)
+    cv2.putText(
+        cell, label, (4, text_h + 4), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness, cv2.LINE_AA
+    )
+
+
+def choose_sheet_size(rows: int, cols: int, aspect: float, token_budget: int) -> Tuple[int, int]:
+    """按token预算选择拼图尺寸 (宽, 高)，aspect 为单帧宽高比"""
+    sheet_aspect = cols * aspect / rows
+    for size in SHEET_SIZES:
+        if sheet_aspect >= 1:
+            width, height = size, max(1, int(size / sheet_aspect))
+        else:
+            width, height = max(1, int(size * sheet_aspect)), size
+        if estimate_image_tokens(width, height) <= token_budget:
+            break
+    return width, height
+
+
+def build_contact_sheet(
+    frame_paths: List[str],
+    labels: Optional[List[str]] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    quality: int = 85,
+) -> Tuple[Optional[str], Dict]:
+    """
+    把关键帧拼成一张带编号的网格图
+
+    Returns:
+        (JPEG的base64字符串, 拼图信息)，没有可读取的帧时返回 (None, {})
+    """
+    labels = labels or [f"f{i + 1}" for i in range(len(frame_paths))]
+    frames = []
+    for path, label in zip(frame_paths, labels):
+        image = _read_image(path)
+        if image is not None:
+            frames.append((label, image))
+    if not frames:
+        return None, {}
+
+    rows, cols = grid_shape(len(frames))
+    first_h, first_w = frames[0][1].shape[:2]
+    sheet_w, sheet_h = choose_sheet_size(rows, cols, first_w / first_h, token_budget)
+    cell_w, cell_h = sheet_w // cols, sheet_h // rows
+
+    cells = []
+    for label, image in frames:
+        cell = _fit_cell(image, cell_w, cell_h)
+        _draw_label(cell, label)
+        cells.append(cell)
+    blank = np.zeros((cell_h, cell_w, 3), dtype=np.uint8)
+    cells.extend([blank] * (rows * cols - len(cells)))
+    sheet = np.concatenate(
+        [np.concatenate(cells[r * cols:(r + 1) * cols], axis=1) for r in range(rows)], axis=0
+    )
+
+    ok, encoded = cv2.imencode(".jpg", sheet, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return None, {}
+    height, width = sheet.shape[:2]
+    return base64.b64encode(encoded.tobytes()).decode("utf-8"), {
+        "labels": [label for label, _ in frames],
+        "rows": rows,
+        "cols": cols,
+        "width": width,
+        "height": height,
+        "estimated_image_tokens": estimate_image_tokens(width, height),
+    }
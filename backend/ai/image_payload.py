@@ -0,0 +1,139 @@
+"""
+图片上传载荷缓存
+关键帧发送给多模态LLM前需要缩放、JPEG编码、base64编码，同一帧在多次分析中反复处理。
+这里以 (文件内容摘要, 最大边长, JPEG质量) 为键缓存可直接发送的base64字符串：
+- 进程内LRU（按字符数限制）+ 磁盘缓存（跨运行复用）
+- 编码时用JPEG draft模式在解码阶段直接降采样，再用BILINEAR缩放
+- 多张图片在线程池中并行编码
+"""
+
+import base64
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from PIL import Image
+
+from backend.util.constant import base_dir
+from backend.util.file_cache import FileCache, file_digest
+
+IMAGE_PAYLOAD_CACHE_DIR = os.path.join(base_dir, ".cache", "image_payloads")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_CHARS = 64 * 1024 * 1024
+DEFAULT_ENCODE_WORKERS = 4
+
+# 编码方式版本，修改缩放/编码参数时递增
+ENCODER_VERSION = 1
+
+_SUFFIX = ".b64"
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def encode_image(image_path: str, max_size: int = 1024, quality: int = 85) -> str:
+    """缩放并编码为JPEG的base64字符串"""
+    with Image.open(image_path) as img:
+        # JPEG在解码时按2的幂降采样，大图无需完整解码
+        img.draft("RGB", (max_size, max_size))
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality)
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+class ImagePayloadCache:
+    """已编码图片载荷的两级缓存"""
+
+    def __init__(
+        self,
+        cache_dir: str = IMAGE_PAYLOAD_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_chars: int = DEFAULT_MEMORY_CHARS,
+        max_workers: int = DEFAULT_ENCODE_WORKERS,
+    ):
+        self.cache = FileCache(cache_dir, max_bytes)
+        self.memory_chars = memory_chars
+        self.max_workers = max(1, int(max_workers))
+        self.logger = logging.getLogger(__name__)
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, payload: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = payload
+            self._memory_size += len(payload)
+            while self._memory_size > self.memory_chars and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def get_or_encode(self, image_path: str, max_size: int = 1024, quality: int = 85) -> str:
+        """获取图片的base64载荷，未缓存时编码并写入缓存"""
+        key = FileCache.make_key(ENCODER_VERSION, file_digest(image_path), max_size, quality)
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return payload
+
+        cached_path = self.cache.get(key, _SUFFIX)
+        if cached_path:
+            try:
+                with open(cached_path, "r", encoding="ascii") as f:
+                    payload = f.read()
+                self.hits += 1
+                self._remember(key, payload)
+                return payload
+            except OSError as e:
+                self.logger.warning(f"image payload cache read failed: {e}")
+
+        self.misses += 1
+        payload = encode_image(image_path, max_size, quality)
+        tmp_path = self.cache.tmp_path(key, _SUFFIX)
+        try:
+            with open(tmp_path, "w", encoding="ascii") as f:
+                f.write(payload)
+            self.cache.commit(tmp_path, key, _SUFFIX)
+        except OSError as e:
+            self.cache.discard(tmp_path)
+            self.logger.warning(f"image payload cache write failed: {e}")
+        self._remember(key, payload)
+        return payload
+
+    def encode_many(self, image_paths: List[str], max_size: int = 1024, quality: int = 85) -> List[Optional[str]]:
+        """并行获取多张图片的载荷，单张失败时对应位置为None"""
+
+        def encode(path):
+            try:
+                return self.get_or_encode(path, max_size, quality)
+            except Exception as e:
+                self.logger.error(f"Image encoding failed for {path}: {str(e)}")
+                return None
+
+        if len(image_paths) <= 1:
+            return [encode(path) for path in image_paths]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(image_paths))) as executor:
+            return list(executor.map(encode, image_paths))
+
+
+def get_image_payload_cache() -> ImagePayloadCache:
+    """进程内共享的图片载荷缓存"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ImagePayloadCache()
+        return _shared_cache
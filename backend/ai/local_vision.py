@@ -0,0 +1,186 @@
+"""
+本地图像分析（不依赖LLM）
+未配置LLM服务时，用NumPy/OpenCV为关键帧提取可用于分镜的基础描述：
+- 主色调：对下采样像素做k-means，按占比排序
+- 亮度、对比度、饱和度及其直方图
+- 边缘密度（画面复杂度）
+- Haar级联人脸检测
+- 根据最大人脸占比与画面特征推断景别
+图片先缩小到 ANALYSIS_SIZE 再处理，单帧耗时为毫秒级。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+ANALYSIS_SIZE = 480
+PALETTE_SAMPLES = 2000
+HISTOGRAM_BINS = 8
+DEFAULT_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+# CascadeClassifier 不保证线程安全，每个线程各自加载
+_local = threading.local()
+
+
+def _face_detector():
+    detector = getattr(_local, "face_detector", None)
+    if detector is None:
+        detector = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        _local.face_detector = detector
+    return detector
+
+
+def load_image(image_path: str, max_size: int = ANALYSIS_SIZE) -> Optional[np.ndarray]:
+    """读取图片（支持中文路径）并缩小到长边不超过 max_size"""
+    data = np.fromfile(image_path, dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+    if image is None:
+        return None
+    h, w = image.shape[:2]
+    scale = max_size / max(h, w)
+    if scale < 1:
+        image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def dominant_palette(image: np.ndarray, k: int = 5, samples: int = PALETTE_SAMPLES) -> List[Dict[str, Any]]:
+    """k-means主色调，返回 [{"color": "#rrggbb", "ratio": 占比}]，按占比降序"""
+    pixels = image.reshape(-1, 3)
+    if len(pixels) > samples:
+        step = len(pixels) // samples
+        pixels = pixels[::step][:samples]
+    pixels = np.float32(pixels)
+    k = min(k, len(pixels))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    cv2.setRNGSeed(0)
+    _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+    counts = np.bincount(labels.ravel(), minlength=k)
+    order = np.argsort(-counts)
+    palette = []
+    for idx in order:
+        b, g, r = (int(round(c)) for c in centers[idx])
+        palette.append({"color": f"#{r:02x}{g:02x}{b:02x}", "ratio": round(float(counts[idx]) / len(pixels), 3)})
+    return palette
+
+
+def _histogram(channel: np.ndarray) -> List[float]:
+    hist = np.bincount(channel.ravel().astype(np.int64) * HISTOGRAM_BINS // 256, minlength=HISTOGRAM_BINS)
+    return [round(float(v), 3) for v in hist / max(1, channel.size)]
+
+
+def tone_statistics(image: np.ndarray) -> Dict[str, Any]:
+    """亮度、对比度、饱和度（0-1）及直方图"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    saturation = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)[:, :, 1]
+    return {
+        "brightness": round(float(gray.mean()) / 255, 3),
+        "contrast": round(float(gray.std()) / 128, 3),
+        "saturation": round(float(saturation.mean()) / 255, 3),
+        "brightness_histogram": _histogram(gray),
+        "saturation_histogram": _histogram(saturation),
+    }
+
+
+def edge_density(gray: np.ndarray) -> float:
+    """Canny边缘像素占比"""
+    median = float(np.median(gray))
+    edges = cv2.Canny(gray, int(max(0, 0.66 * median)), int(min(255, 1.33 * median)))
+    return round(float(np.count_nonzero(edges)) / edges.size, 4)
+
+
+def detect_faces(gray: np.ndarray) -> List[Dict[str, float]]:
+    """人脸检测，返回相对坐标 [{"x", "y", "w", "h"}]，按面积降序"""
+    h, w = gray.shape[:2]
+    min_side = max(16, min(h, w) // 20)
+    faces = _face_detector().detectMultiScale(
+        cv2.equalizeHist(gray), scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side)
+    )
+    result = [
+        {"x": round(fx / w, 3), "y": round(fy / h, 3), "w": round(fw / w, 3), "h": round(fh / h, 3)}
+        for fx, fy, fw, fh in (faces if len(faces) else [])
+    ]
+    return sorted(result, key=lambda f: f["w"] * f["h"], reverse=True)
+
+
+def classify_shot(faces: List[Dict[str, float]], edges: float) -> str:
+    """按最大人脸占画面的比例推断景别；没有人脸时按画面复杂度区分"""
+    if faces:
+        area = faces[0]["w"] * faces[0]["h"]
+        if area >= 0.12:
+            return "特写"
+        if area >= 0.04:
+            return "近景"
+        if area >= 0.01:
+            return "中景"
+        return "全景"
+    return "远景" if edges >= 0.08 else "空镜"
+
+
+def describe_lighting(tone: Dict[str, Any]) -> str:
+    brightness, contrast = tone["brightness"], tone["contrast"]
+    if brightness < 0.3:
+        lighting = "低调暗光"
+    elif brightness > 0.65:
+        lighting = "明亮高调"
+    else:
+        lighting = "自然光"
+    if contrast > 0.55:
+        lighting += "，高反差"
+    elif contrast < 0.25:
+        lighting += "，柔和低反差"
+    return lighting
+
+
+def analyze_image(image_path: str) -> Dict[str, Any]:
+    """分析单张图片"""
+    image = load_image(image_path)
+    if image is None:
+        return {"error": f"Failed to read image: {image_path}"}
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    palette = dominant_palette(image)
+    tone = tone_statistics(image)
+    edges = edge_density(gray)
+    faces = detect_faces(gray)
+    shot_type = classify_shot(faces, edges)
+    lighting = describe_lighting(tone)
+    color_tone = "高饱和" if tone["saturation"] > 0.5 else ("低饱和" if tone["saturation"] < 0.2 else "中等饱和")
+
+    subjects = [f"人物×{len(faces)}"] if faces else []
+    description = (
+        f"{shot_type}画面，{lighting}，{color_tone}，主色调 {', '.join(p['color'] for p in palette[:3])}"
+        + (f"，检测到 {len(faces)} 张人脸" if faces else "，未检测到人脸")
+    )
+    return {
+        "description": description,
+        "subjects": subjects,
+        "dominant_colors": [p["color"] for p in palette],
+        "technical_features": {
+            "shot_type": shot_type,
+            "lighting": lighting,
+            "palette": palette,
+            "edge_density": edges,
+            "faces": faces,
+            **tone,
+        },
+        "analysis_method": "local_vision",
+    }
+
+
+def analyze_images(image_paths: List[str], max_workers: int = DEFAULT_WORKERS) -> List[Dict[str, Any]]:
+    """并行分析多张图片（OpenCV运算期间释放GIL），结果与输入顺序一致"""
+
+    def analyze(path):
+        try:
+            return analyze_image(path)
+        except Exception as e:
+            logger.error(f"Local vision analysis failed for {path}: {e}")
+            return {"error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        return list(executor.map(analyze, image_paths))
@@ -0,0 +1,214 @@
+"""
+长篇小说分块生成（map-reduce）
+- 按章节标题切分小说，相邻章节合并为不超过 max_chars 的分块，超长章节按段落再切分
+- 各分块独立提取主体与分镜（由调用方并发执行）
+- 合并时按名称/别名及描述的字符n-gram余弦相似度去重主体，
+  重写分镜中引用的主体名称，并为分镜全局重新编号
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+SUBJECT_KINDS = ("characters", "scenes", "props", "effects")
+DEFAULT_CHUNK_CHARS = 6000
+DEFAULT_MERGE_THRESHOLD = 0.75
+# 名称仅互相包含时要求的描述相似度
+CONTAINED_NAME_THRESHOLD = 0.9
+
+CHAPTER_PATTERN = re.compile(
+    r"^\s*(?:第[零〇一二三四五六七八九十百千万两\d]+[章回节卷集]|chapter\s+\d+|序章|楔子|尾声)[^\n]*$",
+    re.M | re.I,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def split_chapters(text: str) -> List[str]:
+    """按章节标题切分，没有章节标题时整体作为一章"""
+    starts = [m.start() for m in CHAPTER_PATTERN.finditer(text)]
+    if not starts:
+        return [text] if text.strip() else []
+    if starts[0] > 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(text)]
+    chapters = [text[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+    return [c for c in chapters if c.strip()]
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """超长章节按段落切分，单个段落仍超长时硬切"""
+    pieces, current = [], ""
+    for paragraph in text.splitlines(keepends=True):
+        while len(paragraph) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if len(current) + len(paragraph) > max_chars and current:
+            pieces.append(current)
+            current = ""
+        current += paragraph
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def build_chunks(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """切分为若干不超过 max_chars 的分块，尽量保持章节完整"""
+    chunks, current = [], ""
+    for chapter in split_chapters(text):
+        if len(chapter) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_long(chapter, max_chars))
+        elif len(current) + len(chapter) > max_chars:
+            chunks.append(current)
+            current = chapter
+        else:
+            current += chapter
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def char_ngrams(text: str, n: int = 2) -> Counter:
+    """字符n-gram计数向量（忽略空白与标点）"""
+    cleaned = re.sub(r"[\s\W_]+", "", (text or "").lower())
+    if len(cleaned) < n:
+        return Counter([cleaned]) if cleaned else Counter()
+    return Counter(cleaned[i:i + n] for i in range(len(cleaned) - n + 1))
+
+
+def cosine_similarity(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"\s+", "", str(name or "")).lstrip("@").lower()
+
+
+def _aliases(item: Dict) -> List[str]:
+    aliases = item.get("aliases") or []
+    if isinstance(aliases, str):
+        aliases = [aliases]
+    return [alias for alias in aliases if isinstance(alias, str) and alias]
+
+
+def _subject_names(item: Dict) -> set:
+    """主体的名称与别名（规范化后）"""
+    names = {_normalize_name(name) for name in [item.get("name")] + _aliases(item)}
+    names.discard("")
+    return names
+
+
+def _same_subject(a: Dict, b: Dict, threshold: float) -> bool:
+    """
+    名称或别名相同，或名称与描述的综合相似度超过阈值
+
+    名称只是互相包含时（如"小明"与"小明的母亲"）通常是不同主体，
+    仅在描述几乎一致（不低于 CONTAINED_NAME_THRESHOLD）时才合并
+    """
+    names_a, names_b = _subject_names(a), _subject_names(b)
+    if not names_a or not names_b:
+        return False
+    if names_a & names_b:
+        return True
+    name_a, name_b = _normalize_name(a.get("name")), _normalize_name(b.get("name"))
+    desc_sim = cosine_similarity(
+        char_ngrams(a.get("description", "")), char_ngrams(b.get("description", ""))
+    )
+    if name_a in name_b or name_b in name_a:
+        return desc_sim >= max(threshold, CONTAINED_NAME_THRESHOLD)
+    name_sim = cosine_similarity(char_ngrams(name_a, 1), char_ngrams(name_b, 1))
+    return 0.5 * name_sim + 0.5 * desc_sim >= threshold
+
+
+def _merge_into(target: Dict, other: Dict):
+    """用重复条目补全缺失字段，描述保留更详细的一份，别名取并集"""
+    for key, value in other.items():
+        if key in ("name", "aliases"):
+            continue
+        if not target.get(key) and value:
+            target[key] = value
+    if len(str(other.get("description", ""))) > len(str(target.get("description", ""))):
+        target["description"] = other["description"]
+    aliases = [name for name in [other.get("name")] + _aliases(other) if name and name != target.get("name")]
+    if aliases:
+        target["aliases"] = list(dict.fromkeys(_aliases(target) + aliases))
+
+
+def merge_subjects(items: List[Dict], threshold: float = DEFAULT_MERGE_THRESHOLD) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    去重同一类主体
+
+    :return: (去重后的主体列表, 被合并名称 -> 保留名称)
+    """
+    merged: List[Dict] = []
+    aliases: Dict[str, str] = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get("name"):
+            continue
+        for existing in merged:
+            if _same_subject(existing, item, threshold):
+                _merge_into(existing, item)
+                for name in [item["name"]] + _aliases(item):
+                    if name != existing["name"]:
+                        aliases[name] = existing["name"]
+                break
+        else:
+            merged.append(dict(item))
+    return merged, aliases
+
+
+def _rewrite_reference(ref, aliases: Dict[str, str]):
+    if not isinstance(ref, str):
+        return ref
+    prefix = "@" if ref.startswith("@") else ""
+    name = ref[len(prefix):]
+    return prefix + aliases.get(name, name)
+
+
+def merge_partial_results(partials: List[Optional[Dict]], threshold: float = DEFAULT_MERGE_THRESHOLD) -> Dict:
+    """合并各分块的生成结果（按分块顺序）"""
+    partials = [p for p in partials if isinstance(p, dict)]
+    summaries = [str(p.get("summary")).strip() for p in partials if p.get("summary")]
+
+    subjects: Dict[str, List[Dict]] = {}
+    aliases: Dict[str, str] = {}
+    for kind in SUBJECT_KINDS:
+        items = [item for p in partials for item in ((p.get("subjects") or {}).get(kind) or [])]
+        subjects[kind], kind_aliases = merge_subjects(items, threshold)
+        aliases.update(kind_aliases)
+
+    storyboard = []
+    for p in partials:
+        for scene in p.get("storyboard") or []:
+            if not isinstance(scene, dict):
+                continue
+            scene = dict(scene)
+            scene["scene_id"] = len(storyboard) + 1
+            required = scene.get("required_subjects")
+            if isinstance(required, dict) and aliases:
+                scene["required_subjects"] = {
+                    kind: list(dict.fromkeys(_rewrite_reference(ref, aliases) for ref in refs))
+                    if isinstance(refs, list) else refs
+                    for kind, refs in required.items()
+                }
+            storyboard.append(scene)
+
+    if aliases:
+        logger.info(f"merged duplicate subjects: {aliases}")
+    return {
+        "summary": "\n".join(summaries),
+        "subjects": subjects,
+        "storyboard": storyboard,
+    }
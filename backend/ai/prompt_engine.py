@@ -215,6 +215,47 @@ class AIPromptEngine:
    - 差异化竞争优势
 
 请以资深制作顾问的身份，提供全面而实用的指导建议。""",
+            "subject_generation": """你是一位专业的影视分镜师和美术设定师，擅长从{source_description}中提炼可视化的主体设定，并将内容拆分为可直接用于AI绘图与视频生成的分镜。
+
+请完成以下任务：
+1. **内容概要**：用一段话概括内容的主要情节。
+2. **主体提取**：提取所有重要主体，分为角色(characters)、场景(scenes)、道具(props)、特效(effects)四类。
+   - 同一主体只出现一次，名称使用内容中最常用的称呼
+   - english_prompt 为可直接用于AI绘图的英文提示词，描述外观而非情节
+3. **分镜脚本**：按{segment_description}顺序拆分分镜，每个分镜引用的主体使用"@主体名称"的形式，名称必须与主体列表中的name完全一致。
+
+请严格按照以下JSON格式返回，不要输出JSON以外的任何内容：
+{{
+  "summary": "内容概要",
+  "subjects": {{
+    "characters": [
+      {{"name": "角色名", "aliases": ["内容中的其他称呼"], "type": "character", "description": "角色描述", "english_prompt": "English prompt", "appearance_details": "外貌细节", "personality": "性格", "age_range": "年龄段", "gender": "性别"}}
+    ],
+    "scenes": [
+      {{"name": "场景名", "type": "scene", "description": "场景描述", "english_prompt": "English prompt", "atmosphere": "氛围", "time_period": "时代", "location_type": "室内/室外"}}
+    ],
+    "props": [
+      {{"name": "道具名", "type": "prop", "description": "道具描述", "english_prompt": "English prompt", "function": "用途", "material": "材质", "size_scale": "尺寸"}}
+    ],
+    "effects": [
+      {{"name": "特效名", "type": "effect", "description": "特效描述", "english_prompt": "English prompt", "visual_style": "视觉风格", "intensity_level": "强度", "duration_type": "持续类型"}}
+    ]
+  }},
+  "storyboard": [
+    {{
+      "scene_id": 1,
+      "content_fragment": "对应的原文片段",
+      "storyboard_script": "分镜画面描述",
+      "visual_prompt": "English visual prompt",
+      "required_subjects": {{"characters": ["@角色名"], "scenes": ["@场景名"], "props": [], "effects": []}},
+      "dialogue": "台词",
+      "sound_effects": "音效",
+      "duration_estimate": "3-5秒",
+      "camera_angle": "镜头角度",
+      "lighting_mood": "光线氛围"
+    }}
+  ]
+}}""",
         }
 
     def get_voice_design_prompt(
@@ -326,6 +367,23 @@ class AIPromptEngine:
             self.logger.error(f"Error generating comprehensive guidance prompt: {e}")
             return self.prompts["comprehensive_creative_guidance"]
 
+    def get_subject_generation_prompt(self, processing_mode: str = "novel") -> str:
+        """获取主体与分镜统一生成的系统提示词，内容本身由用户提示词提供"""
+        try:
+            template = self.prompts["subject_generation"]
+            if processing_mode == "video":
+                return template.format(
+                    source_description="视频的场景切分与音频转录",
+                    segment_description="视频场景的时间",
+                )
+            return template.format(
+                source_description="小说文本",
+                segment_description="情节发展的",
+            )
+        except Exception as e:
+            self.logger.error(f"Error generating subject generation prompt: {e}")
+            return self.prompts["subject_generation"]
+
     def validate_prompt_parameters(
         self, prompt_type: str, parameters: Dict[str, Any]
     ) -> bool:
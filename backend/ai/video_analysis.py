@@ -1,22 +1,39 @@
 import os
 import logging
-import base64
 from typing import Dict, List, Any, Optional
 from PIL import Image
-import io
+
+from backend.ai.image_payload import get_image_payload_cache
+from backend.llm.structured import JSON_RESPONSE_FORMAT, resolve_structured
+
+# 批量分析时每个请求包含的关键帧数量与缩放尺寸
+DEFAULT_BATCH_SIZE = 6
+BATCH_MAX_SIZE = 512
+# 拼图模式下单张拼图的图片token预算
+DEFAULT_SHEET_TOKEN_BUDGET = 765
+# 单帧分析的必需字段
+FRAME_ANALYSIS_FIELDS = {"description": str, "subjects": list}
+FRAME_BATCH_FIELDS = {"frames": list}
 
 class VideoFrameAnalyzer:
     """视频关键帧AI分析器"""
     
-    def __init__(self, llm_service=None):
+    def __init__(self, llm_service=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 contact_sheet: bool = False, sheet_token_budget: int = DEFAULT_SHEET_TOKEN_BUDGET):
         """
         初始化视频帧分析器
         
         Args:
             llm_service: LLM服务实例，用于图像分析
+            batch_size: 每个请求打包的关键帧数量，1表示逐帧分析
+            contact_sheet: 是否把场景关键帧拼成一张带编号的网格图，一次请求分析整个场景
+            sheet_token_budget: 拼图的图片token预算
         """
         self.logger = logging.getLogger(__name__)
         self.llm_service = llm_service
+        self.batch_size = max(1, int(batch_size))
+        self.contact_sheet = contact_sheet
+        self.sheet_token_budget = int(sheet_token_budget)
     
     def analyze_frame(self, image_path: str, analysis_type: str = "comprehensive") -> Dict[str, Any]:
         """
@@ -37,20 +54,19 @@ class VideoFrameAnalyzer:
                     "message": "图片文件不存在"
                 }
             
-            # 读取并编码图片
-            image_base64 = self._encode_image_to_base64(image_path)
-            if not image_base64:
-                return {
-                    "success": False,
-                    "error": "Failed to encode image",
-                    "message": "图片编码失败"
-                }
-            
-            # 根据分析类型生成提示词
-            prompt = self._generate_analysis_prompt(analysis_type)
-            
             # 调用LLM进行图像分析
             if self.llm_service:
+                # 读取并编码图片
+                image_base64 = self._encode_image_to_base64(image_path)
+                if not image_base64:
+                    return {
+                        "success": False,
+                        "error": "Failed to encode image",
+                        "message": "图片编码失败"
+                    }
+                
+                # 根据分析类型生成提示词
+                prompt = self._generate_analysis_prompt(analysis_type)
                 analysis_result = self._analyze_with_llm(image_base64, prompt)
             else:
                 # 如果没有LLM服务，返回基础分析
@@ -96,17 +112,37 @@ class VideoFrameAnalyzer:
                 "camera_angle": ""
             }
             
-            # 分析每个关键帧
-            for i, frame_path in enumerate(scene_frames):
-                self.logger.info(f"Analyzing frame {i+1}/{len(scene_frames)} for scene {scene_id}")
-                
-                frame_result = self.analyze_frame(frame_path, "comprehensive")
-                if frame_result["success"]:
+            if self.llm_service and (self.contact_sheet or self.batch_size > 1):
+                # 多个关键帧放入同一个请求（拼图或逐张附图），场景描述一并返回
+                if self.contact_sheet:
+                    frames, descriptions, usage = self.analyze_frames_contact_sheet(scene_frames, scene_id)
+                else:
+                    frames, descriptions, usage = self.analyze_frames_batched(scene_frames, scene_id)
+                scene_analysis["frames"] = frames
+                scene_analysis["token_usage"] = usage
+                if descriptions:
+                    scene_analysis["scene_description"] = "\n".join(descriptions)
+            elif not self.llm_service:
+                # 未配置LLM时并行做本地视觉分析
+                for i, (frame_path, analysis) in enumerate(zip(scene_frames, self._analyze_frames_locally(scene_frames))):
                     scene_analysis["frames"].append({
                         "frame_index": i,
                         "frame_path": frame_path,
-                        "analysis": frame_result["analysis"]
+                        "analysis": analysis
                     })
+                self._fill_local_scene_features(scene_analysis)
+            else:
+                # 分析每个关键帧
+                for i, frame_path in enumerate(scene_frames):
+                    self.logger.info(f"Analyzing frame {i+1}/{len(scene_frames)} for scene {scene_id}")
+                    
+                    frame_result = self.analyze_frame(frame_path, "comprehensive")
+                    if frame_result["success"]:
+                        scene_analysis["frames"].append({
+                            "frame_index": i,
+                            "frame_path": frame_path,
+                            "analysis": frame_result["analysis"]
+                        })
             
             # 生成场景总结
             if scene_analysis["frames"]:
@@ -127,25 +163,182 @@ class VideoFrameAnalyzer:
                 "message": "场景帧分析失败"
             }
     
-    def _encode_image_to_base64(self, image_path: str) -> Optional[str]:
-        """将图片编码为base64字符串"""
+    def analyze_frames_batched(self, frame_paths: List[str], scene_id: int = 0):
+        """
+        批量分析关键帧：每 batch_size 帧缩小后放入同一个多模态请求，
+        要求模型按帧编号返回JSON；解析失败或缺失的帧退回逐帧分析
+        
+        Returns:
+            (帧分析列表, 各批次的场景描述列表, token用量)
+        """
+        frames = []
+        descriptions = []
+        usage = self._new_usage("batched")
+        for start in range(0, len(frame_paths), self.batch_size):
+            batch = list(enumerate(frame_paths[start:start + self.batch_size], start))
+            self.logger.info(
+                f"Analyzing frames {start + 1}-{start + len(batch)}/{len(frame_paths)} for scene {scene_id} in one request"
+            )
+            content = [{"type": "text", "text": self._generate_batch_prompt([f"f{i + 1}" for i, _ in batch])}]
+            payloads = get_image_payload_cache().encode_many([path for _, path in batch], max_size=BATCH_MAX_SIZE)
+            for (i, frame_path), image_base64 in zip(batch, payloads):
+                if not image_base64:
+                    continue
+                content.append({"type": "text", "text": f"帧 f{i + 1}："})
+                content.append({
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}
+                })
+            
+            analyses, description = self._request_frame_analyses(content, batch, usage)
+            if description:
+                descriptions.append(description)
+            frames.extend(self._collect_frames(batch, analyses, scene_id, usage))
+        return frames, descriptions, usage
+    
+    def analyze_frames_contact_sheet(self, frame_paths: List[str], scene_id: int = 0):
+        """
+        拼图分析：场景的全部关键帧拼成一张带编号的网格图，一次请求描述整个场景及其变化；
+        拼图失败时退回批量分析
+        
+        Returns:
+            (帧分析列表, 场景描述列表, token用量)
+        """
+        batch = list(enumerate(frame_paths))
         try:
-            with Image.open(image_path) as img:
-                # 调整图片大小以减少token消耗
-                max_size = (1024, 1024)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # 转换为RGB格式
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # 编码为base64
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=85)
-                img_bytes = buffer.getvalue()
-                
-                return base64.b64encode(img_bytes).decode('utf-8')
-                
+            from backend.ai.contact_sheet import build_contact_sheet
+            
+            sheet_base64, sheet_info = build_contact_sheet(
+                frame_paths, [f"f{i + 1}" for i, _ in batch], token_budget=self.sheet_token_budget
+            )
+        except Exception as e:
+            self.logger.error(f"Contact sheet build failed: {str(e)}")
+            sheet_base64, sheet_info = None, {}
+        if not sheet_base64:
+            return self.analyze_frames_batched(frame_paths, scene_id)
+        
+        self.logger.info(
+            f"Analyzing {len(frame_paths)} frames for scene {scene_id} as a "
+            f"{sheet_info['rows']}x{sheet_info['cols']} contact sheet ({sheet_info['width']}x{sheet_info['height']})"
+        )
+        usage = self._new_usage("contact_sheet")
+        usage["estimated_image_tokens"] = sheet_info["estimated_image_tokens"]
+        prompt = self._generate_batch_prompt(
+            sheet_info["labels"],
+            "以下是同一视频片段按时间顺序排列的关键帧拼图，每格左上角标注了帧编号",
+        ) + "\n\nscene_description 中请重点描述画面之间的动作变化与镜头运动。"
+        content = [
+            {"type": "text", "text": prompt},
+            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{sheet_base64}"}},
+        ]
+        analyses, description = self._request_frame_analyses(content, batch, usage)
+        frames = self._collect_frames(batch, analyses, scene_id, usage)
+        return frames, [description] if description else [], usage
+    
+    def _analyze_frames_locally(self, frame_paths: List[str]) -> List[Dict[str, Any]]:
+        """批量本地分析，缺少OpenCV时逐帧退回基础分析"""
+        try:
+            from backend.ai.local_vision import analyze_images
+        except ImportError:
+            return [self._basic_image_analysis(path) for path in frame_paths]
+        return [
+            analysis if "error" not in analysis else self._basic_image_analysis(path)
+            for path, analysis in zip(frame_paths, analyze_images(frame_paths))
+        ]
+    
+    def _fill_local_scene_features(self, scene_analysis: Dict[str, Any]):
+        """用中间关键帧的本地分析结果填充场景的色调、光线和景别"""
+        frames = [f for f in scene_analysis["frames"] if f["analysis"].get("analysis_method") == "local_vision"]
+        if not frames:
+            return
+        middle = frames[len(frames) // 2]["analysis"]
+        scene_analysis["dominant_colors"] = middle.get("dominant_colors", [])
+        scene_analysis["lighting_conditions"] = middle["technical_features"].get("lighting", "")
+        scene_analysis["camera_angle"] = middle["technical_features"].get("shot_type", "")
+    
+    def _new_usage(self, mode: str) -> Dict[str, Any]:
+        return {"mode": mode, "requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    
+    def _add_usage(self, usage: Dict[str, Any], response: Optional[Dict]):
+        usage["requests"] += 1
+        reported = (response or {}).get("usage") or {}
+        usage["prompt_tokens"] += reported.get("prompt_tokens") or 0
+        usage["completion_tokens"] += reported.get("completion_tokens") or 0
+    
+    def _collect_frames(self, batch: List[tuple], analyses: Dict[int, Dict], scene_id: int, usage: Dict[str, Any]):
+        """整理一批帧的分析结果，缺失的帧退回逐帧分析"""
+        frames = []
+        for i, frame_path in batch:
+            analysis = analyses.get(i)
+            if analysis is None:
+                self.logger.warning(f"Frame {i + 1} of scene {scene_id} missing in batch response, analyzing alone")
+                frame_result = self.analyze_frame(frame_path, "comprehensive")
+                usage["requests"] += 1
+                if not frame_result["success"]:
+                    continue
+                analysis = frame_result["analysis"]
+            frames.append({
+                "frame_index": i,
+                "frame_path": frame_path,
+                "analysis": analysis
+            })
+        return frames
+    
+    def _request_frame_analyses(self, content: List[Dict], batch: List[tuple], usage: Dict[str, Any]):
+        """
+        发送多帧分析请求并按帧编号解析结果
+        
+        Returns:
+            ({帧序号: 分析结果}, 场景描述)，请求或解析失败时返回 ({}, "")
+        """
+        try:
+            supports_json_mode = getattr(self.llm_service, "supports_json_mode", None)
+            response = self.llm_service.chat_completion(
+                [{"role": "user", "content": content}],
+                response_format=JSON_RESPONSE_FORMAT if supports_json_mode and supports_json_mode() else None
+            )
+            self._add_usage(usage, response)
+            if not response or "choices" not in response:
+                return {}, ""
+            # 截断的响应也能保留已完整返回的帧，缺失的帧由调用方逐帧补分析
+            data = resolve_structured(
+                "frame_analysis_batch", response["choices"][0]["message"]["content"], FRAME_BATCH_FIELDS
+            ).data
+        except Exception as e:
+            self.logger.error(f"Batched frame analysis failed: {str(e)}")
+            return {}, ""
+        if data is None:
+            return {}, ""
+        
+        items = data.get("frames", []) if isinstance(data, dict) else data
+        frame_ids = {f"f{i + 1}": i for i, _ in batch}
+        analyses = {}
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and str(item.get("frame_id")) in frame_ids:
+                analysis = {k: v for k, v in item.items() if k != "frame_id"}
+                analyses[frame_ids[str(item["frame_id"])]] = analysis
+        description = data.get("scene_description", "") if isinstance(data, dict) else ""
+        return analyses, description if isinstance(description, str) else ""
+    
+    def _generate_batch_prompt(self, frame_ids: List[str], intro: str = "以下按时间顺序给出同一视频片段的关键帧") -> str:
+        """生成批量分析提示词"""
+        return f"""{intro}，共 {len(frame_ids)} 帧，编号依次为 {", ".join(frame_ids)}。
+请逐帧分析，每帧提供：
+1. description：画面描述，包括内容、构图、色彩
+2. subjects：画面中的人物、物体、场景元素列表
+3. emotions：情感氛围
+4. technical_features：拍摄角度、光线条件、景深等
+5. story_elements：可能的故事情节或场景背景
+
+并给出 scene_description：综合所有关键帧的连贯场景描述（主要视觉元素、人物动作、环境氛围、镜头运动），200字以内。
+
+只返回JSON，格式如下：
+{{"frames": [{{"frame_id": "{frame_ids[0]}", "description": "", "subjects": [], "emotions": "", "technical_features": "", "story_elements": ""}}], "scene_description": ""}}"""
+    
+    def _encode_image_to_base64(self, image_path: str, max_size: int = 1024, quality: int = 85) -> Optional[str]:
+        """将图片编码为base64字符串（结果按文件内容缓存）"""
+        try:
+            return get_image_payload_cache().get_or_encode(image_path, max_size, quality)
         except Exception as e:
             self.logger.error(f"Image encoding failed: {str(e)}")
             return None
@@ -162,7 +355,7 @@ class VideoFrameAnalyzer:
 4. 技术特征：分析拍摄角度、光线条件、景深等
 5. 故事元素：推测可能的故事情节或场景背景
 
-请以JSON格式返回结果。"""
+请以JSON格式返回结果，至少包含 description（字符串）和 subjects（数组）字段。"""
         
         elif analysis_type == "subjects":
             return base_prompt + """重点识别画面中的主体元素：
@@ -171,7 +364,7 @@ class VideoFrameAnalyzer:
 3. 场景：室内/室外、具体地点、环境特征
 4. 特效：光效、粒子、魔法等特殊效果
 
-请以JSON格式返回结果。"""
+请以JSON格式返回结果，至少包含 description（字符串）和 subjects（数组）字段。"""
         
         elif analysis_type == "description":
             return base_prompt + """生成详细的画面描述：
@@ -181,7 +374,7 @@ class VideoFrameAnalyzer:
 4. 环境氛围和细节
 5. 适合用于AI绘画的提示词
 
-请以JSON格式返回结果。"""
+请以JSON格式返回结果，至少包含 description（字符串）和 subjects（数组）字段。"""
         
         else:
             return base_prompt + "描述这张图片的主要内容。"
@@ -205,27 +398,21 @@ class VideoFrameAnalyzer:
                 }
             ]
             
-            # 调用LLM服务
-            response = self.llm_service.chat_completion(messages)
+            # 调用LLM服务（JSON模式，缺失字段时追问）
+            result = self.llm_service.chat_completion_json(messages, FRAME_ANALYSIS_FIELDS, "frame_analysis")
             
             # 解析响应
-            if response and "choices" in response:
-                content = response["choices"][0]["message"]["content"]
-                
-                # 尝试解析JSON响应
-                try:
-                    import json
-                    analysis_data = json.loads(content)
-                    return analysis_data
-                except json.JSONDecodeError:
-                    # 如果不是JSON格式，返回文本描述
-                    return {
-                        "description": content,
-                        "subjects": [],
-                        "emotions": "",
-                        "technical_features": "",
-                        "story_elements": ""
-                    }
+            if isinstance(result.data, dict):
+                return result.data
+            if result.raw:
+                # 如果不是JSON格式，返回文本描述
+                return {
+                    "description": result.raw,
+                    "subjects": [],
+                    "emotions": "",
+                    "technical_features": "",
+                    "story_elements": ""
+                }
             
             return {"error": "No valid response from LLM"}
             
@@ -234,7 +421,19 @@ class VideoFrameAnalyzer:
             return {"error": str(e)}
     
     def _basic_image_analysis(self, image_path: str) -> Dict[str, Any]:
-        """基础图像分析（不使用LLM）"""
+        """基础图像分析（不使用LLM）：优先使用本地视觉分析，缺少OpenCV时只返回基本信息"""
+        try:
+            from backend.ai.local_vision import analyze_image
+            
+            result = analyze_image(image_path)
+            if "error" not in result:
+                return result
+            self.logger.warning(f"Local vision analysis failed: {result['error']}")
+        except ImportError as e:
+            self.logger.debug(f"Local vision unavailable: {e}")
+        except Exception as e:
+            self.logger.error(f"Local vision analysis failed: {str(e)}")
+        
         try:
             with Image.open(image_path) as img:
                 # 获取基本图像信息
@@ -262,29 +461,21 @@ class VideoFrameAnalyzer:
             return {"error": str(e)}
     
     def _analyze_dominant_colors(self, img: Image.Image, num_colors: int = 5) -> List[str]:
-        """分析图像主要颜色"""
+        """分析图像主要颜色（缩略图上做中位切分量化，只统计量化后的少量颜色）"""
         try:
-            # 缩小图像以加速处理
-            img_small = img.resize((150, 150))
+            img_small = img.convert('RGB') if img.mode != 'RGB' else img.copy()
+            img_small.thumbnail((64, 64), Image.Resampling.BILINEAR)
             
-            # 转换为RGB
-            if img_small.mode != 'RGB':
-                img_small = img_small.convert('RGB')
+            quantized = img_small.quantize(colors=num_colors)
+            palette = quantized.getpalette()
+            colors = quantized.getcolors(maxcolors=num_colors) or []
             
-            # 获取颜色数据
-            colors = img_small.getcolors(maxcolors=256*256*256)
-            if not colors:
-                return []
-            
-            # 排序并获取主要颜色
+            # 按像素数排序
             colors.sort(key=lambda x: x[0], reverse=True)
-            dominant_colors = []
-            
-            for count, color in colors[:num_colors]:
-                hex_color = "#{:02x}{:02x}{:02x}".format(*color)
-                dominant_colors.append(hex_color)
-            
-            return dominant_colors
+            return [
+                "#{:02x}{:02x}{:02x}".format(*palette[index * 3:index * 3 + 3])
+                for _, index in colors
+            ]
             
         except Exception as e:
             self.logger.error(f"Color analysis failed: {str(e)}")
@@ -0,0 +1,320 @@
+"""
+音频母带处理
+- 响度测量：EBU R128 / ITU-R BS.1770 积分响度（K加权 + 绝对/相对门限）
+- 增益与前视限幅：将音轨归一到目标响度，并限制峰值
+- 闪避（ducking）：对白出现时压低音效
+全部基于NumPy向量化按块计算，无需额外的ffmpeg loudnorm处理。
+"""
+
+import logging
+import os
+import wave
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.util.ffmpeg import decode_audio_pcm
+
+logger = logging.getLogger(__name__)
+
+# BS.1770 参数
+BLOCK_SECONDS = 0.4  # 门限块长度
+HOP_SECONDS = 0.1  # 块间步长（75%重叠）
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+# 默认母带参数
+DEFAULT_TARGET_LUFS = -16.0
+DEFAULT_CEILING_DB = -1.0
+DEFAULT_MAX_GAIN_DB = 20.0
+
+
+def _biquad_response(b, a, freqs, sample_rate):
+    """二阶滤波器在指定频率处的复数响应"""
+    z = np.exp(-1j * 2 * np.pi * freqs / sample_rate)
+    return (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+
+
+def k_weighting_power(freqs: np.ndarray, sample_rate: int) -> np.ndarray:
+    """K加权滤波器（高架 + 高通）在各频点的功率增益 |H(f)|^2"""
+    # 高架滤波器：+4dB @ 1500Hz
+    gain_db, fc, q = 4.0, 1500.0, 1 / np.sqrt(2)
+    amp = 10 ** (gain_db / 40)
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    shelf_b = (
+        amp * ((amp + 1) + (amp - 1) * cos_w0 + 2 * np.sqrt(amp) * alpha),
+        -2 * amp * ((amp - 1) + (amp + 1) * cos_w0),
+        amp * ((amp + 1) + (amp - 1) * cos_w0 - 2 * np.sqrt(amp) * alpha),
+    )
+    shelf_a = (
+        (amp + 1) - (amp - 1) * cos_w0 + 2 * np.sqrt(amp) * alpha,
+        2 * ((amp - 1) - (amp + 1) * cos_w0),
+        (amp + 1) - (amp - 1) * cos_w0 - 2 * np.sqrt(amp) * alpha,
+    )
+
+    # 高通滤波器：38Hz
+    fc, q = 38.0, 0.5
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    hp_b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+    hp_a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+
+    response = _biquad_response(shelf_b, shelf_a, freqs, sample_rate) * _biquad_response(
+        hp_b, hp_a, freqs, sample_rate
+    )
+    return np.abs(response) ** 2
+
+
+def block_powers(samples: np.ndarray, sample_rate: int, chunk_blocks: int = 256) -> np.ndarray:
+    """
+    计算每个400ms门限块的K加权均方值（各声道求和）
+
+    K加权在频域完成：块能量 = Σ|X(f)|²·|H(f)|²（Parseval定理），
+    块按 chunk_blocks 分批做FFT，内存占用与音轨长度无关。
+
+    :param samples: (帧数, 声道数) float32
+    :return: 每个块的均方值
+    """
+    block = int(round(BLOCK_SECONDS * sample_rate))
+    hop = int(round(HOP_SECONDS * sample_rate))
+    frames = samples.shape[0]
+    if frames < block:
+        samples = np.pad(samples, ((0, block - frames), (0, 0)))
+        frames = block
+
+    n_blocks = 1 + (frames - block) // hop
+    freqs = np.fft.rfftfreq(block, d=1.0 / sample_rate)
+    weights = k_weighting_power(freqs, sample_rate)
+    # 单边谱：除直流和奈奎斯特频点外能量计两次
+    weights[1:] *= 2
+    if block % 2 == 0:
+        weights[-1] /= 2
+
+    powers = np.empty(n_blocks, dtype=np.float64)
+    for channel in range(samples.shape[1]):
+        view = np.lib.stride_tricks.sliding_window_view(samples[:, channel], block)[::hop]
+        for start in range(0, n_blocks, chunk_blocks):
+            spectrum = np.fft.rfft(view[start:start + chunk_blocks], axis=1)
+            energy = (np.abs(spectrum) ** 2 * weights).sum(axis=1) / (block * block)
+            if channel == 0:
+                powers[start:start + chunk_blocks] = energy
+            else:
+                powers[start:start + chunk_blocks] += energy
+    return powers
+
+
+def integrated_loudness(samples: np.ndarray, sample_rate: int) -> float:
+    """积分响度（LUFS），静音返回 -inf"""
+    powers = block_powers(samples, sample_rate)
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(powers)
+
+    gated = powers[loudness > ABSOLUTE_GATE_LUFS]
+    if gated.size == 0:
+        return float("-inf")
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+    gated = powers[(loudness > ABSOLUTE_GATE_LUFS) & (loudness > relative_gate)]
+    if gated.size == 0:
+        return float("-inf")
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def _sliding_min(values: np.ndarray, window: int) -> np.ndarray:
+    """前向滑动最小值 out[i] = min(values[i:i+window])（van Herk/Gil-Werman算法）"""
+    n = values.size
+    if window <= 1 or n == 0:
+        return values.copy()
+    padded_len = -(-(n + window - 1) // window) * window
+    padded = np.full(padded_len, np.inf, dtype=values.dtype)
+    padded[:n] = values
+    blocks = padded.reshape(-1, window)
+    prefix = np.minimum.accumulate(blocks, axis=1).ravel()
+    suffix = np.minimum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.minimum(suffix[:n], prefix[window - 1:window - 1 + n])
+
+
+def _moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """后向滑动平均 out[i] = mean(values[i-window+1:i+1])，开头按已有样本求平均"""
+    if window <= 1:
+        return values.copy()
+    cumsum = np.cumsum(np.concatenate(([0.0], values.astype(np.float64))))
+    out = np.empty(values.size, dtype=np.float64)
+    idx = np.arange(values.size)
+    lo = np.maximum(idx - window + 1, 0)
+    out[:] = (cumsum[idx + 1] - cumsum[lo]) / (idx + 1 - lo)
+    return out
+
+
+def limit_peaks(
+    samples: np.ndarray,
+    sample_rate: int,
+    ceiling_db: float = DEFAULT_CEILING_DB,
+    lookahead_ms: float = 5.0,
+    chunk_seconds: float = 10.0,
+) -> np.ndarray:
+    """
+    前视峰值限幅
+
+    增益曲线 = 滑动平均(前视滑动最小值(所需增益))，
+    前视窗口覆盖平均窗口，保证任意样本的增益都不超过其所需增益。
+    """
+    ceiling = 10 ** (ceiling_db / 20)
+    lookahead = max(1, int(sample_rate * lookahead_ms / 1000))
+    chunk = max(int(chunk_seconds * sample_rate), lookahead * 4)
+    margin = 2 * lookahead
+    frames = samples.shape[0]
+    out = np.empty_like(samples)
+
+    for start in range(0, frames, chunk):
+        end = min(frames, start + chunk)
+        lo = max(0, start - margin)
+        hi = min(frames, end + margin)
+        peak = np.abs(samples[lo:hi]).max(axis=1)
+        required = np.minimum(1.0, ceiling / np.maximum(peak, 1e-12))
+        gain = _moving_average(_sliding_min(required, lookahead), lookahead)
+        out[start:end] = samples[start:end] * gain[start - lo:end - lo, None]
+
+    return np.clip(out, -ceiling, ceiling)
+
+
+def duck_under(
+    effects: np.ndarray,
+    dialogue: np.ndarray,
+    sample_rate: int,
+    duck_db: float = -12.0,
+    threshold_db: float = -40.0,
+    window_ms: float = 50.0,
+    release_ms: float = 300.0,
+) -> np.ndarray:
+    """
+    对白出现时压低音效
+
+    :param effects: 音效 (帧数, 声道数)
+    :param dialogue: 对白 (帧数, 声道数)，长度不足时视为静音
+    :return: 闪避后的音效
+    """
+    frames = effects.shape[0]
+    voice = np.zeros(frames, dtype=np.float64)
+    n = min(frames, dialogue.shape[0])
+    voice[:n] = (dialogue[:n].astype(np.float64) ** 2).mean(axis=1)
+
+    window = max(1, int(sample_rate * window_ms / 1000))
+    envelope = _moving_average(voice, window)
+    active = envelope > 10 ** (threshold_db / 10)
+
+    target = np.where(active, 10 ** (duck_db / 20), 1.0)
+    # 闪避区间向前后各扩展release_ms，平滑后在对白开始时已完全压低
+    release = max(1, int(sample_rate * release_ms / 1000))
+    held = _sliding_min(_sliding_min(target[::-1], release)[::-1], release)
+    gain = _moving_average(held, release)
+    return (effects * gain[:, None]).astype(effects.dtype)
+
+
+def master(
+    samples: np.ndarray,
+    sample_rate: int,
+    target_lufs: float = DEFAULT_TARGET_LUFS,
+    ceiling_db: float = DEFAULT_CEILING_DB,
+    max_gain_db: float = DEFAULT_MAX_GAIN_DB,
+) -> Tuple[np.ndarray, Dict]:
+    """
+    响度归一 + 限幅
+
+    :return: (处理后的音频, 统计信息)
+    """
+    before = integrated_loudness(samples, sample_rate)
+    if np.isinf(before):
+        return samples, {"input_lufs": None, "gain_db": 0.0, "output_lufs": None}
+
+    gain_db = float(np.clip(target_lufs - before, -max_gain_db, max_gain_db))
+    processed = samples * np.float32(10 ** (gain_db / 20))
+    processed = limit_peaks(processed, sample_rate, ceiling_db)
+    after = integrated_loudness(processed, sample_rate)
+    return processed, {
+        "input_lufs": round(before, 2),
+        "gain_db": round(gain_db, 2),
+        "output_lufs": None if np.isinf(after) else round(after, 2),
+    }
+
+
+def load_audio(audio_path: str, sample_rate: int = 44100, channels: int = 2) -> np.ndarray:
+    """解码音频为 (帧数, 声道数) float32，取值范围[-1, 1]"""
+    pcm = decode_audio_pcm(audio_path, sample_rate, channels)
+    data = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    return data.reshape(-1, channels)
+
+
+def concat_fragments(fragments, sample_rate: int = 44100, channels: int = 2) -> np.ndarray:
+    """
+    按顺序拼接音频片段，每个片段按给定时长补齐或截断到精确的采样数，
+    保证拼接后的音轨与按片段时长排列的画面逐样本对齐。
+
+    :param fragments: [(音频路径, 时长秒)]
+    """
+    total = sum(int(round(duration * sample_rate)) for _, duration in fragments)
+    track = np.zeros((total, channels), dtype=np.float32)
+    offset = 0
+    for path, duration in fragments:
+        frames = int(round(duration * sample_rate))
+        data = load_audio(path, sample_rate, channels)[:frames]
+        track[offset:offset + data.shape[0]] = data
+        offset += frames
+    return track
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int):
+    """写出16位WAV（先写临时文件再替换）"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).round().astype("<i2")
+    tmp_path = path + ".tmp"
+    with wave.open(tmp_path, "wb") as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    os.replace(tmp_path, path)
+
+
+def master_file(
+    input_path: str,
+    output_path: str,
+    target_lufs: float = DEFAULT_TARGET_LUFS,
+    ceiling_db: float = DEFAULT_CEILING_DB,
+    dialogue_path: Optional[str] = None,
+    duck_db: float = -12.0,
+    sample_rate: int = 44100,
+    channels: int = 2,
+) -> Dict:
+    """
+    对音频文件做母带处理，可选在对白下闪避并混合
+
+    Args:
+        input_path: 输入音频（音效或完整音轨）
+        output_path: 输出WAV
+        target_lufs: 目标积分响度
+        ceiling_db: 峰值上限
+        dialogue_path: 对白音轨（可选），提供时输入音频作为音效在对白下闪避后与对白混合
+        duck_db: 闪避量
+
+    Returns:
+        {"success", "output_path", "stats", "error"}
+    """
+    try:
+        track = load_audio(input_path, sample_rate, channels)
+        if dialogue_path:
+            dialogue = load_audio(dialogue_path, sample_rate, channels)
+            frames = max(track.shape[0], dialogue.shape[0])
+            track = np.pad(track, ((0, frames - track.shape[0]), (0, 0)))
+            dialogue = np.pad(dialogue, ((0, frames - dialogue.shape[0]), (0, 0)))
+            track = duck_under(track, dialogue, sample_rate, duck_db=duck_db) + dialogue
+
+        mastered, stats = master(track, sample_rate, target_lufs, ceiling_db)
+        write_wav(output_path, mastered, sample_rate)
+        logger.info(f"母带处理完成: {os.path.basename(input_path)} {stats}")
+        return {"success": True, "output_path": output_path, "stats": stats}
+    except Exception as e:
+        logger.error(f"母带处理失败 {input_path}: {e}")
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,73 @@
+"""
+LLM批量并发执行
+在单个事件循环中并发提交多个LLM请求：
+- max_in_flight 限制本批次同时在途的请求数
+- 不做额外的限速与重试：请求速率、429退避（含 Retry-After）由 rate_limit 中
+  进程内共享的令牌桶与AIMD并发控制统一负责，重试由各调用点的客户端完成
+- 结果按输入顺序回调：连续的前缀一旦全部完成就立即交给 on_ready，
+  调用方可以边请求边按顺序写出结果
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class LLMBatchExecutor:
+    """LLM请求批量并发执行器"""
+
+    def __init__(self, max_in_flight: int = 4):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.logger = logging.getLogger(__name__)
+
+    async def _call(self, fn: Callable, item: Any, index: int, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                # 同步的LLM调用放到线程中执行，事件循环只负责调度
+                return await asyncio.to_thread(fn, item)
+            except Exception as e:
+                self.logger.error(f"LLM batch item {index} failed: {e}")
+                raise
+
+    async def map_ordered(
+        self,
+        fn: Callable[[Any], Any],
+        items: Sequence[Any],
+        on_ready: Optional[Callable[[int, Any], None]] = None,
+    ) -> List[Any]:
+        """
+        并发执行 fn(item)，按输入顺序返回结果
+
+        :param on_ready: 按顺序回调 on_ready(index, result)，回调异常会中止整个批次
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = [
+            asyncio.ensure_future(self._call(fn, item, i, semaphore))
+            for i, item in enumerate(items)
+        ]
+        results: Dict[int, Any] = {}
+        next_index = 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                await task
+                # 收集所有已完成的任务，按顺序释放连续前缀
+                while next_index < len(tasks) and tasks[next_index].done():
+                    results[next_index] = tasks[next_index].result()
+                    if on_ready:
+                        on_ready(next_index, results[next_index])
+                    next_index += 1
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [results[i] for i in range(len(tasks))]
+
+    def run(
+        self,
+        fn: Callable[[Any], Any],
+        items: Sequence[Any],
+        on_ready: Optional[Callable[[int, Any], None]] = None,
+    ) -> List[Any]:
+        """同步入口：在新的事件循环中执行 map_ordered"""
+        return asyncio.run(self.map_ordered(fn, items, on_ready))
@@ -0,0 +1,186 @@
+"""
+LLM服务商HTTP客户端注册表
+进程内为每个服务商复用长连接（连接池 + keep-alive），避免每次请求重新握手TLS。
+- get_session: 同步 requests.Session
+- post_json / post_json_stream: 经限流的JSON请求（流式请求逐段返回SSE中的文本增量）
+- get_openai_client: 按 (api_key, base_url, 超时) 缓存的OpenAI客户端
+超时可通过配置项 llmTimeouts 按服务商覆盖，例如 {"siliconflow": {"connect": 5, "read": 30}}。
+"""
+
+import atexit
+import json
+import logging
+import threading
+from typing import Dict, Iterator, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.llm.rate_limit import THROTTLE_STATUS, get_rate_limiter, parse_retry_after
+from backend.util.file import get_config
+
+logger = logging.getLogger(__name__)
+
+# 服务商名称
+PROVIDER_OPENAI = "openai"
+PROVIDER_SAMBANOVA = "sambanova"
+PROVIDER_SILICONFLOW = "siliconflow"
+PROVIDER_PROFESSIONAL = "professional"
+
+# 默认超时（连接, 读取），单位秒
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    PROVIDER_OPENAI: (10.0, 120.0),
+    PROVIDER_SAMBANOVA: (10.0, 120.0),
+    PROVIDER_SILICONFLOW: (10.0, 60.0),
+    PROVIDER_PROFESSIONAL: (10.0, 60.0),
+}
+FALLBACK_TIMEOUT = (10.0, 60.0)
+
+# 每个服务商连接池的最大连接数（translate_prompts等线程池并发调用）
+POOL_MAXSIZE = 32
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_openai_clients: Dict[tuple, object] = {}
+
+
+def get_timeout(provider: str) -> Tuple[float, float]:
+    """获取服务商的 (连接超时, 读取超时)"""
+    connect, read = DEFAULT_TIMEOUTS.get(provider, FALLBACK_TIMEOUT)
+    try:
+        override = (get_config() or {}).get("llmTimeouts", {}).get(provider) or {}
+        connect = float(override.get("connect", connect))
+        read = float(override.get("read", read))
+    except Exception as e:
+        logger.warning(f"invalid llmTimeouts for {provider}: {e}")
+    return connect, read
+
+
+def get_session(provider: str) -> requests.Session:
+    """获取服务商共享的 requests.Session"""
+    with _lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return session
+
+
+def post_json(
+    provider: str, url: str, headers: Dict, payload: Dict, timeout=None, max_retries: int = 2
+) -> requests.Response:
+    """
+    通过服务商的共享会话发送JSON POST请求
+
+    请求在服务商/模型限流许可内发出；遇到429/5xx时反馈给限流器，
+    按 Retry-After 等待后重试，重试用尽后返回最后一次响应。
+    """
+    limiter = get_rate_limiter(provider, payload.get("model"))
+    session = get_session(provider)
+    for attempt in range(max_retries + 1):
+        with limiter.slot():
+            response = session.post(
+                url, headers=headers, json=payload, timeout=timeout or get_timeout(provider)
+            )
+        if response.status_code not in THROTTLE_STATUS:
+            limiter.on_success()
+            return response
+        limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+        logger.warning(
+            f"{provider} responded {response.status_code} (attempt {attempt + 1}/{max_retries + 1})"
+        )
+    return response
+
+
+def iter_sse_content(response: requests.Response) -> Iterator[str]:
+    """逐段读取OpenAI兼容的SSE流，返回 choices[0].delta.content"""
+    for raw in response.iter_lines():
+        if not raw:
+            continue
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.warning(f"skip malformed SSE event: {data[:100]}")
+            continue
+        choices = event.get("choices") or []
+        content = (choices[0].get("delta") or {}).get("content") if choices else None
+        if content:
+            yield content
+
+
+def post_json_stream(
+    provider: str, url: str, headers: Dict, payload: Dict, timeout=None, max_retries: int = 2
+) -> Iterator[str]:
+    """
+    发送流式JSON POST请求（payload中自动加上 stream=True），逐段返回文本增量
+
+    读取整个流期间占用限流槽位；开始读取前遇到429/5xx时与 post_json 一样等待后重试。
+    """
+    limiter = get_rate_limiter(provider, payload.get("model"))
+    session = get_session(provider)
+    payload = dict(payload, stream=True)
+    for attempt in range(max_retries + 1):
+        with limiter.slot():
+            response = session.post(
+                url, headers=headers, json=payload, timeout=timeout or get_timeout(provider), stream=True
+            )
+            if response.status_code not in THROTTLE_STATUS:
+                try:
+                    response.raise_for_status()
+                    yield from iter_sse_content(response)
+                finally:
+                    response.close()
+                limiter.on_success()
+                return
+            response.close()
+        limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+        logger.warning(
+            f"{provider} stream responded {response.status_code} (attempt {attempt + 1}/{max_retries + 1})"
+        )
+    response.raise_for_status()
+
+
+def get_openai_client(api_key: str, base_url: str, provider: str = PROVIDER_OPENAI):
+    """获取缓存的OpenAI客户端（客户端内部维护httpx连接池，线程安全）"""
+    from openai import OpenAI
+
+    connect, read = get_timeout(provider)
+    key = (api_key, base_url, connect, read)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            import httpx
+
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=httpx.Timeout(read, connect=connect),
+            )
+            _openai_clients[key] = client
+        return client
+
+
+@atexit.register
+def close_all():
+    """关闭所有同步会话和客户端（进程退出时自动调用）"""
+    with _lock:
+        sessions = list(_sessions.values())
+        clients = list(_openai_clients.values())
+        _sessions.clear()
+        _openai_clients.clear()
+    for session in sessions:
+        session.close()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
@@ -1,5 +1,8 @@
-from backend.llm.openai import query_openai
-from backend.llm.sambanova import query_samba_nova
+from typing import Iterator, List, Optional
+
+from backend.llm.openai import query_openai_messages, query_openai_stream
+from backend.llm.response_cache import build_messages, cached_completion, cached_stream
+from backend.llm.sambanova import query_samba_nova_messages, query_samba_nova_stream
 from backend.llm.siliconflow import query_silicon_flow
 from backend.util.file import get_config
 
@@ -9,16 +12,85 @@ def query_llm(
     system_content: str,
     model_name: str,
     temperature: float,
+    cache: Optional[bool] = None,
+) -> str:
+    """
+    查询LLM
+
+    :param cache: 是否使用响应缓存，默认仅在温度为0时使用
+    """
+    return query_llm_messages(build_messages(system_content, input_text), model_name, temperature, cache)
+
+
+def query_llm_messages(
+    messages: List[dict],
+    model_name: str,
+    temperature: float,
+    cache: Optional[bool] = None,
 ) -> str:
-    url = get_config()["url"]
+    """
+    以完整的对话消息查询LLM，用于多轮对话（如带上一轮回答的追问）
+
+    :param cache: 是否使用响应缓存，默认仅在温度为0时使用
+    """
+    config = get_config()
+    url = config["url"]
+    if "sambanova" in url.lower():
+        provider, query = "sambanova", query_samba_nova_messages
+    else:
+        provider, query = "openai", query_openai_messages
+    return cached_completion(
+        provider,
+        config.get("model", ""),
+        messages,
+        temperature,
+        lambda: query(messages, model_name, temperature),
+        cache=cache,
+        url=url,
+    )
+
+
+def query_llm_stream(
+    input_text: str,
+    system_content: str,
+    model_name: str,
+    temperature: float,
+    cache: Optional[bool] = None,
+) -> Iterator[str]:
+    """
+    流式查询LLM，逐段返回生成的文本
+
+    :param cache: 是否使用响应缓存，默认仅在温度为0时使用；命中时一次性返回完整文本
+    """
+    config = get_config()
+    url = config["url"]
     if "sambanova" in url.lower():
-        return query_samba_nova(input_text, system_content, model_name, temperature)
-    return query_openai(input_text, system_content, model_name, temperature)
+        provider, query = "sambanova", query_samba_nova_stream
+    else:
+        provider, query = "openai", query_openai_stream
+    # 与 query_llm 共用缓存键，流式与非流式结果可以互相命中
+    return cached_stream(
+        provider,
+        config.get("model", ""),
+        build_messages(system_content, input_text),
+        temperature,
+        lambda: query(input_text, system_content, model_name, temperature),
+        cache=cache,
+        url=url,
+    )
 
 
 def llm_translate(input_text: str) -> str:
     translate_sys = "把输入完全翻译成英文，不要输出翻译文本以外的内容，只需要输出翻译后的文本。如果包含翻译之外的内容，则重新输出"
-    return query_silicon_flow(input_text, translate_sys, 0.01)
+    # 翻译温度接近0，结果稳定，显式开启缓存；SiliconFlow在多个免费模型间轮换，模型不计入缓存键
+    return cached_completion(
+        "siliconflow",
+        "free-models",
+        build_messages(translate_sys, input_text),
+        0.01,
+        lambda: query_silicon_flow(input_text, translate_sys, 0.01),
+        cache=True,
+    )
 
 
 # Example usage:
@@ -1,11 +1,42 @@
 import logging
-import json
 from typing import Dict, List, Any, Optional
 from backend.llm.openai import query_openai
 from backend.llm.sambanova import query_samba_nova
-from backend.llm.siliconflow import query_silicon_flow
+from backend.llm.clients import PROVIDER_OPENAI, get_openai_client
+from backend.llm.llm import llm_translate
+from backend.llm.rate_limit import call_with_limits
+from backend.llm.response_cache import cached_completion
+from backend.llm.structured import JSON_RESPONSE_FORMAT, StructuredResult, resolve_structured
 from backend.util.file import get_config
-from openai import OpenAI
+
+# 分镜脚本的必需字段与缺失时的默认值
+STORYBOARD_SCRIPT_FIELDS = {
+    "shot_type": str,
+    "camera_angle": str,
+    "camera_movement": str,
+    "focus_elements": list,
+    "emotional_tone": str,
+    "description": str,
+}
+STORYBOARD_SCRIPT_DEFAULTS = {
+    "shot_type": "中景",
+    "camera_angle": "正面",
+    "camera_movement": "静止",
+    "focus_elements": ["主要内容"],
+    "emotional_tone": "中性",
+    "description": "",
+}
+
+
+def _is_json_mode_unsupported(error: Exception) -> bool:
+    """服务明确拒绝 response_format 参数（400或不支持的参数），而不是限流、超时等临时错误"""
+    message = str(error).lower()
+    if "response_format" not in message:
+        return False
+    if getattr(error, "status_code", None) == 400:
+        return True
+    return any(word in message for word in ("unsupported", "not support", "unknown", "unrecognized", "invalid"))
+
 
 class LLMService:
     """LLM服务类，支持文本和多模态图像分析"""
@@ -13,47 +44,140 @@ class LLMService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.config = get_config()
+        # 是否使用 response_format（JSON模式）；服务明确不支持的 (url, 模型) 单独关闭
+        self.json_mode = bool(self.config.get("llmJsonMode", True))
+        self._json_mode_unsupported = set()
         self._init_client()
     
     def _init_client(self):
         """初始化OpenAI客户端"""
         try:
-            self.client = OpenAI(
-                api_key=self.config.get("apikey"),
-                base_url=self.config.get("url")
+            self.client = get_openai_client(
+                self.config.get("apikey"),
+                self.config.get("url")
             )
         except Exception as e:
             self.logger.error(f"Failed to initialize OpenAI client: {str(e)}")
             self.client = None
     
-    def chat_completion(self, messages: List[Dict], model: str = None, temperature: float = 0.7) -> Optional[Dict]:
-        """通用聊天完成接口，支持多模态输入"""
+    def _model_name(self, model: str = None) -> str:
+        return model or self.config.get("model", "gpt-4o")
+    
+    def supports_json_mode(self, model: str = None) -> bool:
+        """当前服务与模型是否使用JSON模式"""
+        return self.json_mode and (self.config.get("url"), self._model_name(model)) not in self._json_mode_unsupported
+    
+    def chat_completion(self, messages: List[Dict], model: str = None, temperature: float = 0.7, cache: Optional[bool] = None,
+                        response_format: Optional[Dict] = None, refresh_cache: bool = False) -> Optional[Dict]:
+        """
+        通用聊天完成接口，支持多模态输入
+        
+        cache: 是否使用响应缓存，默认仅在温度为0时使用
+        refresh_cache: 不读取已缓存的响应，重新请求并覆盖缓存
+        response_format: 输出格式约束，如 {"type": "json_object"}
+        """
         try:
-            if not self.client:
-                self.logger.error("OpenAI client not initialized")
-                return None
-            
-            model_name = model or self.config.get("model", "gpt-4o")
-            
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                temperature=temperature,
-                stream=False
-            )
-            
-            return {
-                "choices": [{
-                    "message": {
-                        "content": response.choices[0].message.content
-                    }
-                }]
-            }
-            
+            return self._chat_completion(messages, model, temperature, cache, response_format, refresh_cache)
         except Exception as e:
             self.logger.error(f"Chat completion failed: {str(e)}")
             return None
     
+    def _chat_completion(self, messages: List[Dict], model: Optional[str], temperature: float, cache: Optional[bool],
+                         response_format: Optional[Dict], refresh_cache: bool) -> Optional[Dict]:
+        """chat_completion 的实现，请求异常直接抛出"""
+        if not self.client:
+            self.logger.error("OpenAI client not initialized")
+            return None
+        
+        model_name = self._model_name(model)
+        usage = {}
+        
+        def request_completion():
+            response = call_with_limits(
+                PROVIDER_OPENAI,
+                model_name,
+                lambda: self.client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=False,
+                    **({"response_format": response_format} if response_format else {})
+                )
+            )
+            if getattr(response, "usage", None):
+                usage.update(
+                    prompt_tokens=response.usage.prompt_tokens,
+                    completion_tokens=response.usage.completion_tokens,
+                    total_tokens=response.usage.total_tokens
+                )
+            return response.choices[0].message.content
+        
+        content = cached_completion(
+            "openai",
+            model_name,
+            messages,
+            temperature,
+            request_completion,
+            cache=cache,
+            refresh=refresh_cache,
+            url=self.config.get("url"),
+            **({"response_format": response_format} if response_format else {})
+        )
+        
+        # 命中响应缓存时没有实际请求，usage 为空
+        return {
+            "choices": [{
+                "message": {
+                    "content": content
+                }
+            }],
+            "usage": usage or None
+        }
+    
+    def chat_completion_json(self, messages: List[Dict], required: Dict[str, type], call_site: str,
+                             temperature: float = 0.7, cache: Optional[bool] = None, max_reasks: int = 1,
+                             refresh_cache: bool = False) -> StructuredResult:
+        """
+        要求返回JSON对象的聊天接口：优先使用JSON模式，解析失败时容错修复，
+        只针对缺失的字段追问
+        
+        required: 必需字段及类型，如 {"description": str, "subjects": list}
+        call_site: 调用点名称，用于统计解析失败率
+        """
+        model_name = self._model_name()
+        
+        def send(msgs):
+            if self.supports_json_mode(model_name):
+                try:
+                    response = self._chat_completion(msgs, model_name, temperature, cache,
+                                                     JSON_RESPONSE_FORMAT, refresh_cache)
+                    return response["choices"][0]["message"]["content"] if response else None
+                except Exception as e:
+                    if not _is_json_mode_unsupported(e):
+                        self.logger.error(f"Chat completion failed: {str(e)}")
+                        return None
+                    # 服务明确拒绝 response_format，仅对该服务的该模型关闭JSON模式
+                    self.logger.warning(f"response_format not supported by {model_name}, JSON mode disabled: {str(e)}")
+                    self._json_mode_unsupported.add((self.config.get("url"), model_name))
+            response = self.chat_completion(msgs, model_name, temperature, cache, refresh_cache=refresh_cache)
+            if response is None:
+                return None
+            return response["choices"][0]["message"]["content"]
+        
+        content = send(messages)
+        if content is None:
+            return resolve_structured(call_site, None, required)
+        return resolve_structured(
+            call_site,
+            content,
+            required,
+            reask=lambda instruction: send(messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": instruction}
+            ]),
+            max_reasks=max_reasks
+        )
+    
     def analyze_image(self, image_base64: str, prompt: str, model: str = None) -> Optional[Dict]:
         """分析图像内容"""
         try:
@@ -78,8 +202,8 @@ class LLMService:
             self.logger.error(f"Image analysis failed: {str(e)}")
             return None
     
-    def generate_scene_description(self, keyframe_analyses: List[Dict], scene_context: Dict = None) -> str:
-        """根据关键帧分析生成场景描述"""
+    def generate_scene_description(self, keyframe_analyses: List[Dict], scene_context: Dict = None, force: bool = False) -> str:
+        """根据关键帧分析生成场景描述，force 为 True 时不复用缓存的结果（重新生成）"""
         try:
             # 构建提示词
             prompt = """基于以下关键帧分析结果，生成一个连贯的场景描述：
@@ -104,7 +228,8 @@ class LLMService:
                 {"role": "user", "content": prompt}
             ]
             
-            response = self.chat_completion(messages, temperature=0.3)
+            # 相同关键帧分析重复生成时直接复用缓存
+            response = self.chat_completion(messages, temperature=0.3, cache=True, refresh_cache=force)
             
             if response and "choices" in response:
                 return response["choices"][0]["message"]["content"]
@@ -115,8 +240,8 @@ class LLMService:
             self.logger.error(f"Scene description generation failed: {str(e)}")
             return "场景描述生成失败"
     
-    def generate_storyboard_script(self, scene_descriptions: List[str], audio_transcription: str = None) -> List[Dict]:
-        """生成分镜脚本"""
+    def generate_storyboard_script(self, scene_descriptions: List[str], audio_transcription: str = None, force: bool = False) -> List[Dict]:
+        """生成分镜脚本，force 为 True 时不复用缓存的结果（重新生成）"""
         try:
             storyboard_scripts = []
             
@@ -150,27 +275,29 @@ class LLMService:
                     {"role": "user", "content": prompt}
                 ]
                 
-                response = self.chat_completion(messages, temperature=0.5)
+                result = self.chat_completion_json(
+                    messages, STORYBOARD_SCRIPT_FIELDS, "storyboard_script", temperature=0.5, cache=True,
+                    refresh_cache=force
+                )
                 
-                if response and "choices" in response:
-                    content = response["choices"][0]["message"]["content"]
-                    
-                    try:
-                        # 尝试解析JSON响应
-                        script_data = json.loads(content)
-                        script_data["scene_index"] = i
-                        storyboard_scripts.append(script_data)
-                    except json.JSONDecodeError:
-                        # 如果不是JSON格式，创建基础结构
-                        storyboard_scripts.append({
-                            "scene_index": i,
-                            "shot_type": "中景",
-                            "camera_angle": "正面",
-                            "camera_movement": "静止",
-                            "focus_elements": ["主要内容"],
-                            "emotional_tone": "中性",
-                            "description": content
-                        })
+                if isinstance(result.data, dict):
+                    # 追问后仍缺失的字段使用默认值
+                    script_data = {**STORYBOARD_SCRIPT_DEFAULTS, **result.data}
+                    for name in result.missing:
+                        script_data[name] = STORYBOARD_SCRIPT_DEFAULTS[name]
+                    script_data["scene_index"] = i
+                    storyboard_scripts.append(script_data)
+                elif result.raw:
+                    # 如果不是JSON格式，创建基础结构
+                    storyboard_scripts.append({
+                        "scene_index": i,
+                        "shot_type": "中景",
+                        "camera_angle": "正面",
+                        "camera_movement": "静止",
+                        "focus_elements": ["主要内容"],
+                        "emotional_tone": "中性",
+                        "description": result.raw
+                    })
                 else:
                     # 创建默认脚本
                     storyboard_scripts.append({
@@ -206,8 +333,7 @@ class LLMService:
     
     def translate_text(self, input_text: str) -> str:
         """文本翻译"""
-        translate_sys = "把输入完全翻译成英文，不要输出翻译文本以外的内容，只需要输出翻译后的文本。如果包含翻译之外的内容，则重新输出"
-        return query_silicon_flow(input_text, translate_sys, 0.01)
+        return llm_translate(input_text)
 
 # 全局LLM服务实例
 _llm_service_instance = None
@@ -0,0 +1,215 @@
+"""
+健康感知的模型路由
+为一组可互换的模型（如SiliconFlow免费模型）选择当前最合适的一个：
+- 延迟EWMA、错误率EWMA、在途请求数（排队深度）共同决定得分，得分最低者优先
+- 尚无延迟样本的模型按先验延迟（已有样本的平均值）计分，并发请求不会全部涌向它
+- 连续失败达到阈值时熔断，冷却后进入半开状态，只放行一个探测请求，
+  探测成功则恢复，失败则重新熔断并加倍冷却时间；acquire 返回探测标记，
+  只有带标记的 release 才会结束半开状态，其他在途请求的结果只计入统计
+- 提供探测函数时由后台线程独立探测冷却结束的模型，用户请求不会被用作探测；
+  否则由冷却结束后的第一个实际请求充当探测
+- 尚无样本且空闲的模型优先尝试，避免新模型永远得不到流量
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# 没有任何延迟样本时使用的先验延迟（秒）
+DEFAULT_LATENCY_PRIOR = 5.0
+
+
+class ModelHealth:
+    """单个模型的健康统计"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = STATE_CLOSED
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.probe_in_flight = False
+
+    def score(self, latency_prior: float) -> float:
+        latency = self.latency_ewma if self.latency_ewma is not None else latency_prior
+        return latency * (1 + self.in_flight) * (1 + 4 * self.error_ewma)
+
+    def to_dict(self, latency_prior: float) -> Dict:
+        return {
+            "state": self.state,
+            "latency_ewma_seconds": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_ewma, 3),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "score": round(self.score(latency_prior), 3),
+        }
+
+
+class ModelRouter:
+    """在多个可互换模型之间按健康状况路由请求"""
+
+    def __init__(
+        self,
+        models: List[str],
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        base_cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        latency_prior: float = DEFAULT_LATENCY_PRIOR,
+        prober: Optional[Callable[[str], bool]] = None,
+        probe_interval: float = 10.0,
+    ):
+        """
+        :param prober: 探测函数，参数为模型名，返回模型是否可用；提供时由后台线程定期探测熔断的模型
+        :param probe_interval: 后台探测的检查间隔（秒）
+        """
+        if not models:
+            raise ValueError("ModelRouter requires at least one model")
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.latency_prior = latency_prior
+        self.prober = prober
+        self.probe_interval = probe_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._models: Dict[str, ModelHealth] = {name: ModelHealth(name) for name in models}
+        self._probe_thread: Optional[threading.Thread] = None
+
+    def _latency_prior(self) -> float:
+        """无样本模型的先验延迟：已有样本模型的平均延迟（调用方持有锁）"""
+        sampled = [h.latency_ewma for h in self._models.values() if h.latency_ewma is not None]
+        return sum(sampled) / len(sampled) if sampled else self.latency_prior
+
+    def _start_probe(self, health: ModelHealth, now: float) -> bool:
+        """冷却结束的熔断模型进入半开状态，只允许一个探测（调用方持有锁）"""
+        if health.state != STATE_OPEN or now - health.opened_at < health.cooldown or health.probe_in_flight:
+            return False
+        health.state = STATE_HALF_OPEN
+        health.probe_in_flight = True
+        health.in_flight += 1
+        self.logger.info(f"probing model {health.name}")
+        return True
+
+    def acquire(self) -> Tuple[str, bool]:
+        """
+        选择模型并计入在途请求，调用方完成后必须调用 release
+
+        :return: (模型名, 是否为半开探测)，探测标记需原样传回 release
+        """
+        if self.prober is not None:
+            self._ensure_probe_thread()
+        with self._lock:
+            now = time.monotonic()
+            if self.prober is None:
+                # 没有独立探测时，冷却结束的熔断模型放行一个实际请求作为探测
+                for health in self._models.values():
+                    if self._start_probe(health, now):
+                        return health.name, True
+
+            candidates = [h for h in self._models.values() if h.state == STATE_CLOSED]
+            if not candidates:
+                # 全部熔断时选择最早可恢复的模型，不让请求直接失败
+                candidates = sorted(self._models.values(), key=lambda h: h.opened_at + h.cooldown)[:1]
+            untried = [h for h in candidates if h.latency_ewma is None and h.in_flight == 0]
+            prior = self._latency_prior()
+            chosen = untried[0] if untried else min(candidates, key=lambda h: h.score(prior))
+            chosen.in_flight += 1
+            return chosen.name, False
+
+    def probe_due_models(self) -> Dict[str, bool]:
+        """
+        用探测函数检查所有冷却结束的熔断模型（不占用用户请求）
+
+        :return: 模型名 -> 是否恢复
+        """
+        if self.prober is None:
+            return {}
+        with self._lock:
+            now = time.monotonic()
+            due = [health.name for health in self._models.values() if self._start_probe(health, now)]
+        results = {}
+        for model in due:
+            try:
+                ok = bool(self.prober(model))
+            except Exception as e:
+                self.logger.warning(f"probe of model {model} failed: {e}")
+                ok = False
+            # 探测请求很短，不计入延迟统计
+            self.release(model, success=ok, probe=True)
+            results[model] = ok
+        return results
+
+    def _ensure_probe_thread(self):
+        with self._lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="model-router-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            try:
+                self.probe_due_models()
+            except Exception as e:
+                self.logger.error(f"model probe loop error: {e}")
+
+    def release(self, model: str, success: bool, latency: Optional[float] = None, probe: bool = False):
+        """
+        记录请求结果
+
+        :param probe: acquire 返回的探测标记，只有探测请求决定半开状态的结果
+        """
+        with self._lock:
+            health = self._models.get(model)
+            if health is None:
+                return
+            health.in_flight = max(0, health.in_flight - 1)
+            health.requests += 1
+            health.error_ewma = (1 - self.alpha) * health.error_ewma + self.alpha * (0.0 if success else 1.0)
+            if probe:
+                health.probe_in_flight = False
+
+            if success:
+                if latency is not None:
+                    health.latency_ewma = (
+                        latency
+                        if health.latency_ewma is None
+                        else (1 - self.alpha) * health.latency_ewma + self.alpha * latency
+                    )
+                health.consecutive_failures = 0
+                if probe:
+                    self.logger.info(f"model {model} recovered")
+                    health.state = STATE_CLOSED
+                    health.cooldown = 0.0
+                return
+
+            health.failures += 1
+            health.consecutive_failures += 1
+            if probe or (health.state == STATE_CLOSED and health.consecutive_failures >= self.failure_threshold):
+                health.cooldown = min(
+                    self.max_cooldown,
+                    health.cooldown * 2 if probe and health.cooldown else self.base_cooldown,
+                )
+                health.state = STATE_OPEN
+                health.opened_at = time.monotonic()
+                self.logger.warning(f"model {model} circuit open for {health.cooldown:.0f}s")
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            prior = self._latency_prior()
+            return {name: health.to_dict(prior) for name, health in self._models.items()}
@@ -1,25 +1,60 @@
-﻿from openai import OpenAI
+﻿from typing import Iterator, List
 
+from backend.llm.clients import PROVIDER_OPENAI, get_openai_client
+from backend.llm.rate_limit import call_with_limits, stream_with_limits
 from backend.util.file import get_config
 
 
 def query_openai(input_text: str, sys: str, model_name: str, temperature: float) -> str:
+    messages = []
+    if sys:
+        messages.append({"role": "system", "content": sys})
+    messages.append({"role": "user", "content": input_text})
+    return query_openai_messages(messages, model_name, temperature)
+
+
+def query_openai_messages(messages: List[dict], model_name: str, temperature: float) -> str:
+    """以完整的对话消息查询（多轮对话）"""
     try:
-        key = get_config()["apikey"]
-        url = get_config()["url"]
-        model = get_config()["model"]
-        client = OpenAI(api_key=key, base_url=url)
-        messages = []
-        if sys:
-            messages.append({"role": "system", "content": sys})
-        messages.append({"role": "user", "content": input_text})
+        config = get_config()
+        key = config["apikey"]
+        url = config["url"]
+        model = config["model"]
+        client = get_openai_client(key, url)
 
         # deepseek-chat
-        response = client.chat.completions.create(
-            model=model, messages=messages, temperature=temperature, stream=False
+        response = call_with_limits(
+            PROVIDER_OPENAI,
+            model,
+            lambda: client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, stream=False
+            ),
         )
 
         return response.choices[0].message.content
     except Exception as e:
         print(f"An error occurred when querying llm: {e}")
         raise
+
+
+def query_openai_stream(input_text: str, sys: str, model_name: str, temperature: float) -> Iterator[str]:
+    """流式查询，逐段返回生成的文本"""
+    config = get_config()
+    model = config["model"]
+    client = get_openai_client(config["apikey"], config["url"])
+    messages = []
+    if sys:
+        messages.append({"role": "system", "content": sys})
+    messages.append({"role": "user", "content": input_text})
+
+    def open_stream():
+        stream = client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, stream=True
+        )
+        return (
+            chunk.choices[0].delta.content
+            for chunk in stream
+            if chunk.choices and chunk.choices[0].delta.content
+        )
+
+    yield from stream_with_limits(PROVIDER_OPENAI, model, open_stream)
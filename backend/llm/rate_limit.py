@@ -0,0 +1,229 @@
+"""
+LLM服务商限流
+进程内共享，按 (服务商, 模型) 分别维护：
+- 令牌桶：限制请求速率（rpm）
+- AIMD并发控制：请求成功时并发上限加性增长，遇到429/5xx时乘性减半，
+  并按 Retry-After 暂停发起新请求
+所有LLM调用点（requests会话、OpenAI客户端）都通过这里获取执行许可。
+配置项 llmRateLimits 可按服务商覆盖默认值，例如：
+{"siliconflow": {"rpm": 120, "max_concurrency": 8}}
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from backend.util.file import get_config
+
+logger = logging.getLogger(__name__)
+
+# 默认限流参数
+DEFAULT_LIMITS = {
+    "siliconflow": {"rpm": 120, "max_concurrency": 8, "initial_concurrency": 4},
+    "sambanova": {"rpm": 60, "max_concurrency": 4, "initial_concurrency": 2},
+    "openai": {"rpm": 300, "max_concurrency": 16, "initial_concurrency": 8},
+    "professional": {"rpm": 60, "max_concurrency": 4, "initial_concurrency": 2},
+}
+FALLBACK_LIMITS = {"rpm": 60, "max_concurrency": 4, "initial_concurrency": 2}
+
+THROTTLE_STATUS = (429, 500, 502, 503, 504)
+DEFAULT_BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，不足时阻塞等待"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ProviderLimiter:
+    """单个 (服务商, 模型) 的限流器：令牌桶 + AIMD并发上限"""
+
+    def __init__(self, name: str, rpm: float, max_concurrency: int, initial_concurrency: int):
+        self.name = name
+        self.bucket = TokenBucket(rpm / 60.0, capacity=max(1.0, rpm / 60.0 * 5))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.limit = float(min(self.max_concurrency, max(1, int(initial_concurrency))))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.successes = 0
+        self.throttles = 0
+        self._cond = threading.Condition()
+
+    def _acquire_slot(self):
+        with self._cond:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait()
+
+    def _release_slot(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """获取执行许可（令牌 + 并发槽位）"""
+        self._acquire_slot()
+        try:
+            self.bucket.acquire()
+            yield self
+        finally:
+            self._release_slot()
+
+    def on_success(self):
+        """加性增长：大约每完成一轮并发上限个请求，上限加1"""
+        with self._cond:
+            self.successes += 1
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+            self._cond.notify_all()
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """乘性减半，并按 Retry-After 暂停发起新请求"""
+        with self._cond:
+            self.throttles += 1
+            self.limit = max(1.0, self.limit / 2)
+            pause = retry_after if retry_after is not None else DEFAULT_BACKOFF_SECONDS
+            self.paused_until = max(self.paused_until, time.monotonic() + min(pause, MAX_BACKOFF_SECONDS))
+            logger.warning(f"LLM provider {self.name} throttled, concurrency -> {int(self.limit)}, pause {pause:.1f}s")
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "concurrency_limit": int(self.limit),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "rpm": round(self.bucket.rate * 60, 1),
+                "paused_seconds": round(max(0.0, self.paused_until - time.monotonic()), 1),
+                "successes": self.successes,
+                "throttles": self.throttles,
+            }
+
+
+class RateLimiterRegistry:
+    """进程内共享的限流器注册表"""
+
+    def __init__(self):
+        self._limiters: Dict[tuple, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: Optional[str] = None) -> ProviderLimiter:
+        key = (provider, model or "")
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limits = dict(DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS))
+                try:
+                    limits.update((get_config().get("llmRateLimits") or {}).get(provider) or {})
+                except Exception as e:
+                    logger.warning(f"invalid llmRateLimits for {provider}: {e}")
+                limiter = ProviderLimiter(
+                    f"{provider}/{model}" if model else provider,
+                    rpm=float(limits["rpm"]),
+                    max_concurrency=int(limits["max_concurrency"]),
+                    initial_concurrency=int(limits.get("initial_concurrency", limits["max_concurrency"])),
+                )
+                self._limiters[key] = limiter
+            return limiter
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+_registry = RateLimiterRegistry()
+
+
+def get_rate_limiter(provider: str, model: Optional[str] = None) -> ProviderLimiter:
+    return _registry.get(provider, model)
+
+
+def get_rate_limit_stats() -> Dict[str, Dict]:
+    return _registry.stats()
+
+
+def _report_error(limiter: ProviderLimiter, error: Exception):
+    """SDK异常带有 status_code 时按429/5xx反馈给AIMD控制"""
+    status = getattr(error, "status_code", None)
+    if status in THROTTLE_STATUS:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        limiter.on_throttle(parse_retry_after(headers.get("retry-after")))
+
+
+def call_with_limits(provider: str, model: Optional[str], fn: Callable):
+    """
+    在限流许可内执行一次SDK调用（如OpenAI客户端）
+
+    SDK异常带有 status_code 时按429/5xx反馈给AIMD控制，异常继续向上抛出。
+    """
+    limiter = get_rate_limiter(provider, model)
+    try:
+        with limiter.slot():
+            result = fn()
+    except Exception as e:
+        _report_error(limiter, e)
+        raise
+    limiter.on_success()
+    return result
+
+
+def stream_with_limits(provider: str, model: Optional[str], open_stream: Callable[[], Iterable]) -> Iterator:
+    """
+    在限流许可内执行一次流式调用，整个流读取完毕前一直占用并发槽位
+
+    :param open_stream: 发起请求并返回可迭代的流
+    """
+    limiter = get_rate_limiter(provider, model)
+    with limiter.slot():
+        try:
+            stream = open_stream()
+        except Exception as e:
+            _report_error(limiter, e)
+            raise
+        yield from stream
+    limiter.on_success()
@@ -0,0 +1,279 @@
+"""
+LLM响应缓存
+以SQLite持久化保存LLM响应，键为规范化后的
+(服务商, 模型, 系统提示词, 用户输入, 温度, 图片哈希)。
+- 温度 > 0 的请求结果不确定，默认不走缓存，调用方可显式开启（cache=True）
+- 条目超过TTL后失效，总条目数超过上限时按最近访问时间淘汰
+- 配置项 llmResponseCache=false 可全局关闭
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from backend.util.constant import base_dir
+from backend.util.file import get_config
+
+CACHE_PATH = os.path.join(base_dir, ".cache", "llm_responses.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+
+# 键格式版本，修改规范化规则时递增
+KEY_VERSION = 1
+
+_DATA_URL = re.compile(r"^data:[^;,]+;base64,(.+)$", re.S)
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    """统一换行并去除行尾空白，避免无意义的差异导致缓存未命中"""
+    if not text:
+        return ""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_SPACE.sub("\n", text).strip()
+
+
+def _normalize_content(content: Any) -> Any:
+    """规范化消息内容：图片以内容哈希代替base64数据"""
+    if isinstance(content, str):
+        return _normalize_text(content)
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                url = (part.get("image_url") or {}).get("url", "")
+                match = _DATA_URL.match(url)
+                digest = hashlib.sha256((match.group(1) if match else url).encode("utf-8")).hexdigest()
+                parts.append({"type": "image", "sha256": digest})
+            elif isinstance(part, dict) and part.get("type") == "text":
+                parts.append({"type": "text", "text": _normalize_text(part.get("text"))})
+            else:
+                parts.append(part)
+        return parts
+    return content
+
+
+def normalize_messages(messages: List[dict]) -> List[dict]:
+    return [
+        {"role": m.get("role", "user"), "content": _normalize_content(m.get("content"))}
+        for m in messages
+    ]
+
+
+def make_key(provider: str, model: str, messages: List[dict], temperature: float, **extra) -> str:
+    """根据规范化后的请求参数生成缓存键"""
+    payload = {
+        "v": KEY_VERSION,
+        "provider": (provider or "").lower(),
+        "model": model or "",
+        "messages": normalize_messages(messages),
+        "temperature": round(float(temperature or 0.0), 3),
+        "extra": extra,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_messages(system: Optional[str], user: str) -> List[dict]:
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": user})
+    return messages
+
+
+class LLMResponseCache:
+    """SQLite响应缓存（每个线程独立连接，WAL模式支持并发读写）"""
+
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._puts_since_evict = 0
+        # 命中统计由多个工作线程更新
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        with self._write_lock, conn:
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        with self._stats_lock:
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, value: str):
+        conn = self._connect()
+        now = time.time()
+        with self._write_lock:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= 100:
+                self._puts_since_evict = 0
+                self._evict_locked(conn)
+
+    def _evict_locked(self, conn: sqlite3.Connection):
+        with conn:
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def evict(self):
+        with self._write_lock:
+            self._evict_locked(self._connect())
+
+    def stats(self) -> dict:
+        count = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        return {"entries": count, "hits": hits, "misses": misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> LLMResponseCache:
+    """进程内共享的响应缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = get_config()
+            ttl_hours = config.get("llmCacheTtlHours")
+            _cache = LLMResponseCache(
+                ttl_seconds=float(ttl_hours) * 3600 if ttl_hours is not None else DEFAULT_TTL_SECONDS,
+                max_entries=int(config.get("llmCacheMaxEntries", DEFAULT_MAX_ENTRIES)),
+            )
+        return _cache
+
+
+def cache_enabled(temperature: float, cache: Optional[bool]) -> bool:
+    """
+    是否使用缓存
+
+    :param cache: True 强制使用，False 禁用，None 按温度自动判断（仅温度为0时缓存）
+    """
+    if not get_config().get("llmResponseCache", True):
+        return False
+    if cache is not None:
+        return cache
+    return float(temperature or 0.0) <= 0.0
+
+
+def cached_completion(
+    provider: str,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    call: Callable[[], Optional[str]],
+    cache: Optional[bool] = None,
+    refresh: bool = False,
+    **extra,
+) -> Optional[str]:
+    """
+    带缓存的LLM调用
+
+    :param call: 未命中时执行的实际请求，返回响应文本
+    :param refresh: 忽略已缓存的响应重新请求，并用新结果覆盖缓存（用于"重新生成"）
+    """
+    if not cache_enabled(temperature, cache):
+        return call()
+    try:
+        store = get_response_cache()
+        key = make_key(provider, model, messages, temperature, **extra)
+        cached = None if refresh else store.get(key)
+    except Exception as e:
+        logging.warning(f"llm response cache unavailable: {e}")
+        return call()
+    if cached is not None:
+        return cached
+
+    result = call()
+    if result:
+        try:
+            store.put(key, result)
+        except Exception as e:
+            logging.warning(f"llm response cache write failed: {e}")
+    return result
+
+
+def cached_stream(
+    provider: str,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    stream: Callable[[], Iterable[str]],
+    cache: Optional[bool] = None,
+    **extra,
+) -> Iterator[str]:
+    """
+    带缓存的流式LLM调用：命中时一次性返回缓存文本，
+    未命中时边返回边累积，完整读取后写入缓存（中途放弃的流不缓存）
+    """
+    if not cache_enabled(temperature, cache):
+        yield from stream()
+        return
+    try:
+        store = get_response_cache()
+        key = make_key(provider, model, messages, temperature, **extra)
+        cached = store.get(key)
+    except Exception as e:
+        logging.warning(f"llm response cache unavailable: {e}")
+        yield from stream()
+        return
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    for delta in stream():
+        parts.append(delta)
+        yield delta
+    result = "".join(parts)
+    if result:
+        try:
+            store.put(key, result)
+        except Exception as e:
+            logging.warning(f"llm response cache write failed: {e}")
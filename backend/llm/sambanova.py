@@ -1,34 +1,44 @@
 import logging
+from typing import Iterator, List
 
 import requests
 
+from backend.llm.clients import PROVIDER_SAMBANOVA, post_json, post_json_stream
 from backend.util.file import get_config
 
 LLAMA_405B = "Meta-Llama-3.1-405B-Instruct"
+URL = "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
 
 
 def query_samba_nova(
     input_text: str, sys: str, model_name: str, temperature: float
 ) -> str:
-    model = get_config()["model"]
-    try:
-        url = "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
-        messages = []
-        if sys:
-            messages.append({"role": "system", "content": sys})
-        messages.append({"role": "user", "content": input_text})
+    messages = []
+    if sys:
+        messages.append({"role": "system", "content": sys})
+    messages.append({"role": "user", "content": input_text})
+    return query_samba_nova_messages(messages, model_name, temperature)
+
 
+def query_samba_nova_messages(
+    messages: List[dict], model_name: str, temperature: float
+) -> str:
+    """以完整的对话消息查询（多轮对话）"""
+    config = get_config()
+    model = config["model"]
+    try:
+        url = URL
         request_body = {
             "temperature": temperature,
             "messages": messages,
             "model": model,  # Assuming model_name is passed correctly
         }
-        key = get_config()["apikey"]
+        key = config["apikey"]
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {key}",
         }
-        response = requests.post(url, headers=headers, json=request_body)
+        response = post_json(PROVIDER_SAMBANOVA, url, headers, request_body)
         response.raise_for_status()  # Raises an HTTPError for bad responses
 
         response_data = response.json()
@@ -56,3 +66,24 @@ def query_samba_nova(
         error_message = f"Request error occurred: {req_err}"
         logging.error(error_message)
         raise
+
+
+def query_samba_nova_stream(
+    input_text: str, sys: str, model_name: str, temperature: float
+) -> Iterator[str]:
+    """流式查询，逐段返回生成的文本"""
+    config = get_config()
+    messages = []
+    if sys:
+        messages.append({"role": "system", "content": sys})
+    messages.append({"role": "user", "content": input_text})
+    request_body = {
+        "temperature": temperature,
+        "messages": messages,
+        "model": config["model"],
+    }
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {config['apikey']}",
+    }
+    yield from post_json_stream(PROVIDER_SAMBANOVA, URL, headers, request_body)
@@ -1,8 +1,9 @@
 import logging
 import threading
+import time
 
-import requests
-
+from backend.llm.clients import PROVIDER_SILICONFLOW, post_json
+from backend.llm.model_router import ModelRouter
 from backend.util.file import get_config
 
 # List of models
@@ -17,26 +18,52 @@ silicon_flow_free_models = [
     # "meta-llama/Meta-Llama-3.1-8B-Instruct",
 ]
 
-model_index = 0
-model_index_lock = threading.Lock()
+URL = "https://api.siliconflow.cn/v1/chat/completions"
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def _headers(key):
+    return {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {key}",
+    }
 
 
-def get_next_model():
-    global model_index
-    with model_index_lock:
-        model_index = (model_index + 1) % len(silicon_flow_free_models)
-        return silicon_flow_free_models[model_index]
+def probe_model(model):
+    """用最小的请求（1个token）检查熔断的模型是否恢复"""
+    request_body = {
+        "temperature": 0,
+        "max_tokens": 1,
+        "messages": [{"role": "user", "content": "ping"}],
+        "model": model,
+    }
+    response = post_json(PROVIDER_SILICONFLOW, URL, _headers(get_config()["address2"]), request_body, max_retries=0)
+    return response.status_code == 200 and bool(response.json().get("choices"))
+
+
+def get_model_router() -> ModelRouter:
+    """免费模型的健康感知路由（进程内共享），熔断的模型由后台线程独立探测"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(silicon_flow_free_models, prober=probe_model)
+        return _router
 
 
 def query_silicon_flow(input_text, sys_text, temperature):
-    url = "https://api.siliconflow.cn/v1/chat/completions"
     key = get_config()["address2"]
     messages = []
     if sys_text:
         messages.append({"role": "system", "content": sys_text})
     messages.append({"role": "user", "content": input_text})
 
-    sFModel = get_next_model()
+    headers = _headers(key)
+
+    router = get_model_router()
+    sFModel, probe = router.acquire()
     logging.debug(f"query sfModel {sFModel}")
     request_body = {
         "temperature": temperature,
@@ -44,24 +71,24 @@ def query_silicon_flow(input_text, sys_text, temperature):
         "model": sFModel,
     }
 
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {key}",
-    }
+    started = time.perf_counter()
+    try:
+        response = post_json(PROVIDER_SILICONFLOW, URL, headers, request_body)
+
+        if response.status_code != 200:
+            raise Exception(
+                f"Unexpected response status: {response.status_code}, modelName {sFModel}"
+            )
+
+        response_data = response.json()
+        if "choices" not in response_data or len(response_data["choices"]) == 0:
+            raise Exception("No choices found in response.")
+    except Exception:
+        router.release(sFModel, success=False, probe=probe)
+        raise
+    router.release(sFModel, success=True, latency=time.perf_counter() - started, probe=probe)
 
-    response = requests.post(url, headers=headers, json=request_body)
-
-    if response.status_code != 200:
-        raise Exception(
-            f"Unexpected response status: {response.status_code}, modelName {sFModel}"
-        )
-
-    response_data = response.json()
-    if "choices" in response_data and len(response_data["choices"]) > 0:
-        logging.debug(
-            f"sfModel {sFModel}, response {response_data['choices'][0]['message']['content']}"
-        )
-        return response_data["choices"][0]["message"]["content"]
-    else:
-        raise Exception("No choices found in response.")
+    logging.debug(
+        f"sfModel {sFModel}, response {response_data['choices'][0]['message']['content']}"
+    )
+    return response_data["choices"][0]["message"]["content"]
@@ -0,0 +1,222 @@
+"""
+LLM结构化输出
+LLM返回的JSON经常夹带说明文字、被截断或缺少字段，这里统一处理：
+- 严格解析（忽略JSON前后的说明文字与代码块标记）
+- 失败时容错修复：去掉多余逗号，补全被截断的字符串与括号，必要时回退到最后一个完整的值
+- 按字段校验，只针对缺失或类型不符的字段追问，而不是整体重新生成
+- 按调用点统计严格解析、修复、追问与失败的次数
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.util.json_stream import IncrementalJSONParser
+
+logger = logging.getLogger(__name__)
+
+# OpenAI兼容接口的JSON模式
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def repair_json(text: str) -> Any:
+    """
+    容错解析：去掉对象/数组结尾多余的逗号，补全截断的字符串和括号；
+    仍无法解析时截断到最后一个完整的值再补全
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object found")
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = escape = False
+    safe_point: Optional[Tuple[int, Tuple[str, ...]]] = None
+    for c in text[min(starts):]:
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+            out.append(c)
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+            out.append(c)
+        elif c in "}]":
+            while out and out[-1] in " \t\r\n,":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(c)
+            safe_point = (len(out), tuple(stack))
+            if not stack:
+                break
+        elif c == ",":
+            safe_point = (len(out), tuple(stack))
+            out.append(c)
+        else:
+            out.append(c)
+
+    candidates = []
+    tail = list(out) + (['"'] if in_string else [])
+    while tail and tail[-1] in " \t\r\n,":
+        tail.pop()
+    candidates.append("".join(tail) + "".join(reversed(stack)))
+    if safe_point:
+        cut, open_stack = safe_point
+        candidates.append("".join(out[:cut]) + "".join(reversed(open_stack)))
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    raise ValueError("unable to repair JSON")
+
+
+def parse_json(text: Optional[str]) -> Tuple[Any, str]:
+    """
+    解析LLM输出中的JSON
+
+    :return: (对象, 解析方式 "strict"/"repaired")，无法解析时抛出 ValueError
+    """
+    if not text:
+        raise ValueError("empty response")
+    parser = IncrementalJSONParser([])
+    parser.feed(text)
+    try:
+        return parser.result(), "strict"
+    except ValueError:
+        return repair_json(text), "repaired"
+
+
+def missing_fields(data: Any, required: Dict[str, type]) -> List[str]:
+    """缺失、为空或类型不符的必需字段"""
+    if not isinstance(data, dict):
+        return list(required)
+    return [
+        name for name, expected in required.items()
+        if not isinstance(data.get(name), expected) or data.get(name) in ("", None)
+    ]
+
+
+def reask_instruction(missing: List[str], invalid_json: bool) -> str:
+    """追问提示：只要求补充缺失的字段"""
+    if invalid_json:
+        return "输出必须是合法的JSON。请只输出符合要求的JSON对象，不要包含任何其他内容。"
+    return f"输出的JSON缺少以下字段或字段格式不正确：{', '.join(missing)}。请只输出包含这些字段的JSON对象，不要重复其他字段。"
+
+
+@dataclass
+class StructuredResult:
+    data: Any
+    raw: Optional[str]
+    missing: List[str] = field(default_factory=list)
+    method: str = "failed"
+    reasks: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None and not self.missing
+
+
+class StructuredOutputMetrics:
+    """按调用点统计结构化输出的解析情况"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, call_site: str, result: StructuredResult):
+        with self._lock:
+            site = self._sites.setdefault(
+                call_site,
+                {"calls": 0, "strict": 0, "repaired": 0, "reasked": 0, "failed": 0, "missing_fields": {}},
+            )
+            site["calls"] += 1
+            if result.method in ("strict", "repaired"):
+                site[result.method] += 1
+            if result.reasks:
+                site["reasked"] += 1
+            if not result.ok:
+                site["failed"] += 1
+                for name in result.missing:
+                    site["missing_fields"][name] = site["missing_fields"].get(name, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stats = {}
+            for call_site, site in self._sites.items():
+                calls = max(1, site["calls"])
+                stats[call_site] = dict(
+                    site,
+                    missing_fields=dict(site["missing_fields"]),
+                    parse_failure_rate=round(1 - site["strict"] / calls, 3),
+                    failure_rate=round(site["failed"] / calls, 3),
+                )
+            return stats
+
+
+_metrics = StructuredOutputMetrics()
+
+
+def get_structured_output_stats() -> Dict[str, Dict[str, Any]]:
+    return _metrics.stats()
+
+
+def resolve_structured(
+    call_site: str,
+    content: Optional[str],
+    required: Dict[str, type],
+    reask: Optional[Callable[[str], Optional[str]]] = None,
+    max_reasks: int = 1,
+    supplement: Optional[Dict[str, Any]] = None,
+) -> StructuredResult:
+    """
+    解析并校验LLM输出，必要时追问缺失的字段
+
+    :param reask: 发送追问并返回新的输出，参数为追问提示
+    :param supplement: 已从其他途径获得的字段（如流式解析出的条目），用于在追问前补全
+    """
+    result = StructuredResult(data=None, raw=content)
+    try:
+        result.data, result.method = parse_json(content)
+    except ValueError as e:
+        logger.warning(f"[{call_site}] unparseable LLM output: {e}")
+
+    def fill_supplement():
+        if isinstance(result.data, dict) and supplement:
+            for name in missing_fields(result.data, required):
+                if supplement.get(name):
+                    result.data[name] = supplement[name]
+
+    fill_supplement()
+    result.missing = missing_fields(result.data, required)
+
+    while result.missing and reask and result.reasks < max_reasks:
+        result.reasks += 1
+        invalid_json = not isinstance(result.data, dict)
+        reply = reask(reask_instruction(result.missing, invalid_json))
+        try:
+            patch, _ = parse_json(reply)
+        except ValueError as e:
+            logger.warning(f"[{call_site}] unparseable re-ask reply: {e}")
+            continue
+        if invalid_json:
+            result.data, result.raw = patch, reply
+            fill_supplement()
+        elif isinstance(patch, dict):
+            result.data.update({name: patch[name] for name in result.missing if name in patch})
+        result.missing = missing_fields(result.data, required)
+
+    if result.missing:
+        logger.warning(f"[{call_site}] structured output still missing fields: {result.missing}")
+    _metrics.record(call_site, result)
+    return result
@@ -16,6 +16,7 @@ from backend.util.constant import (
     get_project_dir,
     get_project_base_dir,
 )
+from backend.util.config_service import get_config_service
 from backend.util.file import (
     read_file,
     read_files_from_directory,
@@ -293,9 +294,8 @@ def get_model_config():
                 file,
             )
     try:
-        with open(config_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-            logging.info(data["url"])
+        data = get_config_service().as_dict()
+        logging.info(data["url"])
         return jsonify(data)
     except Exception as e:
         logging.error(f"Error reading addresses: {e}")
@@ -307,16 +307,12 @@ def save_model_config():
         data = request.json
         key = data.get("key")
         value = data.get("value")
-        with open(config_path, "r", encoding="utf-8") as file:
-            addresses = json.load(file)
         if isinstance(value, str):
             try:
                 value = json.loads(value)
             except json.JSONDecodeError:
                 pass  # If it's not a JSON string, keep it as is
-        addresses[key] = value
-        with open(config_path, "w", encoding="utf-8") as file:
-            json.dump(addresses, file, ensure_ascii=False, indent=4)
+        get_config_service().update(key, value)
         return "Address saved successfully", 200
     except Exception as e:
         logging.error(f"Error saving {key}: {e}")
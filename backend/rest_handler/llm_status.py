@@ -0,0 +1,24 @@
+import logging
+
+from flask import jsonify
+
+from backend.llm.rate_limit import get_rate_limit_stats
+from backend.llm.response_cache import get_response_cache
+from backend.llm.structured import get_structured_output_stats
+from backend.llm.siliconflow import get_model_router
+
+
+def get_llm_status():
+    """LLM调用状态：SiliconFlow模型路由统计、各服务商限流状态、响应缓存与结构化输出解析统计"""
+    try:
+        return jsonify(
+            {
+                "siliconflowModels": get_model_router().stats(),
+                "rateLimits": get_rate_limit_stats(),
+                "responseCache": get_response_cache().stats(),
+                "structuredOutput": get_structured_output_stats(),
+            }
+        ), 200
+    except Exception as e:
+        logging.error(f"get_llm_status error: {e}")
+        return jsonify({"error": str(e)}), 500
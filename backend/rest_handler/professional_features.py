@@ -6,10 +6,10 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-import requests
 from flask import jsonify, request
 
 from backend.ai.prompt_engine import AIPromptEngine
+from backend.llm.clients import PROVIDER_PROFESSIONAL, post_json
 from backend.rest_handler.init import get_model_config
 from backend.util.project_file_manager import ProjectFileManager
 
@@ -56,11 +56,11 @@ class ProfessionalFeaturesHandler:
                 "max_tokens": max_tokens,
             }
 
-            response = requests.post(
+            response = post_json(
+                PROVIDER_PROFESSIONAL,
                 config.get("url", "https://api.sambanova.ai/v1/chat/completions"),
-                headers=headers,
-                json=data,
-                timeout=60,
+                headers,
+                data,
             )
 
             if response.status_code == 200:
@@ -570,11 +570,9 @@ def load_art_style_guide():
 # 角色音频生成功能
 def generate_character_voice_audio():
     """为角色生成音频"""
-    import asyncio
     import os
 
-    import edge_tts
-
+    from backend.tts.backends import TTSLine, get_tts_backend, voice_profile_from_dict
     from backend.util.constant import audio_dir
 
     try:
@@ -596,34 +594,25 @@ def generate_character_voice_audio():
         project_audio_dir = os.path.join(audio_dir, project_name, "characters")
         os.makedirs(project_audio_dir, exist_ok=True)
 
-        # 根据角色选择合适的语音
-        voice_map = {
-            "female": "zh-CN-XiaoxiaoNeural",  # 女性角色
-            "male": "zh-CN-YunxiNeural",  # 男性角色
-            "default": "zh-CN-XiaoxiaoNeural",
-        }
-
-        # 从voice_settings中获取语音类型，默认为女性
-        gender = voice_settings.get("gender", "female").lower()
-        voice = voice_map.get(gender, voice_map["default"])
-
-        # 语音参数
-        rate = voice_settings.get("rate", "+35%")
-        pitch = voice_settings.get("pitch", "+0Hz")
+        # 角色音色：优先使用已保存的角色音色配置，请求中的voiceSettings覆盖其中的字段
+        saved_profile = ProjectFileManager().load_character_voice_profile(
+            project_name, character_id
+        )
+        saved_voice = (saved_profile or {}).get("voiceProfile")
+        profile_data = dict(saved_voice) if isinstance(saved_voice, dict) else {}
+        profile_data.update(voice_settings)
+        voice_profile = voice_profile_from_dict(profile_data)
 
         # 生成音频文件名
         audio_filename = f"{character_id}_voice_sample.mp3"
         audio_path = os.path.join(project_audio_dir, audio_filename)
 
-        # 使用edge-tts生成音频
-        async def generate_audio():
-            communicate = edge_tts.Communicate(
-                text=text, voice=voice, rate=rate, pitch=pitch
-            )
-            await communicate.save(audio_path)
-
-        # 运行异步函数
-        asyncio.run(generate_audio())
+        # 相同台词与语音参数直接复用共享缓存
+        backend = get_tts_backend(data.get("ttsBackend"))
+        line = TTSLine(index=0, text=text, audio_path=audio_path)
+        result = backend.synthesize_batch([line], voice_profile)["results"][0]
+        if result["status"] != "success":
+            raise RuntimeError(result.get("error", "TTS synthesis failed"))
 
         # 返回音频文件的URL
         audio_url = f"/api/audio/{project_name}/characters/{audio_filename}"
@@ -634,7 +623,10 @@ def generate_character_voice_audio():
                 "audioUrl": audio_url,
                 "audioPath": audio_path,
                 "characterId": character_id,
-                "voiceSettings": {"voice": voice, "rate": rate, "pitch": pitch},
+                "voiceSettings": {
+                    "backend": backend.name,
+                    **backend.synthesis_params(voice_profile),
+                },
             }
         )
 
@@ -643,6 +635,69 @@ def generate_character_voice_audio():
         return jsonify({"error": f"Failed to generate audio: {str(e)}"}), 500
 
 
+def render_scene_dialogue_audio():
+    """按角色音色渲染分镜台词音轨（单个WAV）"""
+    import os
+
+    from backend.tts.backends import get_tts_backend
+    from backend.tts.dialogue import DialogueRenderer, parse_dialogue
+    from backend.util.constant import audio_dir
+
+    handler = ProfessionalFeaturesHandler()
+
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        error = handler._validate_request_data(["sceneId"], data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        project_name = handler._get_project_name(data)
+        scene_id = data["sceneId"]
+
+        # 未提供台词时读取已保存的分镜台词
+        dialogue = data.get("dialogue")
+        if not dialogue:
+            saved = handler.file_manager.load_scene_dialogue(project_name, scene_id)
+            dialogue = (saved or {}).get("dialogue")
+        if isinstance(dialogue, dict):
+            dialogue = dialogue.get("dialogue", "")
+        if not dialogue:
+            return jsonify({"error": "No dialogue found for scene"}), 404
+
+        speakers = data.get("speakers")
+        lines = parse_dialogue(dialogue, speakers if isinstance(speakers, list) else None)
+        if not lines:
+            return jsonify({"error": "No speaker-tagged lines found in dialogue"}), 400
+
+        output_path = os.path.join(
+            audio_dir, project_name, "dialogues", f"{scene_id}_dialogue.wav"
+        )
+        renderer = DialogueRenderer(
+            project_name,
+            backend=get_tts_backend(data.get("ttsBackend")),
+            sample_rate=int(data.get("sampleRate", 24000)),
+        )
+        result = renderer.render(
+            lines,
+            output_path,
+            gap=float(data.get("gap", 0.35)),
+            voice_profiles=data.get("voiceProfiles"),
+        )
+        if not result["success"]:
+            return jsonify({"error": result.get("error"), "failed": result.get("failed", [])}), 500
+
+        result["audioUrl"] = f"/api/audio/{project_name}/dialogues/{scene_id}_dialogue.wav"
+        result["sceneId"] = scene_id
+        return jsonify(result)
+
+    except Exception as e:
+        handler.logger.error(f"Error in render_scene_dialogue_audio: {e}")
+        return jsonify({"error": f"Failed to render dialogue: {str(e)}"}), 500
+
+
 # 项目管理功能
 def list_professional_features():
     """列出项目的所有专业功能数据"""
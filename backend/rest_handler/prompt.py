@@ -7,6 +7,7 @@ import shutil
 
 from flask import jsonify, request
 
+from backend.llm.batch import LLMBatchExecutor
 from backend.llm.llm import llm_translate, query_llm
 from backend.util.constant import (
     character_dir,
@@ -15,7 +16,12 @@ from backend.util.constant import (
     prompts_dir,
     prompts_en_dir,
 )
-from backend.util.file import read_file, read_lines_from_directory, save_list_to_files
+from backend.util.file import (
+    get_config,
+    read_file,
+    read_lines_from_directory,
+    save_list_to_files,
+)
 
 fragmentsLen = 30
 
@@ -37,7 +43,9 @@ def translate_prompts(lines):
         res = llm_translate(line)
         return res
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
+    # 实际并发由SiliconFlow的共享限流器控制，这里只限制等待许可的线程数
+    max_workers = int(get_config().get("translateMaxWorkers", 8))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         translated_lines = list(executor.map(translate_line, lines))
     return translated_lines
 
@@ -58,20 +66,26 @@ def extract_scene_from_texts():
         return jsonify({"error": "Failed to manage directory"}), 500
 
     prompts_mid = generate_input_prompts(lines, fragmentsLen)
-    offset = 0
     sys = read_file(prompt_path)
-    for p in prompts_mid:
-        res = query_llm(p, sys, "x", 1, 8192)
+    config = get_config()
+    re_pattern = re.compile(r"^\d+\.\s*")
+    offset = 0
+
+    def save_chunk(index, res):
+        # 按分块顺序回调，前面的分块全部写出后才会写当前分块，保证文件编号连续
+        nonlocal offset
         logging.info(res)
-        lines = res.split("\n")
-        re_pattern = re.compile(r"^\d+\.\s*")
-        t2i_prompts = [re_pattern.sub("", line) for line in lines if line.strip()]
+        t2i_prompts = [re_pattern.sub("", line) for line in res.split("\n") if line.strip()]
+        logging.info(f"chunk {index} len is {len(t2i_prompts)}")
+        save_list_to_files(t2i_prompts, prompts_dir, offset)
         offset += len(t2i_prompts)
-        try:
-            logging.info(f"len is {len(t2i_prompts)}")
-            save_list_to_files(t2i_prompts, prompts_dir, offset - len(t2i_prompts))
-        except Exception as e:
-            return jsonify({"error": "save list to file failed"}), 500
+
+    executor = LLMBatchExecutor(max_in_flight=config.get("llmMaxInFlight", 4))
+    try:
+        executor.run(lambda p: query_llm(p, sys, "x", 1), prompts_mid, on_ready=save_chunk)
+    except Exception as e:
+        logging.error(f"extract scene from texts failed: {e}")
+        return jsonify({"error": "extract scene from texts failed"}), 500
 
     lines, err = read_lines_from_directory(prompts_dir)
     if err:
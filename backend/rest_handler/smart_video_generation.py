@@ -8,7 +8,18 @@ import logging
 from datetime import datetime
 from flask import jsonify, request
 from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip
+from backend.audio.mastering import master_file
+from backend.util.ffmpeg import concat_videos, run_ffmpeg
 from backend.util.file import get_project_dir
+from backend.util.file_cache import FileCache, file_digest
+from backend.video.image_prep import prepare_image
+from backend.video.motion_effects import (
+    MOTION_STATIC,
+    build_motion_render_args,
+    get_camera_movement,
+    parse_camera_movement,
+)
+from backend.video.source_reader import SharedVideoReaders, batch_cut_ranges
 
 # 配置日志
 logging.basicConfig(level=logging.DEBUG)
@@ -19,6 +30,9 @@ class SmartVideoGenerator:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 生成任务期间共享的原视频读取器与批量裁剪结果
+        self._video_readers = None
+        self._pre_cut_videos = {}
     
     def generate_individual_storyboard_videos(self, project_name, video_config=None):
         """为每个分镜生成单独的视频文件"""
@@ -51,6 +65,7 @@ class SmartVideoGenerator:
             
             # 生成视频配置
             config = self._prepare_video_config(video_config, project_data)
+            audio_file = self._master_audio_file(project_name, audio_file, config)
             
             # 为每个分镜生成单独的视频
             generated_videos = []
@@ -58,29 +73,39 @@ class SmartVideoGenerator:
             os.makedirs(videos_dir, exist_ok=True)
             
             self.logger.info(f"开始处理 {len(storyboard_data)} 个分镜")
-            for i, storyboard in enumerate(storyboard_data):
+            with SharedVideoReaders() as readers:
+                self._video_readers = readers
                 try:
-                    self.logger.info(f"处理分镜 {i}: scene_id={storyboard.get('scene_id')}, duration={storyboard.get('duration')}")
-                    video_path = self._generate_single_storyboard_video(
-                        project_name, storyboard, i, keyframes, audio_file, config
-                    )
-                    if video_path:
-                        generated_videos.append({
-                            "index": i,
-                            "storyboard_id": storyboard.get('index', i),
-                            "video_path": f"/temp/{project_name}/videos/storyboard_{i}.mp4",
-                            "duration": storyboard.get('duration', config.get('default_duration', 3.0)),
-                            "scene_description": storyboard.get('scene_description', ''),
-                            "dialogue": storyboard.get('dialogue', '')
-                        })
-                        self.logger.info(f"分镜 {i} 视频生成成功: {video_path}")
-                    else:
-                        self.logger.warning(f"分镜 {i} 视频生成失败")
-                except Exception as e:
-                    self.logger.error(f"生成分镜 {i} 视频时出错: {str(e)}")
-                    import traceback
-                    self.logger.error(f"详细错误信息: {traceback.format_exc()}")
-                    continue
+                    # 一次解复用批量裁剪所有分镜区间，失败的分镜再逐个处理
+                    if config.get('batch_cut', True):
+                        self._pre_cut_videos = self._batch_cut_storyboards(project_name, storyboard_data, config)
+                    
+                    for i, storyboard in enumerate(storyboard_data):
+                        try:
+                            self.logger.info(f"处理分镜 {i}: scene_id={storyboard.get('scene_id')}, duration={storyboard.get('duration')}")
+                            video_path = self._generate_single_storyboard_video(
+                                project_name, storyboard, i, keyframes, audio_file, config
+                            )
+                            if video_path:
+                                generated_videos.append({
+                                    "index": i,
+                                    "storyboard_id": storyboard.get('index', i),
+                                    "video_path": f"/temp/{project_name}/videos/storyboard_{i}.mp4",
+                                    "duration": storyboard.get('duration', config.get('default_duration', 3.0)),
+                                    "scene_description": storyboard.get('scene_description', ''),
+                                    "dialogue": storyboard.get('dialogue', '')
+                                })
+                                self.logger.info(f"分镜 {i} 视频生成成功: {video_path}")
+                            else:
+                                self.logger.warning(f"分镜 {i} 视频生成失败")
+                        except Exception as e:
+                            self.logger.error(f"生成分镜 {i} 视频时出错: {str(e)}")
+                            import traceback
+                            self.logger.error(f"详细错误信息: {traceback.format_exc()}")
+                            continue
+                finally:
+                    self._video_readers = None
+                    self._pre_cut_videos = {}
             
             # 保存生成信息
             generation_info = {
@@ -141,12 +166,20 @@ class SmartVideoGenerator:
             
             # 生成视频配置
             config = self._prepare_video_config(video_config, project_data)
+            audio_file = self._master_audio_file(project_name, audio_file, config)
             
-            # 创建视频片段
-            video_clips = self._create_video_clips(storyboard_data, keyframes, audio_file, config)
-            
-            # 合成最终视频
-            output_path = self._compose_final_video(project_name, video_clips, config)
+            cache_stats = None
+            if config.get('use_segment_cache', True):
+                # 逐个渲染分镜片段（未变化的片段直接复用缓存），再无损拼接
+                output_path, cache_stats = self._compose_cached_video(
+                    project_name, storyboard_data, keyframes, audio_file, config
+                )
+            else:
+                # 创建视频片段
+                video_clips = self._create_video_clips(storyboard_data, keyframes, audio_file, config, project_name)
+                
+                # 合成最终视频
+                output_path = self._compose_final_video(project_name, video_clips, config)
             
             # 保存生成信息
             generation_info = {
@@ -156,6 +189,7 @@ class SmartVideoGenerator:
                 "keyframes_used": len(keyframes),
                 "has_audio": audio_file is not None,
                 "config": config,
+                "segment_cache": cache_stats,
                 "generated_at": datetime.now().isoformat()
             }
             
@@ -246,7 +280,20 @@ class SmartVideoGenerator:
             "transition_duration": 0.0,  # 转场时间设置为0，不使用转场效果
             "use_audio": True,
             "audio_fade_in": 0.5,
-            "audio_fade_out": 0.5
+            "audio_fade_out": 0.5,
+            "use_segment_cache": True,  # 复用未变化分镜的已编码片段
+            "batch_cut": True,  # 单次解复用批量裁剪原视频分镜
+            "segment_cache_max_mb": 2048,  # 片段缓存总大小上限
+            "image_fit": "stretch",  # 图片适配模式: stretch / letterbox / cover
+            "image_cache_max_mb": 1024,  # 预处理图片缓存（每个分辨率）总大小上限
+            "motion_effects": True,  # 根据分镜camera_movement使用ffmpeg原生推拉摇移
+            "motion_options": {},  # 运动参数（zoom / supersample / easing）
+            "audio_mastering": False,  # 音效响度归一 + 限幅（开启后会改变成片音量，需显式启用）
+            "audio_cache_max_mb": 256,  # 母带处理后音效缓存总大小上限
+            "audio_target_lufs": -16.0,  # 目标积分响度
+            "audio_ceiling_db": -1.0,  # 峰值上限
+            "dialogue_audio": None,  # 对白音轨（可选），提供时音效在对白下闪避后与对白混合
+            "audio_duck_db": -12.0  # 闪避量
         }
         
         # 从项目数据中获取尺寸配置
@@ -261,23 +308,81 @@ class SmartVideoGenerator:
         
         return default_config
     
-    def _create_video_clips(self, storyboard_data, keyframes, audio_file, config):
+    def _load_audio_clip(self, audio_file, config):
+        """加载音效文件并应用淡入淡出"""
+        if not audio_file or not config.get('use_audio', True):
+            return None
+        try:
+            audio_clip = AudioFileClip(audio_file)
+            if config.get('audio_fade_in', 0) > 0:
+                audio_clip = audio_clip.audio_fadein(config['audio_fade_in'])
+            if config.get('audio_fade_out', 0) > 0:
+                audio_clip = audio_clip.audio_fadeout(config['audio_fade_out'])
+            self.logger.info(f"音频文件加载成功，总时长: {audio_clip.duration:.1f}秒")
+            return audio_clip
+        except Exception as e:
+            self.logger.warning(f"加载音频文件失败: {e}")
+            return None
+    
+    def _master_audio_file(self, project_name, audio_file, config):
+        """对音效做母带处理（按源文件内容和参数缓存），失败时回退到原始音效"""
+        if not audio_file or not config.get('use_audio', True) or not config.get('audio_mastering', False):
+            return audio_file
+        dialogue_audio = config.get('dialogue_audio')
+        if dialogue_audio and not os.path.exists(dialogue_audio):
+            self.logger.warning(f"对白音轨不存在，忽略闪避: {dialogue_audio}")
+            dialogue_audio = None
+        
+        cache = FileCache(
+            os.path.join(get_project_dir(project_name, 'videos'), '.cache', 'audio'),
+            max_bytes=int(config.get('audio_cache_max_mb', 256)) * 1024 * 1024
+        )
+        key = FileCache.make_key(
+            "mastered_audio",
+            file_digest(audio_file),
+            file_digest(dialogue_audio) if dialogue_audio else None,
+            config.get('audio_target_lufs', -16.0),
+            config.get('audio_ceiling_db', -1.0),
+            config.get('audio_duck_db', -12.0)
+        )
+        cached_path = cache.get(key, '.wav')
+        if cached_path:
+            return cached_path
+        
+        tmp_path = cache.tmp_path(key, '.wav')
+        result = master_file(
+            audio_file,
+            tmp_path,
+            target_lufs=config.get('audio_target_lufs', -16.0),
+            ceiling_db=config.get('audio_ceiling_db', -1.0),
+            dialogue_path=dialogue_audio,
+            duck_db=config.get('audio_duck_db', -12.0)
+        )
+        if not result['success']:
+            cache.discard(tmp_path)
+            self.logger.warning(f"音效母带处理失败，使用原始音效: {result.get('error')}")
+            return audio_file
+        self.logger.info(f"音效母带处理: {result['stats']}")
+        return cache.commit(tmp_path, key, '.wav')
+    
+    def _prepare_image(self, project_name, image_path, config):
+        """将关键帧预处理为目标分辨率（按分辨率缓存），返回可直接编码的图片路径"""
+        cache_root = os.path.join(get_project_dir(project_name, 'videos'), '.cache', 'images')
+        return prepare_image(
+            image_path,
+            config['width'],
+            config['height'],
+            cache_root,
+            fit=config.get('image_fit', 'stretch'),
+            max_bytes=int(config.get('image_cache_max_mb', 1024)) * 1024 * 1024
+        )
+    
+    def _create_video_clips(self, storyboard_data, keyframes, audio_file, config, project_name):
         """创建视频片段"""
         clips = []
         
         # 如果有音频文件，加载它
-        audio_clip = None
-        if audio_file and config.get('use_audio', True):
-            try:
-                audio_clip = AudioFileClip(audio_file)
-                if config.get('audio_fade_in', 0) > 0:
-                    audio_clip = audio_clip.audio_fadein(config['audio_fade_in'])
-                if config.get('audio_fade_out', 0) > 0:
-                    audio_clip = audio_clip.audio_fadeout(config['audio_fade_out'])
-                self.logger.info(f"音频文件加载成功，总时长: {audio_clip.duration:.1f}秒")
-            except Exception as e:
-                self.logger.warning(f"加载音频文件失败: {e}")
-                audio_clip = None
+        audio_clip = self._load_audio_clip(audio_file, config)
         
         # 为每个分镜创建视频片段
         for i, storyboard in enumerate(storyboard_data):
@@ -294,9 +399,8 @@ class SmartVideoGenerator:
                 if duration <= 0 or duration > 30:  # 限制最大时长为30秒
                     duration = config['default_duration']
                 
-                # 创建图片片段
-                image_clip = ImageClip(image_path, duration=duration)
-                image_clip = image_clip.resize((config['width'], config['height']))
+                # 创建图片片段（图片已预处理为目标尺寸，无需逐帧缩放）
+                image_clip = ImageClip(self._prepare_image(project_name, image_path, config), duration=duration)
                 
                 # 不添加淡入淡出效果
                 # transition_duration = config.get('transition_duration', 0.5)
@@ -328,6 +432,195 @@ class SmartVideoGenerator:
         
         return clips
     
+    def _plan_segment(self, storyboard, keyframes, index, audio_clip, config):
+        """计算单个分镜片段的渲染参数（图片、时长、音频区间）"""
+        image_path = self._select_keyframe_for_storyboard(storyboard, keyframes, index)
+        if not image_path or not os.path.exists(image_path):
+            self.logger.warning(f"分镜 {index} 未找到对应的关键帧图片")
+            return None
+        
+        # 确定片段时长 - 优先使用分镜的实际时长
+        duration = storyboard.get('duration', config['default_duration'])
+        if duration <= 0 or duration > 30:  # 限制最大时长为30秒
+            duration = config['default_duration']
+        
+        # 如果有音频且分镜有时间信息，使用对应的音频区间，片段时长与音频一致
+        audio_range = None
+        start_time = storyboard.get('start_time')
+        end_time = storyboard.get('end_time')
+        if audio_clip and start_time is not None and end_time is not None:
+            if start_time < audio_clip.duration and end_time <= audio_clip.duration and start_time < end_time:
+                audio_range = (float(start_time), float(end_time))
+                duration = end_time - start_time
+        
+        motion = MOTION_STATIC
+        if config.get('motion_effects', True):
+            motion = parse_camera_movement(get_camera_movement(storyboard))
+        
+        return {
+            "index": index,
+            "image_path": image_path,
+            "duration": float(duration),
+            "audio_range": audio_range,
+            "motion": motion
+        }
+    
+    def _get_segment_cache(self, project_name, config):
+        """获取项目的分镜片段缓存（temp/<project>/videos/.cache）"""
+        cache_dir = os.path.join(get_project_dir(project_name, 'videos'), '.cache', 'segments')
+        max_bytes = int(config.get('segment_cache_max_mb', 2048)) * 1024 * 1024
+        return FileCache(cache_dir, max_bytes)
+    
+    def _segment_cache_key(self, segment, audio_file, with_audio_track, config):
+        """根据片段的全部输入生成缓存键"""
+        renderer = "moviepy"
+        motion = None
+        if config.get('motion_effects', True):
+            renderer = "ffmpeg_native"
+            motion = {"type": segment['motion'], "options": config.get('motion_options') or {}}
+        audio_source = None
+        if segment['audio_range']:
+            # 按内容而非修改时间标识音频：缓存中的母带音频命中时会刷新修改时间
+            audio_source = {
+                "digest": file_digest(audio_file),
+                "range": segment['audio_range'],
+                "fade_in": config.get('audio_fade_in', 0),
+                "fade_out": config.get('audio_fade_out', 0)
+            }
+        return FileCache.make_key(
+            "storyboard_segment",
+            file_digest(segment['image_path']),
+            audio_source,
+            round(segment['duration'], 3),
+            config['width'],
+            config['height'],
+            config.get('image_fit', 'stretch'),
+            config['fps'],
+            {"codec": "libx264", "audio_codec": "aac" if with_audio_track else None},
+            renderer,
+            motion
+        )
+    
+    def _render_segment(self, project_name, segment, audio_clip, with_audio_track, output_path, config):
+        """将单个分镜片段编码为独立的视频文件"""
+        image_clip = ImageClip(self._prepare_image(project_name, segment['image_path'], config), duration=segment['duration'])
+        
+        if segment['audio_range']:
+            image_clip = image_clip.set_audio(audio_clip.subclip(*segment['audio_range']))
+        elif with_audio_track:
+            # 拼接要求所有片段音轨一致，没有音频区间的片段补静音
+            from moviepy.audio.AudioClip import AudioArrayClip
+            import numpy as np
+            
+            silence = np.zeros((max(1, int(segment['duration'] * audio_clip.fps)), audio_clip.nchannels))
+            image_clip = image_clip.set_audio(AudioArrayClip(silence, fps=audio_clip.fps))
+        
+        try:
+            image_clip.write_videofile(
+                output_path,
+                fps=config['fps'],
+                codec='libx264',
+                audio=with_audio_track,
+                audio_codec='aac' if with_audio_track else None,
+                verbose=False,
+                logger=None
+            )
+        finally:
+            image_clip.close()
+    
+    def _render_segment_native(self, project_name, segment, audio_file, audio_clip, with_audio_track, output_path, config):
+        """使用ffmpeg原生滤镜渲染分镜片段（含推拉摇移运动），无逐帧Python开销"""
+        audio = None
+        if with_audio_track:
+            audio = {
+                "path": None,
+                "sample_rate": audio_clip.fps,
+                "channels": audio_clip.nchannels
+            }
+            if segment['audio_range']:
+                audio.update({
+                    "path": audio_file,
+                    "start": segment['audio_range'][0],
+                    "end": segment['audio_range'][1],
+                    "fade_in": config.get('audio_fade_in', 0),
+                    "fade_out": config.get('audio_fade_out', 0),
+                    "total_duration": audio_clip.duration
+                })
+        
+        args = build_motion_render_args(
+            self._prepare_image(project_name, segment['image_path'], config),
+            output_path,
+            segment['motion'],
+            config['width'],
+            config['height'],
+            config['fps'],
+            segment['duration'],
+            audio=audio,
+            options=config.get('motion_options')
+        )
+        run_ffmpeg(args)
+    
+    def _compose_cached_video(self, project_name, storyboard_data, keyframes, audio_file, config):
+        """使用片段缓存合成最终视频，只重新编码发生变化的分镜"""
+        cache = self._get_segment_cache(project_name, config)
+        audio_clip = self._load_audio_clip(audio_file, config)
+        with_audio_track = audio_clip is not None
+        
+        segment_paths = []
+        stats = {"hits": 0, "misses": 0, "segments": 0}
+        # 淘汰推迟到拼接完成之后，避免删除本次刚编码的片段
+        with cache.run():
+            try:
+                for i, storyboard in enumerate(storyboard_data):
+                    try:
+                        segment = self._plan_segment(storyboard, keyframes, i, audio_clip, config)
+                        if not segment:
+                            continue
+                        
+                        key = self._segment_cache_key(segment, audio_file, with_audio_track, config)
+                        cached_path = cache.get(key, '.mp4')
+                        if cached_path:
+                            stats["hits"] += 1
+                            self.logger.info(f"分镜 {i}: 复用缓存片段 {os.path.basename(cached_path)}")
+                            segment_paths.append(cached_path)
+                            continue
+                        
+                        tmp_path = cache.tmp_path(key, '.mp4')
+                        try:
+                            if config.get('motion_effects', True):
+                                # 所有片段走同一条原生渲染管线，保证编码参数一致可无损拼接
+                                self._render_segment_native(
+                                    project_name, segment, audio_file, audio_clip, with_audio_track, tmp_path, config
+                                )
+                            else:
+                                self._render_segment(project_name, segment, audio_clip, with_audio_track, tmp_path, config)
+                            cached_path = cache.commit(tmp_path, key, '.mp4')
+                        except Exception:
+                            cache.discard(tmp_path)
+                            raise
+                        stats["misses"] += 1
+                        self.logger.info(f"分镜 {i}: 已编码新片段 (时长: {segment['duration']:.1f}s)")
+                        segment_paths.append(cached_path)
+                    except Exception as e:
+                        self.logger.warning(f"创建分镜 {i} 的视频片段失败: {e}")
+                        continue
+            finally:
+                if audio_clip:
+                    audio_clip.close()
+            
+            if not segment_paths:
+                raise Exception("没有可用的视频片段")
+            
+            videos_dir = get_project_dir(project_name, 'videos')
+            output_path = os.path.join(videos_dir, 'smart_storyboard_video.mp4')
+            tmp_output = os.path.join(videos_dir, 'smart_storyboard_video.tmp.mp4')
+            concat_videos(segment_paths, tmp_output)
+            os.replace(tmp_output, output_path)
+        
+        stats["segments"] = len(segment_paths)
+        self.logger.info(f"片段缓存命中 {stats['hits']} 个，重新编码 {stats['misses']} 个")
+        return output_path, stats
+    
     def _select_keyframe_for_storyboard(self, storyboard, keyframes, index):
         """为分镜选择对应的关键帧"""
         if not keyframes:
@@ -405,6 +698,11 @@ class SmartVideoGenerator:
         try:
             self.logger.info(f"开始生成分镜 {index} 视频，分镜数据: {storyboard}")
             
+            # 已由批量裁剪生成
+            if index in self._pre_cut_videos:
+                self.logger.info(f"分镜 {index}: 使用批量裁剪结果 {self._pre_cut_videos[index]}")
+                return self._pre_cut_videos[index]
+            
             # 获取原视频文件路径
             original_video_path = self._get_original_video_path(project_name)
             if not original_video_path or not os.path.exists(original_video_path):
@@ -421,14 +719,13 @@ class SmartVideoGenerator:
                 self.logger.warning(f"分镜 {index} 缺少时间信息，回退到图片模式")
                 return self._generate_single_storyboard_video_from_image(project_name, storyboard, index, keyframes, audio_file, config)
             
-            # 从原视频裁剪片段
-            from moviepy.editor import VideoFileClip
-            original_clip = VideoFileClip(original_video_path)
+            # 从原视频裁剪片段（生成任务内共享同一个读取器）
+            original_clip = self._acquire_source_clip(original_video_path)
             
             # 确保时间范围有效
             if start_time >= original_clip.duration or end_time > original_clip.duration or start_time >= end_time:
                 self.logger.warning(f"分镜 {index} 时间范围无效 ({start_time:.1f}s - {end_time:.1f}s)，原视频时长: {original_clip.duration:.1f}s")
-                original_clip.close()
+                self._release_source_clip(original_video_path, original_clip)
                 return self._generate_single_storyboard_video_from_image(project_name, storyboard, index, keyframes, audio_file, config)
             
             # 裁剪视频片段
@@ -473,10 +770,9 @@ class SmartVideoGenerator:
             except Exception as e:
                 self.logger.error(f"分镜 {index}: 写入视频文件时出错: {e}")
                 raise
-            
-            # 清理资源
-            video_clip.close()
-            original_clip.close()
+            finally:
+                # 子片段与原视频共享读取器，只归还原视频，不单独关闭子片段
+                self._release_source_clip(original_video_path, original_clip)
             
             self.logger.info(f"分镜 {index} 视频生成完成: {output_path}")
             return output_path
@@ -485,6 +781,57 @@ class SmartVideoGenerator:
             self.logger.error(f"生成分镜 {index} 视频失败: {str(e)}")
             return None
     
+    def _acquire_source_clip(self, video_path):
+        """获取原视频读取器：生成任务中使用共享读取器，否则单独打开"""
+        if self._video_readers is not None:
+            return self._video_readers.acquire(video_path)
+        from moviepy.editor import VideoFileClip
+        return VideoFileClip(video_path)
+    
+    def _release_source_clip(self, video_path, clip):
+        """归还原视频读取器"""
+        if self._video_readers is not None:
+            self._video_readers.release(video_path)
+        else:
+            clip.close()
+    
+    def _batch_cut_storyboards(self, project_name, storyboard_data, config):
+        """一次解复用批量裁剪所有带时间信息的分镜，返回 分镜索引 -> 视频路径"""
+        original_video_path = self._get_original_video_path(project_name)
+        if not original_video_path or not os.path.exists(original_video_path):
+            return {}
+        
+        try:
+            original_clip = self._acquire_source_clip(original_video_path)
+            source_duration = original_clip.duration
+            self._release_source_clip(original_video_path, original_clip)
+        except Exception as e:
+            self.logger.warning(f"读取原视频信息失败，跳过批量裁剪: {e}")
+            return {}
+        
+        videos_dir = get_project_dir(project_name, 'videos')
+        os.makedirs(videos_dir, exist_ok=True)
+        
+        ranges = []
+        index_by_path = {}
+        for i, storyboard in enumerate(storyboard_data):
+            start_time = storyboard.get('start_time')
+            end_time = storyboard.get('end_time')
+            if start_time is None or end_time is None:
+                continue
+            if start_time >= source_duration or end_time > source_duration or start_time >= end_time:
+                continue
+            output_path = os.path.join(videos_dir, f'storyboard_{i}.mp4')
+            ranges.append((float(start_time), float(end_time), output_path))
+            index_by_path[output_path] = i
+        
+        if not ranges:
+            return {}
+        
+        self.logger.info(f"批量裁剪 {len(ranges)} 个分镜片段: {original_video_path}")
+        results = batch_cut_ranges(original_video_path, ranges, fps=config['fps'])
+        return {index_by_path[path]: path for path, ok in results.items() if ok}
+    
     def _get_original_video_path(self, project_name):
         """获取原视频文件路径"""
         try:
@@ -551,9 +898,16 @@ class SmartVideoGenerator:
             if duration <= 0 or duration > 30:  # 限制最大时长为30秒
                 duration = config['default_duration']
             
-            # 创建图片片段
-            image_clip = ImageClip(image_path, duration=duration)
-            image_clip = image_clip.resize((config['width'], config['height']))
+            # 分镜带镜头运动时使用ffmpeg原生渲染
+            if config.get('motion_effects', True):
+                motion = parse_camera_movement(get_camera_movement(storyboard))
+                if motion != MOTION_STATIC:
+                    return self._generate_single_motion_video(
+                        project_name, storyboard, index, image_path, duration, motion, audio_file, config
+                    )
+            
+            # 创建图片片段（图片已预处理为目标尺寸，无需逐帧缩放）
+            image_clip = ImageClip(self._prepare_image(project_name, image_path, config), duration=duration)
             
             # 不添加淡入淡出效果
             # transition_duration = config.get('transition_duration', 0.5)
@@ -619,6 +973,47 @@ class SmartVideoGenerator:
             self.logger.error(f"从图片生成分镜 {index} 视频失败: {str(e)}")
             return None
     
+    def _generate_single_motion_video(self, project_name, storyboard, index, image_path, duration, motion, audio_file, config):
+        """使用ffmpeg原生推拉摇移渲染单个分镜视频"""
+        audio_clip = None
+        if audio_file and os.path.exists(audio_file):
+            try:
+                audio_clip = AudioFileClip(audio_file)
+            except Exception as e:
+                self.logger.error(f"处理分镜 {index} 音频时出错: {e}")
+        
+        try:
+            segment = {
+                "index": index,
+                "image_path": image_path,
+                "duration": float(duration),
+                "audio_range": None,
+                "motion": motion
+            }
+            start_time = storyboard.get('start_time')
+            end_time = storyboard.get('end_time')
+            if audio_clip and start_time is not None and end_time is not None:
+                if start_time < audio_clip.duration and end_time <= audio_clip.duration and start_time < end_time:
+                    segment['audio_range'] = (float(start_time), float(end_time))
+                    segment['duration'] = float(end_time - start_time)
+                else:
+                    self.logger.warning(f"分镜 {index}: 音频时间范围无效")
+            
+            videos_dir = get_project_dir(project_name, 'videos')
+            os.makedirs(videos_dir, exist_ok=True)
+            output_path = os.path.join(videos_dir, f'storyboard_{index}.mp4')
+            
+            # 单个分镜视频不做整轨淡入淡出，与图片模式保持一致
+            render_config = dict(config, audio_fade_in=0, audio_fade_out=0)
+            self.logger.info(f"分镜 {index}: 使用镜头运动 {motion} 原生渲染到: {output_path}")
+            self._render_segment_native(
+                project_name, segment, audio_file, audio_clip, segment['audio_range'] is not None, output_path, render_config
+            )
+            return output_path
+        finally:
+            if audio_clip:
+                audio_clip.close()
+    
     def _save_individual_generation_info(self, project_name, generation_info):
         """保存单个分镜视频生成信息"""
         try:
@@ -56,6 +56,59 @@ def _cleanup_and_reorganize_storyboard_files(project_name: str, storyboards: lis
         logging.error(f"Error cleaning up and reorganizing storyboard files: {e}")
         raise e
 
+UNIFIED_SUBJECT_KINDS = ("characters", "scenes", "props", "effects")
+
+
+def validate_unified_generation_format(data):
+    """
+    校验unified_generation_novel.json的格式
+
+    文件为标准LLM响应结构，choices[0].message.content 为生成结果（JSON字符串或对象），
+    生成结果须包含 summary、subjects（四类主体列表）与 storyboard（分镜列表）。
+
+    :return: (是否通过, 说明信息)
+    """
+    if not isinstance(data, dict):
+        return False, "文件内容必须是JSON对象"
+    choices = data.get('choices')
+    if not isinstance(choices, list) or not choices:
+        return False, "缺少choices字段或choices为空"
+    message = choices[0].get('message') if isinstance(choices[0], dict) else None
+    if not isinstance(message, dict) or 'content' not in message:
+        return False, "choices[0]缺少message.content字段"
+
+    content = message['content']
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except json.JSONDecodeError as e:
+            return False, f"content不是合法的JSON: {e}"
+    if not isinstance(content, dict):
+        return False, "content必须是JSON对象"
+
+    if not isinstance(content.get('summary', ''), str):
+        return False, "summary必须是字符串"
+    subjects = content.get('subjects')
+    if not isinstance(subjects, dict):
+        return False, "缺少subjects字段或subjects不是对象"
+    for kind in UNIFIED_SUBJECT_KINDS:
+        items = subjects.get(kind, [])
+        if not isinstance(items, list):
+            return False, f"subjects.{kind}必须是列表"
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                return False, f"subjects.{kind}[{i}]必须是对象"
+    storyboard = content.get('storyboard')
+    if not isinstance(storyboard, list):
+        return False, "缺少storyboard字段或storyboard不是列表"
+    for i, scene in enumerate(storyboard):
+        if not isinstance(scene, dict):
+            return False, f"storyboard[{i}]必须是对象"
+
+    counts = ", ".join(f"{kind}={len(subjects.get(kind, []))}" for kind in UNIFIED_SUBJECT_KINDS)
+    return True, f"格式正确（{counts}, storyboard={len(storyboard)}）"
+
+
 # 创建storyboard目录路径（保持向后兼容）
 def get_scene_descriptions_dir(project_name):
     """获取项目的storyboard目录路径"""
@@ -1,13 +1,38 @@
 import json
 import logging
 import os
-from flask import jsonify, request
-from backend.llm.llm import query_llm
+import queue
+import threading
+from flask import Response, jsonify, request
+from backend.ai.novel_map_reduce import (
+    DEFAULT_CHUNK_CHARS,
+    DEFAULT_MERGE_THRESHOLD,
+    build_chunks,
+    merge_partial_results,
+)
+from backend.llm.batch import LLMBatchExecutor
+from backend.llm.llm import query_llm, query_llm_messages, query_llm_stream
+from backend.llm.response_cache import build_messages
+from backend.llm.structured import resolve_structured
+from backend.util.json_stream import IncrementalJSONParser
 from backend.util.project_file_manager import get_project_dir
-from backend.util.file import save_file
+from backend.util.file import get_config, save_file
 from backend.ai.prompt_engine import AIPromptEngine
 from backend.rest_handler.storyboard import validate_unified_generation_format
 
+# 生成结果的必需字段
+UNIFIED_RESULT_FIELDS = {"summary": str, "subjects": dict, "storyboard": list}
+
+# 流式解析的目标数组 -> 条目类别
+STREAM_TARGETS = {
+    "subjects.characters[*]": "characters",
+    "subjects.scenes[*]": "scenes",
+    "subjects.props[*]": "props",
+    "subjects.effects[*]": "effects",
+    "storyboard[*]": "storyboard",
+}
+
+
 class UnifiedGenerationHandler:
     """统一的主体与分镜生成处理器"""
     
@@ -15,33 +40,35 @@ class UnifiedGenerationHandler:
         self.logger = logging.getLogger(__name__)
         self.prompt_engine = AIPromptEngine()
     
-    def generate_subjects_and_storyboard_from_novel(self, project_name, novel_content, processing_mode="novel"):
-        """基于小说内容生成主体和分镜"""
+    def generate_subjects_and_storyboard_from_novel(self, project_name, novel_content, processing_mode="novel", on_item=None, map_reduce=None):
+        """
+        基于小说内容生成主体和分镜
+
+        :param on_item: 每解析出一个主体/分镜时回调 on_item(类别, 序号, 数据)
+        :param map_reduce: 是否分块生成，默认在内容超过 novelChunkChars 时自动分块
+        """
+        chunk_chars = int(get_config().get("novelChunkChars", DEFAULT_CHUNK_CHARS))
+        if map_reduce or (map_reduce is None and len(novel_content) > chunk_chars):
+            return self._generate_from_novel_map_reduce(
+                project_name, novel_content, processing_mode, chunk_chars, on_item
+            )
         try:
             # 使用新的提示词引擎获取系统提示词
-            system_prompt = self.prompt_engine.get_subject_generation_prompt(
-                content_info=novel_content,
-                processing_mode=processing_mode
-            )
+            system_prompt = self.prompt_engine.get_subject_generation_prompt(processing_mode)
             user_prompt = f"""请分析以下小说内容，提取所有重要主体（包括角色、场景、道具、特效等）并生成分镜脚本：
 
 {novel_content}
 
 请按照JSON格式返回结果。"""
             
-            # 调用AI接口
-            response = query_llm(user_prompt, system_prompt, "unified_generation", 1)
+            # 流式调用AI接口，主体与分镜边生成边保存
+            response, result = self._stream_generation(
+                project_name, user_prompt, system_prompt, "unified_generation", on_item
+            )
             
             # 保存AI原始响应
             self._save_raw_llm_response(project_name, response, "novel")
             
-            # 解析AI响应
-            try:
-                result = json.loads(response)
-            except json.JSONDecodeError as e:
-                # 尝试修复JSON格式
-                result = self._fix_json_response(response)
-            
             # 保存结果到项目目录
             self._save_generation_result(project_name, result, "novel")
             
@@ -59,33 +86,87 @@ class UnifiedGenerationHandler:
                 "message": "生成失败"
             }
     
-    def generate_subjects_and_storyboard_from_video(self, project_name, video_path, scenes_data, transcription_data):
-        """基于视频内容生成主体和分镜"""
+    def _generate_from_novel_map_reduce(self, project_name, novel_content, processing_mode, chunk_chars, on_item=None):
+        """分块并发提取各章节的主体与分镜，再合并去重并全局编号"""
         try:
-            # 构建视频内容信息
-            video_content_info = self._build_video_content_info(scenes_data, transcription_data)
+            config = get_config()
+            chunks = build_chunks(novel_content, chunk_chars)
+            self.logger.info(f"Map-reduce generation: {len(chunks)} chunks, {len(novel_content)} chars")
+            
+            def extract(item):
+                index, chunk = item
+                system_prompt = self.prompt_engine.get_subject_generation_prompt(processing_mode)
+                user_prompt = f"""以下是小说的第{index + 1}/{len(chunks)}部分，请分析这部分内容，提取其中出现的所有重要主体（包括角色、场景、道具、特效等）并生成分镜脚本：
+
+{chunk}
+
+请按照JSON格式返回结果。"""
+                # 单个分块失败不影响其他分块，返回空结果并记录失败的分块
+                try:
+                    response = query_llm(user_prompt, system_prompt, "unified_generation", 1)
+                    return self._resolve_result(
+                        "unified_generation_chunk", response, user_prompt, system_prompt, "unified_generation",
+                        strict=True
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Chunk {index + 1}/{len(chunks)} generation failed, skipped: {str(e)}")
+                    return None
+            
+            executor = LLMBatchExecutor(max_in_flight=config.get("llmMaxInFlight", 4))
+            partials = executor.run(extract, list(enumerate(chunks)))
+            failed_chunks = [index for index, partial in enumerate(partials) if partial is None]
+            if len(failed_chunks) == len(chunks):
+                raise ValueError(f"all {len(chunks)} chunks failed")
+            result = merge_partial_results(
+                partials, float(config.get("subjectMergeThreshold", DEFAULT_MERGE_THRESHOLD))
+            )
             
+            # 保存合并后的响应与结果
+            self._save_raw_llm_response(project_name, json.dumps(result, ensure_ascii=False), "novel")
+            self._save_generation_result(project_name, result, "novel")
+            
+            if on_item:
+                for kind, items in result["subjects"].items():
+                    for i, item in enumerate(items):
+                        on_item(kind, i, item)
+                for i, scene in enumerate(result["storyboard"]):
+                    on_item("storyboard", i, scene)
+            
+            message = f"主体与分镜生成完成（{len(chunks)}个分块）"
+            if failed_chunks:
+                message = f"主体与分镜部分生成完成（{len(chunks)}个分块，{len(failed_chunks)}个失败）"
+            return {
+                "success": True,
+                "data": result,
+                "failedChunks": failed_chunks,
+                "message": message
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Map-reduce novel generation failed: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "生成失败"
+            }
+    
+    def generate_subjects_and_storyboard_from_video(self, project_name, video_path, scenes_data, transcription_data, on_item=None):
+        """基于视频内容生成主体和分镜"""
+        try:
             # 使用新的提示词引擎获取系统提示词
-            system_prompt = self.prompt_engine.get_subject_generation_prompt(
-                content_info=video_content_info,
-                processing_mode="video"
-            )
+            system_prompt = self.prompt_engine.get_subject_generation_prompt("video")
             
             # 构建用户提示词，包含场景信息和转录文本
             user_prompt = self._build_video_analysis_prompt(scenes_data, transcription_data)
             
-            # 调用AI接口
-            response = query_llm(user_prompt, system_prompt, "unified_generation_video", 1)
+            # 流式调用AI接口
+            response, result = self._stream_generation(
+                project_name, user_prompt, system_prompt, "unified_generation_video", on_item
+            )
             
             # 保存AI原始响应
             self._save_raw_llm_response(project_name, response, "video")
             
-            # 解析AI响应
-            try:
-                result = json.loads(response)
-            except json.JSONDecodeError as e:
-                result = self._fix_json_response(response)
-            
             # 保存结果到项目目录
             self._save_generation_result(project_name, result, "video")
             
@@ -103,14 +184,84 @@ class UnifiedGenerationHandler:
                 "message": "视频分析生成失败"
             }
     
-    def _build_video_content_info(self, scenes_data, transcription_data):
-        """构建视频内容信息"""
-        content_info = {
-            "type": "video",
-            "scenes": scenes_data,
-            "transcription": transcription_data
-        }
-        return json.dumps(content_info, ensure_ascii=False)
+    def _stream_generation(self, project_name, user_prompt, system_prompt, model_name, on_item=None):
+        """
+        流式请求LLM并增量解析，每个主体/分镜对象闭合后立即保存
+
+        :return: (原始响应文本, 解析结果)
+        """
+        parser = IncrementalJSONParser(STREAM_TARGETS)
+        streamed = {kind: [] for kind in STREAM_TARGETS.values()}
+        for delta in query_llm_stream(user_prompt, system_prompt, model_name, 1):
+            for target, item in parser.feed(delta):
+                if not isinstance(item, dict):
+                    continue
+                kind = STREAM_TARGETS[target]
+                index = len(streamed[kind])
+                streamed[kind].append(item)
+                self._save_streamed_item(project_name, kind, index, item)
+                if on_item:
+                    on_item(kind, index, item)
+
+        response = parser.text
+        subjects_streamed = {kind: items for kind, items in streamed.items() if kind != "storyboard" and items}
+        result = self._resolve_result(
+            "unified_generation", response, user_prompt, system_prompt, model_name,
+            supplement={"storyboard": streamed["storyboard"], "subjects": subjects_streamed}
+        )
+
+        # 响应被截断等情况下，用已经流式解析出的条目补全
+        if isinstance(result, dict):
+            if not result.get("storyboard") and streamed["storyboard"]:
+                result["storyboard"] = streamed["storyboard"]
+            subjects = result.setdefault("subjects", {})
+            for kind in ("characters", "scenes", "props", "effects"):
+                if not subjects.get(kind) and streamed[kind]:
+                    subjects[kind] = streamed[kind]
+        self.logger.info(f"Streamed items: {parser.counts}")
+        return response, result
+    
+    def _resolve_result(self, call_site, response, user_prompt, system_prompt, model_name, supplement=None, strict=False):
+        """
+        解析生成结果：容错修复JSON，缺失字段时只追问缺失的部分，
+        仍无法解析时返回基本结构（strict 时抛出 ValueError）
+        """
+        # 追问时带上原问题和上一轮回答，模型只需补充缺失的部分；没有回答时不追问
+        def reask(instruction):
+            messages = build_messages(system_prompt, user_prompt) + [
+                {"role": "assistant", "content": response},
+                {"role": "user", "content": instruction}
+            ]
+            return query_llm_messages(messages, model_name, 1)
+        
+        result = resolve_structured(
+            call_site,
+            response,
+            UNIFIED_RESULT_FIELDS,
+            reask=reask if response else None,
+            supplement=supplement,
+        )
+        if not isinstance(result.data, dict):
+            if strict:
+                raise ValueError(f"unparseable LLM output for {call_site}")
+            return self._fix_json_response(response)
+        data = result.data
+        data.setdefault("summary", "")
+        if not isinstance(data.get("subjects"), dict):
+            data["subjects"] = {}
+        if not isinstance(data.get("storyboard"), list):
+            data["storyboard"] = []
+        return data
+    
+    def _save_streamed_item(self, project_name, kind, index, item):
+        """保存单个流式解析出的条目"""
+        try:
+            if kind == "storyboard":
+                self._save_storyboard_item(project_name, index, item)
+            else:
+                self._save_subject(project_name, kind, index, item)
+        except Exception as e:
+            self.logger.error(f"Failed to save streamed {kind} {index + 1}: {str(e)}")
     
     def _build_video_analysis_prompt(self, scenes_data, transcription_data):
         """构建视频分析的用户提示词"""
@@ -132,6 +283,18 @@ class UnifiedGenerationHandler:
     
     def _fix_json_response(self, response):
         """尝试修复AI返回的JSON格式"""
+        if not response:
+            self.logger.error("AI返回内容为空")
+            return {
+                "summary": "解析失败",
+                "subjects": {
+                    "characters": [],
+                    "scenes": [],
+                    "props": [],
+                    "effects": []
+                },
+                "storyboard": []
+            }
         try:
             # 移除可能的markdown标记
             cleaned = response.strip()
@@ -287,150 +450,154 @@ class UnifiedGenerationHandler:
     
     def _save_subjects_separately(self, project_name, subjects):
         """分别保存各类主体信息"""
+        for kind in ("characters", "scenes", "props", "effects"):
+            for i, item in enumerate(subjects.get(kind) or []):
+                self._save_subject(project_name, kind, i, item)
+    
+    def _save_subject(self, project_name, kind, i, item):
+        """保存单个主体"""
         project_dir = get_project_dir(project_name)
         
-        # 保存角色主体
-        if subjects.get('characters'):
-            char_dir = os.path.join(project_dir, 'character')
-            os.makedirs(char_dir, exist_ok=True)
-            for i, char in enumerate(subjects['characters']):
-                # 确保角色数据包含必要字段
-                char_data = {
-                    "name": char.get('name', f'角色{i+1}'),
-                    "type": "character",
-                    "description": char.get('description', ''),
-                    "english_prompt": char.get('english_prompt', char.get('englishPrompt', '')),
-                    "appearance_details": char.get('appearance_details', char.get('initial_appearance', '')),
-                    "personality": char.get('personality', ''),
-                    "age_range": char.get('age_range', char.get('age', '')),
-                    "gender": char.get('gender', '未指定')
-                }
-                char_file = os.path.join(char_dir, f"{char_data['name']}.json")
-                save_file(char_file, json.dumps(char_data, ensure_ascii=False, indent=2))
-        
-        # 保存场景主体
-        if subjects.get('scenes'):
-            scene_dir = os.path.join(project_dir, 'scene')
-            os.makedirs(scene_dir, exist_ok=True)
-            for i, scene in enumerate(subjects['scenes']):
-                # 确保场景数据包含必要字段
-                scene_data = {
-                    "name": scene.get('name', f'场景{i+1}'),
-                    "type": "scene",
-                    "description": scene.get('description', ''),
-                    "english_prompt": scene.get('english_prompt', scene.get('englishPrompt', '')),
-                    "atmosphere": scene.get('atmosphere', '中性氛围'),
-                    "location_type": scene.get('location_type', scene.get('period', '室内/室外待定')),
-                    "time_period": scene.get('time_period', '当代')
-                }
-                scene_file = os.path.join(scene_dir, f"{scene_data['name']}.json")
-                save_file(scene_file, json.dumps(scene_data, ensure_ascii=False, indent=2))
-        
-        # 保存道具主体
-        if subjects.get('props'):
-            prop_dir = os.path.join(project_dir, 'props')
-            os.makedirs(prop_dir, exist_ok=True)
-            for i, prop in enumerate(subjects['props']):
-                # 确保道具数据包含必要字段
-                prop_data = {
-                    "name": prop.get('name', f'道具{i+1}'),
-                    "type": "prop",
-                    "description": prop.get('description', ''),
-                    "english_prompt": prop.get('english_prompt', prop.get('englishPrompt', '')),
-                    "function": prop.get('function', '功能待定'),
-                    "material": prop.get('material', '材质待定'),
-                    "size_scale": prop.get('size_scale', '中等尺寸')
-                }
-                prop_file = os.path.join(prop_dir, f"{prop_data['name']}.json")
-                save_file(prop_file, json.dumps(prop_data, ensure_ascii=False, indent=2))
+        if kind == 'characters':
+            # 保存角色主体，确保角色数据包含必要字段
+            subject_dir = os.path.join(project_dir, 'character')
+            data = {
+                "name": item.get('name', f'角色{i+1}'),
+                "type": "character",
+                "description": item.get('description', ''),
+                "english_prompt": item.get('english_prompt', item.get('englishPrompt', '')),
+                "appearance_details": item.get('appearance_details', item.get('initial_appearance', '')),
+                "personality": item.get('personality', ''),
+                "age_range": item.get('age_range', item.get('age', '')),
+                "gender": item.get('gender', '未指定')
+            }
+        elif kind == 'scenes':
+            # 保存场景主体
+            subject_dir = os.path.join(project_dir, 'scene')
+            data = {
+                "name": item.get('name', f'场景{i+1}'),
+                "type": "scene",
+                "description": item.get('description', ''),
+                "english_prompt": item.get('english_prompt', item.get('englishPrompt', '')),
+                "atmosphere": item.get('atmosphere', '中性氛围'),
+                "location_type": item.get('location_type', item.get('period', '室内/室外待定')),
+                "time_period": item.get('time_period', '当代')
+            }
+        elif kind == 'props':
+            # 保存道具主体
+            subject_dir = os.path.join(project_dir, 'props')
+            data = {
+                "name": item.get('name', f'道具{i+1}'),
+                "type": "prop",
+                "description": item.get('description', ''),
+                "english_prompt": item.get('english_prompt', item.get('englishPrompt', '')),
+                "function": item.get('function', '功能待定'),
+                "material": item.get('material', '材质待定'),
+                "size_scale": item.get('size_scale', '中等尺寸')
+            }
+        elif kind == 'effects':
+            # 保存特效主体
+            subject_dir = os.path.join(project_dir, 'effects')
+            data = {
+                "name": item.get('name', f'特效{i+1}'),
+                "type": "effect",
+                "description": item.get('description', ''),
+                "english_prompt": item.get('english_prompt', item.get('englishPrompt', '')),
+                "duration_type": item.get('duration_type', '短暂'),
+                "intensity_level": item.get('intensity_level', '中等'),
+                "visual_style": item.get('visual_style', '标准视觉效果')
+            }
+        else:
+            return
         
-        # 保存特效主体
-        if subjects.get('effects'):
-            effect_dir = os.path.join(project_dir, 'effects')
-            os.makedirs(effect_dir, exist_ok=True)
-            for i, effect in enumerate(subjects['effects']):
-                # 确保特效数据包含必要字段
-                effect_data = {
-                    "name": effect.get('name', f'特效{i+1}'),
-                    "type": "effect",
-                    "description": effect.get('description', ''),
-                    "english_prompt": effect.get('english_prompt', effect.get('englishPrompt', '')),
-                    "duration_type": effect.get('duration_type', '短暂'),
-                    "intensity_level": effect.get('intensity_level', '中等'),
-                    "visual_style": effect.get('visual_style', '标准视觉效果')
-                }
-                effect_file = os.path.join(effect_dir, f"{effect_data['name']}.json")
-                save_file(effect_file, json.dumps(effect_data, ensure_ascii=False, indent=2))
+        os.makedirs(subject_dir, exist_ok=True)
+        subject_file = os.path.join(subject_dir, f"{data['name']}.json")
+        save_file(subject_file, json.dumps(data, ensure_ascii=False, indent=2))
     
     def _save_storyboard_separately(self, project_name, storyboard):
         """保存分镜信息"""
-        project_dir = get_project_dir(project_name)
-        storyboard_dir = os.path.join(project_dir, 'storyboard')
-        os.makedirs(storyboard_dir, exist_ok=True)
-        
         for i, scene in enumerate(storyboard):
-            scene_file = os.path.join(storyboard_dir, f"storyboard_{i+1}.json")
-            save_file(scene_file, json.dumps(scene, ensure_ascii=False, indent=2))
+            self._save_storyboard_item(project_name, i, scene)
+    
+    def _save_storyboard_item(self, project_name, i, scene):
+        """保存单个分镜"""
+        storyboard_dir = os.path.join(get_project_dir(project_name), 'storyboard')
+        os.makedirs(storyboard_dir, exist_ok=True)
+        scene_file = os.path.join(storyboard_dir, f"storyboard_{i+1}.json")
+        save_file(scene_file, json.dumps(scene, ensure_ascii=False, indent=2))
 
 
 # API接口函数
+def _parse_generation_request():
+    """解析生成请求，返回 (请求数据, 项目名, 错误信息)"""
+    # 强制设置请求编码
+    if request.content_type and 'charset' not in request.content_type:
+        request.charset = 'utf-8'
+    
+    data = request.get_json(force=True)
+    if not data:
+        return None, None, "No data provided"
+    
+    project_name = data.get('projectName')
+    if not project_name:
+        return data, None, "Project name is required"
+    
+    # 确保项目名称是正确的字符串格式
+    if isinstance(project_name, bytes):
+        project_name = project_name.decode('utf-8')
+    
+    # 尝试重新编码以确保正确性
+    try:
+        project_name = project_name.encode('latin1').decode('utf-8')
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        # 如果重新编码失败，保持原样
+        pass
+    
+    # 记录调试信息
+    logging.info(f"Processing project: {project_name} (type: {type(project_name)})")
+    logging.info(f"Project name encoded: {project_name.encode('utf-8')}")
+    return data, project_name, None
+
+
+def _validate_generation_data(data):
+    """校验生成模式所需参数，返回错误信息或None"""
+    processing_mode = data.get('processingMode', 'novel')  # 'novel' 或 'video'
+    if processing_mode == 'novel':
+        if not data.get('novelContent'):
+            return "Novel content is required for novel mode"
+    elif processing_mode == 'video':
+        if not data.get('videoPath'):
+            return "Video path is required for video mode"
+    else:
+        return "Invalid processing mode"
+    return None
+
+
+def _run_generation(handler, project_name, data, on_item=None):
+    """按处理模式执行生成"""
+    if data.get('processingMode', 'novel') == 'video':
+        return handler.generate_subjects_and_storyboard_from_video(
+            project_name,
+            data.get('videoPath'),
+            data.get('scenesData', []),
+            data.get('transcriptionData', []),
+            on_item=on_item,
+        )
+    return handler.generate_subjects_and_storyboard_from_novel(
+        project_name, data.get('novelContent'), 'novel', on_item=on_item, map_reduce=data.get('mapReduce')
+    )
+
+
 def generate_unified_subjects_and_storyboard():
     """统一的主体与分镜生成API接口"""
     try:
-        # 强制设置请求编码
-        if request.content_type and 'charset' not in request.content_type:
-            request.charset = 'utf-8'
-        
-        data = request.get_json(force=True)
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
+        data, project_name, error = _parse_generation_request()
+        if not error:
+            error = _validate_generation_data(data)
+        if error:
+            return jsonify({"error": error}), 400
         
-        project_name = data.get('projectName')
-        processing_mode = data.get('processingMode', 'novel')  # 'novel' 或 'video'
-        
-        if not project_name:
-            return jsonify({"error": "Project name is required"}), 400
-        
-        # 确保项目名称是正确的字符串格式
-        if isinstance(project_name, bytes):
-            project_name = project_name.decode('utf-8')
-        
-        # 尝试重新编码以确保正确性
-        try:
-            project_name = project_name.encode('latin1').decode('utf-8')
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            # 如果重新编码失败，保持原样
-            pass
-        
-        # 记录调试信息
-        logging.info(f"Processing project: {project_name} (type: {type(project_name)})")
-        logging.info(f"Project name encoded: {project_name.encode('utf-8')}")
-        
-        handler = UnifiedGenerationHandler()
-        
-        if processing_mode == 'novel':
-            novel_content = data.get('novelContent')
-            if not novel_content:
-                return jsonify({"error": "Novel content is required for novel mode"}), 400
-            
-            result = handler.generate_subjects_and_storyboard_from_novel(
-                project_name, novel_content, processing_mode
-            )
-        
-        elif processing_mode == 'video':
-            video_path = data.get('videoPath')
-            scenes_data = data.get('scenesData', [])
-            transcription_data = data.get('transcriptionData', [])
-            
-            if not video_path:
-                return jsonify({"error": "Video path is required for video mode"}), 400
-            
-            result = handler.generate_subjects_and_storyboard_from_video(
-                project_name, video_path, scenes_data, transcription_data
-            )
-        
-        else:
-            return jsonify({"error": "Invalid processing mode"}), 400
+        result = _run_generation(UnifiedGenerationHandler(), project_name, data)
         
         if result['success']:
             return jsonify(result), 200
@@ -443,4 +610,46 @@ def generate_unified_subjects_and_storyboard():
             "success": False,
             "error": str(e),
             "message": "API调用失败"
-        })
\ No newline at end of file
+        })
+
+
+def stream_unified_subjects_and_storyboard():
+    """
+    统一的主体与分镜生成API接口（NDJSON流式返回）
+
+    每解析出一个主体或分镜即输出一行 {"type": "item", "kind", "index", "data"}，
+    最后输出 {"type": "done", ...生成结果} 或 {"type": "error", ...}
+    """
+    try:
+        data, project_name, error = _parse_generation_request()
+        if not error:
+            error = _validate_generation_data(data)
+        if error:
+            return jsonify({"error": error}), 400
+    except Exception as e:
+        logging.error(f"Unified generation stream API error: {str(e)}")
+        return jsonify({"success": False, "error": str(e), "message": "API调用失败"}), 500
+    
+    events = queue.Queue()
+    
+    def on_item(kind, index, item):
+        events.put({"type": "item", "kind": kind, "index": index, "data": item})
+    
+    def worker():
+        try:
+            result = _run_generation(UnifiedGenerationHandler(), project_name, data, on_item)
+            events.put({"type": "done" if result.get('success') else "error", **result})
+        except Exception as e:
+            logging.error(f"Unified generation stream error: {str(e)}")
+            events.put({"type": "error", "success": False, "error": str(e), "message": "生成失败"})
+    
+    threading.Thread(target=worker, daemon=True).start()
+    
+    def generate():
+        while True:
+            event = events.get()
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+            if event["type"] != "item":
+                break
+    
+    return Response(generate(), mimetype="application/x-ndjson")
@@ -26,12 +26,18 @@ def generate_video():
     Endpoint to generate a new video.
     """
     try:
+        data = request.get_json(silent=True) or {}
+        burn_subtitles = bool(data.get("burnSubtitles", False))
         remove_all(video_dir)
         make_dir(video_dir)
-        create_video_with_audio_images()
+        create_video_with_audio_images(burn_subtitles=burn_subtitles)
         now = int(time.time())
         new_video_data = {
-            "videoUrl": os.path.join("/videos", "video.mp4") + f"?v={now}"
+            "videoUrl": os.path.join("/videos", "video.mp4") + f"?v={now}",
+            "subtitleUrls": {
+                "srt": os.path.join("/videos", "video.srt") + f"?v={now}",
+                "ass": os.path.join("/videos", "video.ass") + f"?v={now}",
+            },
         }
         return jsonify(new_video_data), 200
     except Exception as e:
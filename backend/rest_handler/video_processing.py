@@ -6,11 +6,12 @@ import tempfile
 from datetime import datetime
 from flask import jsonify, request
 from backend.util.project_file_manager import get_project_dir
-from backend.util.file import save_file
+from backend.util.file import get_config, save_file
 from backend.video.scene_detection import VideoSceneDetector, create_scene_detector, detect_video_scenes_cli
 from backend.audio.transcription import AudioTranscriber
 from backend.audio.audio_effects import AudioEffectsExtractor
-from backend.ai.video_analysis import VideoFrameAnalyzer
+from backend.ai.video_analysis import DEFAULT_BATCH_SIZE, DEFAULT_SHEET_TOKEN_BUDGET, VideoFrameAnalyzer
+from backend.llm.batch import LLMBatchExecutor
 from backend.llm.llm_service import get_llm_service
 
 class VideoProcessingHandler:
@@ -22,7 +23,13 @@ class VideoProcessingHandler:
         self.audio_transcriber = AudioTranscriber()
         self.audio_effects_extractor = AudioEffectsExtractor()
         self.llm_service = llm_service or get_llm_service()
-        self.frame_analyzer = VideoFrameAnalyzer(self.llm_service)
+        config = get_config()
+        self.frame_analyzer = VideoFrameAnalyzer(
+            self.llm_service,
+            batch_size=int(config.get("frameAnalysisBatchSize", DEFAULT_BATCH_SIZE)),
+            contact_sheet=bool(config.get("frameContactSheet", False)),
+            sheet_token_budget=int(config.get("contactSheetTokenBudget", DEFAULT_SHEET_TOKEN_BUDGET)),
+        )
     
     def detect_scenes(self, video_path, threshold=30.0, detector_type='content', 
                      output_dir=None, save_images=True, split_video=False):
@@ -102,13 +109,18 @@ class VideoProcessingHandler:
                 "message": "音频转录失败"
             }
     
-    def analyze_video_frames(self, project_name, scene_data=None):
+    def analyze_video_frames(self, project_name, scene_data=None, force=False):
         """
         分析视频关键帧，生成画面描述和主体识别
         
+        多个场景并发分析（并发数由 frameAnalysisMaxInFlight 控制），每完成一个场景
+        按场景顺序追加到 frame_analysis.partial.jsonl，中途失败时已完成的场景不会丢失；
+        再次执行时跳过 frame_analysis.json 与部分结果中已有的场景。
+        
         Args:
             project_name: 项目名称
             scene_data: 场景数据（可选，如果不提供则从文件读取）
+            force: 是否忽略已有结果（包括缓存的LLM响应）重新分析所有场景
             
         Returns:
             分析结果
@@ -137,57 +149,47 @@ class VideoProcessingHandler:
                         "message": "场景数据不存在，请先进行场景检测"
                     }
             
+            scenes = scene_data.get("scenes", [])
+            analysis_file = os.path.join(project_dir, "frame_analysis.json")
+            partial_file = os.path.join(project_dir, "frame_analysis.partial.jsonl")
+            
+            if force:
+                for path in (analysis_file, partial_file):
+                    if os.path.exists(path):
+                        os.remove(path)
+            completed = self._load_completed_scene_analyses(analysis_file, partial_file)
+            
+            pending = [scene for scene in scenes if scene.get("scene_id", 0) not in completed]
+            if completed:
+                self.logger.info(f"Resuming frame analysis: {len(completed)} scenes done, {len(pending)} pending")
+            
+            def save_scene(index, scene_analysis):
+                # 按场景顺序回调，逐个追加，保证部分结果有序
+                if scene_analysis is None:
+                    return
+                completed[scene_analysis["scene_id"]] = scene_analysis
+                with open(partial_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(scene_analysis, ensure_ascii=False) + "\n")
+            
+            executor = LLMBatchExecutor(max_in_flight=get_config().get("frameAnalysisMaxInFlight", 4))
+            executor.run(lambda scene: self._analyze_scene(scene, keyframes_dir, force), pending, save_scene)
+            
             analysis_results = {
                 "project_name": project_name,
-                "total_scenes": len(scene_data.get("scenes", [])),
-                "scenes": [],
+                "total_scenes": len(scenes),
+                "scenes": [
+                    completed[scene.get("scene_id", 0)]
+                    for scene in scenes
+                    if scene.get("scene_id", 0) in completed
+                ],
                 "analysis_timestamp": datetime.now().isoformat()
             }
             
-            # 分析每个场景的关键帧
-            for scene in scene_data.get("scenes", []):
-                scene_id = scene.get("scene_id", 0)
-                keyframes = scene.get("keyframes", [])
-                
-                if keyframes:
-                    self.logger.info(f"Analyzing {len(keyframes)} keyframes for scene {scene_id}")
-                    
-                    # 构建关键帧文件路径
-                    frame_paths = []
-                    for frame_info in keyframes:
-                        frame_filename = frame_info.get("filename")
-                        if frame_filename:
-                            frame_path = os.path.join(keyframes_dir, frame_filename)
-                            if os.path.exists(frame_path):
-                                frame_paths.append(frame_path)
-                    
-                    if frame_paths:
-                        # 分析场景帧
-                        scene_analysis = self.frame_analyzer.analyze_scene_frames(frame_paths, scene_id)
-                        
-                        if scene_analysis.get("success"):
-                            scene_data = scene_analysis["scene_analysis"]
-                            
-                            # 使用LLM生成更详细的场景描述
-                            if scene_data.get("frames"):
-                                frame_analyses = [frame["analysis"] for frame in scene_data["frames"]]
-                                scene_context = {
-                                    "scene_id": scene_id,
-                                    "duration": scene.get("duration", 0)
-                                }
-                                enhanced_description = self.llm_service.generate_scene_description(
-                                    frame_analyses, scene_context
-                                )
-                                scene_data["enhanced_description"] = enhanced_description
-                            
-                            analysis_results["scenes"].append(scene_data)
-                        else:
-                            self.logger.error(f"Scene {scene_id} analysis failed: {scene_analysis.get('error')}")
-            
             # 保存分析结果
-            analysis_file = os.path.join(project_dir, "frame_analysis.json")
             with open(analysis_file, 'w', encoding='utf-8') as f:
                 json.dump(analysis_results, f, ensure_ascii=False, indent=2)
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
             
             self.logger.info(f"Frame analysis completed for {len(analysis_results['scenes'])} scenes")
             
@@ -206,7 +208,74 @@ class VideoProcessingHandler:
                 "message": "视频帧分析失败"
             }
     
-    def generate_storyboard_from_analysis(self, project_name, analysis_data=None, transcription_data=None):
+    def _load_completed_scene_analyses(self, analysis_file, partial_file):
+        """读取已完成的场景分析（完整结果文件 + 中断时留下的部分结果）"""
+        completed = {}
+        if os.path.exists(analysis_file):
+            try:
+                with open(analysis_file, 'r', encoding='utf-8') as f:
+                    for scene in json.load(f).get("scenes", []):
+                        completed[scene.get("scene_id", 0)] = scene
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable frame analysis file: {e}")
+        if os.path.exists(partial_file):
+            with open(partial_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        scene = json.loads(line)
+                    except ValueError:
+                        # 中断时最后一行可能不完整
+                        continue
+                    completed[scene.get("scene_id", 0)] = scene
+        return completed
+    
+    def _analyze_scene(self, scene, keyframes_dir, force=False):
+        """分析单个场景的关键帧，失败时返回None"""
+        scene_id = scene.get("scene_id", 0)
+        keyframes = scene.get("keyframes", [])
+        if not keyframes:
+            return None
+        
+        self.logger.info(f"Analyzing {len(keyframes)} keyframes for scene {scene_id}")
+        
+        # 构建关键帧文件路径
+        frame_paths = []
+        for frame_info in keyframes:
+            frame_filename = frame_info.get("filename")
+            if frame_filename:
+                frame_path = os.path.join(keyframes_dir, frame_filename)
+                if os.path.exists(frame_path):
+                    frame_paths.append(frame_path)
+        if not frame_paths:
+            return None
+        
+        try:
+            # 分析场景帧
+            scene_analysis = self.frame_analyzer.analyze_scene_frames(frame_paths, scene_id)
+            if not scene_analysis.get("success"):
+                self.logger.error(f"Scene {scene_id} analysis failed: {scene_analysis.get('error')}")
+                return None
+            
+            result = scene_analysis["scene_analysis"]
+            
+            # 批量分析已在同一请求中返回场景描述，否则再用LLM生成更详细的场景描述
+            if result.get("scene_description"):
+                result["enhanced_description"] = result.pop("scene_description")
+            elif result.get("frames"):
+                frame_analyses = [frame["analysis"] for frame in result["frames"]]
+                scene_context = {
+                    "scene_id": scene_id,
+                    "duration": scene.get("duration", 0)
+                }
+                result["enhanced_description"] = self.llm_service.generate_scene_description(
+                    frame_analyses, scene_context, force=force
+                )
+            return result
+        except Exception as e:
+            self.logger.error(f"Scene {scene_id} analysis failed: {str(e)}")
+            return None
+    
+    def generate_storyboard_from_analysis(self, project_name, analysis_data=None, transcription_data=None, force=False):
         """
         基于视频分析结果生成分镜脚本
         
@@ -214,6 +283,7 @@ class VideoProcessingHandler:
             project_name: 项目名称
             analysis_data: 视频分析数据（可选，如果不提供则从文件读取）
             transcription_data: 音频转录数据（可选）
+            force: 是否重新生成（不复用缓存的LLM响应）
             
         Returns:
             分镜脚本生成结果
@@ -250,7 +320,7 @@ class VideoProcessingHandler:
             
             # 生成分镜脚本
             storyboard_scripts = self.llm_service.generate_storyboard_script(
-                scene_descriptions, audio_text
+                scene_descriptions, audio_text, force=force
             )
             
             # 构建完整的分镜数据
@@ -551,9 +621,10 @@ def analyze_video_frames():
         
         # 可选参数
         scene_data = data.get('sceneData')  # 场景数据
+        force = bool(data.get('force', False))  # 忽略已有结果重新分析
         
         handler = VideoProcessingHandler()
-        result = handler.analyze_video_frames(project_name, scene_data)
+        result = handler.analyze_video_frames(project_name, scene_data, force)
         
         if result['success']:
             return jsonify(result), 200
@@ -583,10 +654,11 @@ def generate_storyboard_from_video():
         # 可选参数
         analysis_data = data.get('analysisData')  # 视频分析数据
         transcription_data = data.get('transcriptionData')  # 音频转录数据
+        force = bool(data.get('force', False))  # 重新生成，不复用缓存的LLM响应
         
         handler = VideoProcessingHandler()
         result = handler.generate_storyboard_from_analysis(
-            project_name, analysis_data, transcription_data
+            project_name, analysis_data, transcription_data, force
         )
         
         if result['success']:
@@ -0,0 +1,304 @@
+"""
+TTS后端
+统一的批量合成接口 synthesize_batch(lines, voice_profile)，目前提供：
+- EdgeTTSBackend: edge-tts在线服务（单事件循环并发 + 共享短句缓存）
+- LocalTTSBackend: 本地离线引擎（可选依赖 pyttsx3，进程池并行），用于离线环境和测试
+配置项 ttsBackend 选择默认后端（"edge" / "local"）。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from backend.tts.engine import (
+    DEFAULT_PITCH,
+    DEFAULT_RATE,
+    DEFAULT_VOICE,
+    EdgeTTSEngine,
+    TTSJob,
+    TTSMetrics,
+)
+from backend.tts.phrase_cache import get_tts_cache
+
+# edge-tts语音与性别的对应关系
+EDGE_VOICE_MAP = {
+    "female": "zh-CN-XiaoxiaoNeural",
+    "male": "zh-CN-YunxiNeural",
+    "default": DEFAULT_VOICE,
+}
+
+# pyttsx3默认语速（词/分钟）
+LOCAL_BASE_RATE = 200
+
+
+@dataclass
+class TTSLine:
+    """待合成的一行文本"""
+
+    index: int
+    text: str
+    audio_path: str
+    timing_path: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class VoiceProfile:
+    """与具体后端无关的音色参数"""
+
+    gender: str = "female"
+    voice: Optional[str] = None  # edge-tts语音名称，为空时按性别选择
+    rate: str = DEFAULT_RATE  # 相对语速，如 "+35%"
+    pitch: str = DEFAULT_PITCH  # 相对音调，如 "+0Hz"
+    local_voice: Optional[str] = None  # 本地引擎的语音ID
+
+    @property
+    def edge_voice(self) -> str:
+        return self.voice or EDGE_VOICE_MAP.get(self.gender, EDGE_VOICE_MAP["default"])
+
+    @property
+    def rate_percent(self) -> int:
+        try:
+            return int(str(self.rate).strip().rstrip("%"))
+        except ValueError:
+            return 0
+
+
+def _normalize_gender(value: Any) -> str:
+    text = str(value or "").strip().lower()
+    if text in ("male", "man", "m", "男", "男性", "男声"):
+        return "male"
+    if text in ("female", "woman", "f", "女", "女性", "女声"):
+        return "female"
+    return "female"
+
+
+def voice_profile_from_dict(data: Optional[Dict[str, Any]]) -> VoiceProfile:
+    """
+    将角色音色配置映射为 VoiceProfile
+
+    兼容 ProjectFileManager.load_character_voice_profile 的返回结构
+    （{"voiceProfile": {...}}）以及前端的 voiceSettings。
+    """
+    if not data:
+        return VoiceProfile()
+    if isinstance(data.get("voiceProfile"), dict):
+        data = data["voiceProfile"]
+    settings = data.get("voiceSettings") if isinstance(data.get("voiceSettings"), dict) else data
+
+    return VoiceProfile(
+        gender=_normalize_gender(settings.get("gender") or settings.get("性别")),
+        voice=settings.get("edgeVoice") or settings.get("voice"),
+        rate=settings.get("rate") or DEFAULT_RATE,
+        pitch=settings.get("pitch") or DEFAULT_PITCH,
+        local_voice=settings.get("localVoice"),
+    )
+
+
+class TTSBackend:
+    """TTS后端接口"""
+
+    name = ""
+
+    async def synthesize_batch_async(self, lines: List[TTSLine], voice_profile: VoiceProfile) -> Dict:
+        raise NotImplementedError
+
+    def synthesize_batch(self, lines: List[TTSLine], voice_profile: VoiceProfile) -> Dict:
+        """
+        批量合成
+
+        :return: {"results": 每行状态（按index排序）, "metrics": 吞吐统计}
+        """
+        return asyncio.run(self.synthesize_batch_async(lines, voice_profile))
+
+    def synthesis_params(self, voice_profile: VoiceProfile) -> Dict[str, str]:
+        """用于缓存/清单哈希的合成参数"""
+        raise NotImplementedError
+
+
+class EdgeTTSBackend(TTSBackend):
+    """edge-tts在线合成"""
+
+    name = "edge"
+
+    def __init__(self, concurrency: int = 8, max_retries: int = 3, use_cache: bool = True):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.use_cache = use_cache
+
+    def synthesis_params(self, voice_profile: VoiceProfile) -> Dict[str, str]:
+        return {
+            "voice": voice_profile.edge_voice,
+            "rate": voice_profile.rate,
+            "pitch": voice_profile.pitch,
+        }
+
+    async def synthesize_batch_async(self, lines: List[TTSLine], voice_profile: VoiceProfile) -> Dict:
+        params = self.synthesis_params(voice_profile)
+        jobs = [
+            TTSJob(
+                index=line.index,
+                text=line.text,
+                audio_path=line.audio_path,
+                timing_path=line.timing_path,
+                **params,
+            )
+            for line in lines
+        ]
+        engine = EdgeTTSEngine(
+            concurrency=self.concurrency,
+            max_retries=self.max_retries,
+            cache=get_tts_cache() if self.use_cache else None,
+        )
+        return await engine.synthesize_all(jobs)
+
+
+# 每个工作进程内复用的pyttsx3引擎
+_local_engine = None
+
+
+def _local_synthesize(text: str, audio_path: str, timing_path: Optional[str], voice_id: Optional[str], rate: int) -> float:
+    """在工作进程中合成一行文本，返回耗时（秒）"""
+    global _local_engine
+    import pyttsx3
+
+    from backend.util.ffmpeg import run_ffmpeg
+
+    started = time.perf_counter()
+    if _local_engine is None:
+        _local_engine = pyttsx3.init()
+    _local_engine.setProperty("rate", rate)
+    if voice_id:
+        _local_engine.setProperty("voice", voice_id)
+
+    fd, wav_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    # 目标可能是共享缓存的硬链接，不能原地覆盖
+    for path in (audio_path, timing_path):
+        if path and os.path.exists(path):
+            os.remove(path)
+    try:
+        _local_engine.save_to_file(text, wav_path)
+        _local_engine.runAndWait()
+        if audio_path.lower().endswith(".wav"):
+            os.replace(wav_path, audio_path)
+        else:
+            # 统一转码为目标格式，与edge-tts产物保持一致
+            run_ffmpeg(["-i", wav_path, audio_path])
+    finally:
+        if os.path.exists(wav_path):
+            os.remove(wav_path)
+
+    if timing_path:
+        # 本地引擎没有逐词时间戳，字幕按整段文本覆盖片段时长
+        with open(timing_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "words": []}, f, ensure_ascii=False)
+    return time.perf_counter() - started
+
+
+class LocalTTSBackend(TTSBackend):
+    """本地离线合成（pyttsx3），每行在独立的工作进程中合成"""
+
+    name = "local"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def is_available() -> bool:
+        try:
+            import pyttsx3  # noqa: F401
+
+            return True
+        except ImportError:
+            return False
+
+    def synthesis_params(self, voice_profile: VoiceProfile) -> Dict[str, str]:
+        return {
+            "voice": f"local:{voice_profile.local_voice or voice_profile.gender}",
+            "rate": voice_profile.rate,
+            "pitch": DEFAULT_PITCH,
+        }
+
+    async def synthesize_batch_async(self, lines: List[TTSLine], voice_profile: VoiceProfile) -> Dict:
+        if not self.is_available():
+            raise RuntimeError("本地TTS后端需要安装可选依赖 pyttsx3（pip install pyttsx3）")
+
+        rate = max(50, int(LOCAL_BASE_RATE * (1 + voice_profile.rate_percent / 100)))
+        metrics = TTSMetrics(total=len(lines))
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                loop.run_in_executor(
+                    executor,
+                    _local_synthesize,
+                    line.text,
+                    line.audio_path,
+                    line.timing_path,
+                    voice_profile.local_voice,
+                    rate,
+                )
+                for line in lines
+            ]
+            outcomes = await asyncio.gather(*futures, return_exceptions=True)
+
+        results = []
+        for line, outcome in zip(lines, outcomes):
+            if isinstance(outcome, Exception):
+                metrics.failed += 1
+                self.logger.error(f"Local TTS line {line.index} failed: {outcome}")
+                results.append(
+                    {
+                        "index": line.index,
+                        "status": "failed",
+                        "attempts": 1,
+                        "audio_path": line.audio_path,
+                        "error": str(outcome),
+                    }
+                )
+            else:
+                metrics.succeeded += 1
+                metrics.characters += len(line.text)
+                metrics.latencies.append(outcome)
+                results.append(
+                    {
+                        "index": line.index,
+                        "status": "success",
+                        "attempts": 1,
+                        "cached": False,
+                        "audio_path": line.audio_path,
+                        "latency_seconds": round(outcome, 3),
+                    }
+                )
+        metrics.peak_in_flight = min(self.max_workers, len(lines))
+        metrics.elapsed_seconds = time.perf_counter() - started
+        results.sort(key=lambda r: r["index"])
+        return {"results": results, "metrics": metrics.to_dict()}
+
+
+def get_tts_backend(name: Optional[str] = None) -> TTSBackend:
+    """
+    获取TTS后端
+
+    :param name: 后端名称，为空时读取配置项 ttsBackend（默认 edge）
+    """
+    if not name:
+        from backend.util.file import get_config
+
+        name = (get_config() or {}).get("ttsBackend") or EdgeTTSBackend.name
+    name = str(name).lower()
+    if name == LocalTTSBackend.name:
+        if not LocalTTSBackend.is_available():
+            raise RuntimeError("本地TTS后端需要安装可选依赖 pyttsx3（pip install pyttsx3）")
+        return LocalTTSBackend()
+    if name == EdgeTTSBackend.name:
+        return EdgeTTSBackend()
+    raise ValueError(f"未知的TTS后端: {name}")
@@ -0,0 +1,277 @@
+"""
+多角色台词渲染
+解析带说话人标记的台词，按角色音色并发合成，
+再把各句的MP3帧按顺序送入同一个解码进程，PCM流式写入单个WAV，句间停顿精确到采样点。
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import re
+import shutil
+import tempfile
+import wave
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from backend.tts.backends import TTSBackend, TTSLine, VoiceProfile, get_tts_backend, voice_profile_from_dict
+from backend.util.ffmpeg import decode_pcm_stream
+from backend.util.mp3 import mp3_frames
+from backend.util.project_file_manager import ProjectFileManager
+
+# 说话人标记：[角色] 台词 / 【角色】台词 / 角色：台词（允许**加粗**）
+_BRACKET_SPEAKER = re.compile(r"^[\[【]\s*([^\]】]{1,20}?)\s*[\]】]\s*[：:]?\s*(.+)$")
+_COLON_SPEAKER = re.compile(r"^\**\s*([^：:\s*][^：:]{0,19}?)\s*\**\s*[：:]\s*\**\s*(.+)$")
+# 台词中的舞台提示，如（低声）(笑)
+_STAGE_DIRECTION = re.compile(r"[（(][^）)]*[）)]")
+_LIST_PREFIX = re.compile(r"^\s*(?:[-*•>]+|\d+[.、)）])\s*")
+_QUOTES = "\"'“”‘’「」『』"
+# "xx：" 形式的标签中不是说话人的常见说明项（未提供角色列表时使用）
+_NON_SPEAKER_LABELS = (
+    "语调", "语气", "语速", "情绪", "情感", "表情", "神态", "动作", "场景", "镜头", "画面", "景别",
+    "音效", "背景", "配乐", "环境", "氛围", "时间", "地点", "注", "备注", "说明", "提示",
+)
+
+
+@dataclass
+class DialogueLine:
+    """一句台词"""
+
+    index: int
+    speaker: str
+    text: str
+
+
+def parse_dialogue(text: str, known_speakers: Optional[List[str]] = None) -> List[DialogueLine]:
+    """
+    解析带说话人标记的台词
+
+    :param text: 台词文本，每行一句
+    :param known_speakers: 已知角色名，提供时只保留这些角色的台词（过滤"语调：xxx"等说明行）
+    :return: 台词列表
+    """
+    known = set(known_speakers or [])
+    lines = []
+    for raw in (text or "").splitlines():
+        line = _LIST_PREFIX.sub("", raw.strip())
+        if not line or line.startswith("#"):
+            continue
+        match = _BRACKET_SPEAKER.match(line)
+        explicit = match is not None
+        match = match or _COLON_SPEAKER.match(line)
+        if not match:
+            continue
+        speaker = match.group(1).strip("* ")
+        content = _STAGE_DIRECTION.sub("", match.group(2)).strip().strip("*").strip(_QUOTES).strip()
+        if not speaker or not content:
+            continue
+        if known:
+            if speaker not in known:
+                continue
+        elif not explicit and speaker.startswith(_NON_SPEAKER_LABELS):
+            # 没有角色列表时，"语调：xxx" 这类说明行不当作台词
+            continue
+        lines.append(DialogueLine(index=len(lines), speaker=speaker, text=content))
+    return lines
+
+
+class _PCMReader:
+    """从PCM数据块流中按字节数读取"""
+
+    def __init__(self, blocks: Iterator[bytes]):
+        self._blocks = blocks
+        self._buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self._buffer.extend(block)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read_rest(self) -> bytes:
+        for block in self._blocks:
+            self._buffer.extend(block)
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class DialogueRenderer:
+    """
+    场景台词渲染器
+
+    - 每个角色一个音色，不同角色的台词并发提交给TTS后端
+    - 合成结果按台词顺序拼成一条MP3帧流，由单个ffmpeg进程解码，PCM直接写入同一个WAV文件
+    - 各句的采样边界由MP3帧头计算，无需逐句解码
+    """
+
+    def __init__(
+        self,
+        project_name: str,
+        backend: Optional[TTSBackend] = None,
+        sample_rate: int = 24000,
+        channels: int = 1,
+    ):
+        self.project_name = project_name
+        self.backend = backend or get_tts_backend()
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.file_manager = ProjectFileManager()
+        self.logger = logging.getLogger(__name__)
+
+    def resolve_voice(self, speaker: str, voice_profiles: Optional[Dict[str, Dict]] = None) -> VoiceProfile:
+        """角色音色：请求中提供的配置优先，其次为项目中保存的角色音色配置"""
+        if voice_profiles and speaker in voice_profiles:
+            return voice_profile_from_dict(voice_profiles[speaker])
+        saved = self.file_manager.load_character_voice_profile(self.project_name, speaker)
+        saved_voice = (saved or {}).get("voiceProfile")
+        return voice_profile_from_dict(saved_voice if isinstance(saved_voice, dict) else None)
+
+    async def _synthesize(self, lines: List[DialogueLine], voices: Dict[str, VoiceProfile], work_dir: str) -> Dict[int, Dict]:
+        """按角色分组并发合成，返回 台词序号 -> 合成结果"""
+        groups: Dict[str, List[TTSLine]] = {}
+        for line in lines:
+            groups.setdefault(line.speaker, []).append(
+                TTSLine(
+                    index=line.index,
+                    text=line.text,
+                    audio_path=os.path.join(work_dir, f"{line.index}.mp3"),
+                )
+            )
+        reports = await asyncio.gather(
+            *(
+                self.backend.synthesize_batch_async(group, voices[speaker])
+                for speaker, group in groups.items()
+            )
+        )
+        results = {}
+        for report in reports:
+            for result in report["results"]:
+                results[result["index"]] = result
+        return results
+
+    def render(
+        self,
+        lines: List[DialogueLine],
+        output_path: str,
+        gap: float = 0.35,
+        voice_profiles: Optional[Dict[str, Dict]] = None,
+    ) -> Dict:
+        """
+        渲染场景台词音轨
+
+        Args:
+            lines: 台词列表
+            output_path: 输出WAV路径
+            gap: 句间停顿（秒）
+            voice_profiles: 角色名 -> 音色配置（可选）
+
+        Returns:
+            {"success", "outputPath", "duration", "timeline", "failed", "error"}
+        """
+        if not lines:
+            return {"success": False, "error": "没有可渲染的台词"}
+
+        voices = {line.speaker: self.resolve_voice(line.speaker, voice_profiles) for line in lines}
+        gap_frames = max(0, int(round(gap * self.sample_rate)))
+        bytes_per_frame = 2 * self.channels
+        silence = b"\x00" * (gap_frames * bytes_per_frame)
+
+        work_dir = tempfile.mkdtemp(prefix="dialogue_")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp_output = output_path + ".tmp"
+        try:
+            results = asyncio.run(self._synthesize(lines, voices, work_dir))
+
+            timeline = []
+            failed = []
+            decodable = []
+            for line in lines:
+                result = results.get(line.index)
+                if not result or result["status"] != "success":
+                    failed.append({"index": line.index, "speaker": line.speaker, "error": (result or {}).get("error")})
+                    continue
+                with open(result["audio_path"], "rb") as f:
+                    data = f.read()
+                frames = mp3_frames(data)
+                if not frames:
+                    failed.append({"index": line.index, "speaker": line.speaker, "error": "无法解析合成的音频"})
+                    continue
+                decodable.append((line, data, frames))
+
+            written_frames = 0
+            with wave.open(tmp_output, "wb") as wav:
+                wav.setnchannels(self.channels)
+                wav.setsampwidth(2)
+                wav.setframerate(self.sample_rate)
+
+                # 采样率/声道一致的连续台词共用一个解码进程（同一后端通常只有一组）
+                for (source_rate, _), group in itertools.groupby(decodable, key=lambda item: item[2][0].stream_format):
+                    group = list(group)
+                    chunks = (
+                        data[frame.offset:frame.offset + frame.length]
+                        for _, data, frames in group
+                        for frame in frames
+                    )
+                    reader = _PCMReader(decode_pcm_stream(chunks, "mp3", self.sample_rate, self.channels))
+                    source_samples = 0
+                    boundary = 0
+                    for position, (line, _, frames) in enumerate(group):
+                        # 按累计采样数换算边界，重采样时误差不会逐句累积
+                        source_samples += sum(frame.samples for frame in frames)
+                        end = round(source_samples * self.sample_rate / source_rate)
+                        pcm = reader.read((end - boundary) * bytes_per_frame)
+                        boundary = end
+                        if position == len(group) - 1:
+                            # 解码器实际输出与计算值的差异归入最后一句
+                            pcm += reader.read_rest()
+                        frame_count = len(pcm) // bytes_per_frame
+                        if timeline and gap_frames:
+                            wav.writeframes(silence)
+                            written_frames += gap_frames
+                        wav.writeframes(pcm[: frame_count * bytes_per_frame])
+                        timeline.append(
+                            {
+                                "index": line.index,
+                                "speaker": line.speaker,
+                                "text": line.text,
+                                "startSample": written_frames,
+                                "endSample": written_frames + frame_count,
+                                "start": written_frames / self.sample_rate,
+                                "end": (written_frames + frame_count) / self.sample_rate,
+                            }
+                        )
+                        written_frames += frame_count
+
+            if not timeline:
+                os.remove(tmp_output)
+                return {"success": False, "error": "所有台词合成失败", "failed": failed}
+
+            os.replace(tmp_output, output_path)
+            self.logger.info(
+                f"台词音轨渲染完成: {output_path}, {len(timeline)} 句, {written_frames / self.sample_rate:.2f}s"
+            )
+            return {
+                "success": True,
+                "outputPath": output_path,
+                "duration": written_frames / self.sample_rate,
+                "sampleRate": self.sample_rate,
+                "timeline": timeline,
+                "failed": failed,
+                "voices": {
+                    speaker: self.backend.synthesis_params(profile)
+                    for speaker, profile in voices.items()
+                },
+            }
+        except Exception as e:
+            self.logger.error(f"台词音轨渲染失败: {e}")
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+            return {"success": False, "error": str(e)}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -1,10 +1,10 @@
 import asyncio
 import os
-import shutil
-from concurrent.futures import ThreadPoolExecutor
-
-import edge_tts
 
+from backend.tts.backends import TTSLine, VoiceProfile, get_tts_backend
+from backend.tts.engine import EdgeTTSEngine, TTSJob
+from backend.tts.manifest import AudioManifest, synthesis_hash
+from backend.tts.phrase_cache import get_tts_cache
 from backend.util.constant import audio_dir, novel_fragments_dir
 from backend.util.file import read_lines_from_directory
 
@@ -28,32 +28,77 @@ from backend.util.file import read_lines_from_directory
 #             print(f"TTS conversion failed for line {i}, error: {e}")
 
 
-async def by_edge_tts():
-    if os.path.exists(audio_dir):
-        shutil.rmtree(audio_dir)
+async def by_edge_tts(force=False, backend=None, voice_profile=None):
+    """
+    将小说片段逐行合成为音频
+
+    所有行在同一个事件循环中并发合成，返回每行的状态和吞吐统计。
+    audio_dir 下的 manifest.json 记录每个片段的合成参数哈希，
+    未变化的片段直接复用，不再属于任何片段的音频会被清理。
+
+    :param force: 忽略清单，全部重新合成
+    :param backend: TTS后端，默认按配置项 ttsBackend 选择
+    :param voice_profile: 音色参数，默认使用旁白音色
+    """
+    backend = backend or get_tts_backend()
+    voice_profile = voice_profile or VoiceProfile()
+    params = backend.synthesis_params(voice_profile)
+
     os.makedirs(audio_dir, exist_ok=True)
     lines, err = read_lines_from_directory(novel_fragments_dir)
     if err:
-        raise "Failed to read fragments"
+        raise RuntimeError(f"Failed to read fragments: {err}")
     if lines is None:
-        print(f"Failed to read novel fragments from {novel_fragments_dir}")
-        return
-
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        for i, line in enumerate(lines):
-            executor.submit(convert_text_to_speech, line, audio_dir, i)
+        raise RuntimeError(f"Failed to read novel fragments from {novel_fragments_dir}")
 
+    manifest = AudioManifest(audio_dir)
+    removed = manifest.collect_garbage(range(len(lines)))
 
-def convert_text_to_speech(line, audio_dir, i):
-    try:
-        # zh-CN-YunxiNeural  YunjianNeural  rate='25%' YunyangNeural
-        communicate = edge_tts.Communicate(
-            text=line, voice="zh-CN-XiaoxiaoNeural", rate="+35%"
+    pending = []
+    skipped = []
+    digests = {}
+    for i, line in enumerate(lines):
+        tts_line = TTSLine(
+            index=i,
+            text=line,
+            audio_path=os.path.join(audio_dir, f"{i}.mp3"),
+            timing_path=os.path.join(audio_dir, f"{i}.json"),
         )
+        digest = synthesis_hash(line, params["voice"], params["rate"], params["pitch"])
+        if not force and manifest.is_current(i, digest):
+            skipped.append({"index": i, "status": "skipped", "attempts": 0, "audio_path": tts_line.audio_path})
+            continue
+        # 先移除旧结果，合成失败时不会残留与文本不符的音频
+        manifest.forget(i)
+        digests[i] = digest
+        pending.append(tts_line)
+
+    report = await backend.synthesize_batch_async(pending, voice_profile)
+
+    for result in report["results"]:
+        index = result["index"]
+        if result["status"] == "success":
+            manifest.record(index, digests[index], lines[index])
+        else:
+            manifest.forget(index)
+    manifest.save()
 
-        full_path = os.path.join(audio_dir, f"{i}.mp3")
-        asyncio.run(communicate.save(full_path))
+    report["results"] = sorted(report["results"] + skipped, key=lambda r: r["index"])
+    report["metrics"]["skipped"] = len(skipped)
+    report["metrics"]["garbage_collected"] = removed
+    report["backend"] = backend.name
+    return report
 
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"An unexpected error occurred for line {i}, error: {e}")
+
+def convert_text_to_speech(line, audio_dir, i):
+    """同步合成单行音频（独立调用时使用，批量合成请使用 by_edge_tts）"""
+    job = TTSJob(
+        index=i,
+        text=line,
+        audio_path=os.path.join(audio_dir, f"{i}.mp3"),
+        timing_path=os.path.join(audio_dir, f"{i}.json"),
+    )
+    report = asyncio.run(
+        EdgeTTSEngine(concurrency=1, cache=get_tts_cache()).synthesize_all([job])
+    )
+    return report["results"][0]
@@ -0,0 +1,225 @@
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import edge_tts
+
+from backend.tts.phrase_cache import link_or_copy
+
+# edge-tts的时间单位为100纳秒
+TICKS_PER_SECOND = 10_000_000
+
+DEFAULT_VOICE = "zh-CN-XiaoxiaoNeural"
+DEFAULT_RATE = "+35%"
+DEFAULT_PITCH = "+0Hz"
+
+
+@dataclass
+class TTSJob:
+    """单条合成任务"""
+
+    index: int
+    text: str
+    audio_path: str
+    timing_path: Optional[str] = None
+    voice: str = DEFAULT_VOICE
+    rate: str = DEFAULT_RATE
+    pitch: str = DEFAULT_PITCH
+
+
+@dataclass
+class TTSMetrics:
+    """合成吞吐统计"""
+
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    characters: int = 0
+    elapsed_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    peak_in_flight: int = 0
+
+    def to_dict(self) -> Dict:
+        elapsed = self.elapsed_seconds or 1e-9
+        latencies = sorted(self.latencies)
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "characters": self.characters,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "lines_per_second": round(self.succeeded / elapsed, 3),
+            "chars_per_second": round(self.characters / elapsed, 3),
+            "avg_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_latency_seconds": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else 0.0,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+
+async def save_with_word_timings(communicate, audio_path, timing_path, text):
+    """
+    合成音频并记录WordBoundary逐词时间戳
+
+    音频写入audio_path，时间戳以 {"text": 原文, "words": [{"start", "end", "text"}]}
+    写入timing_path，用于生成字幕。
+    """
+    words = []
+    with open(audio_path, "wb") as audio_file:
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio_file.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                start = chunk["offset"] / TICKS_PER_SECOND
+                words.append(
+                    {
+                        "start": start,
+                        "end": start + chunk["duration"] / TICKS_PER_SECOND,
+                        "text": chunk["text"],
+                    }
+                )
+    if timing_path:
+        with open(timing_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "words": words}, f, ensure_ascii=False)
+    return words
+
+
+class EdgeTTSEngine:
+    """
+    单事件循环的edge-tts合成引擎
+
+    - 所有任务运行在调用方的同一个事件循环中
+    - asyncio.Semaphore限制同时在途的请求数
+    - 失败按指数退避重试
+    - 返回每条任务的状态以及吞吐统计
+    - 可选的短句缓存（TTSPhraseCache），命中时直接链接缓存文件
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        cache=None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.cache = cache
+        self.logger = logging.getLogger(__name__)
+
+    async def _synthesize(self, job: TTSJob):
+        communicate = edge_tts.Communicate(
+            text=job.text, voice=job.voice, rate=job.rate, pitch=job.pitch
+        )
+        await save_with_word_timings(communicate, job.audio_path, job.timing_path, job.text)
+
+    async def _synthesize_cached(self, job: TTSJob) -> bool:
+        """
+        通过短句缓存合成，返回是否命中缓存
+
+        未命中时先合成到缓存的临时文件，提交后再链接到任务路径，
+        保证任务路径上的文件永远不会被原地写入（避免破坏共享的硬链接）。
+        """
+        key = self.cache.make_key(job.text, job.voice, job.rate, job.pitch)
+        hit = self.cache.lookup(key, need_timings=bool(job.timing_path))
+        if hit is None:
+            tmp_audio, tmp_timing = self.cache.reserve(key)
+            communicate = edge_tts.Communicate(
+                text=job.text, voice=job.voice, rate=job.rate, pitch=job.pitch
+            )
+            try:
+                await save_with_word_timings(communicate, tmp_audio, tmp_timing, job.text)
+                cached_audio, cached_timing = self.cache.commit(key, tmp_audio, tmp_timing)
+            except Exception:
+                self.cache.discard(tmp_audio, tmp_timing)
+                raise
+            cache_hit = False
+        else:
+            cached_audio, cached_timing = hit
+            cache_hit = True
+
+        link_or_copy(cached_audio, job.audio_path)
+        if job.timing_path and cached_timing:
+            link_or_copy(cached_timing, job.timing_path)
+        return cache_hit
+
+    async def _run_job(self, job: TTSJob, semaphore: asyncio.Semaphore, metrics: TTSMetrics, in_flight: List[int]) -> Dict:
+        attempts = 0
+        last_error = None
+        async with semaphore:
+            in_flight[0] += 1
+            metrics.peak_in_flight = max(metrics.peak_in_flight, in_flight[0])
+            started = time.perf_counter()
+            try:
+                while attempts <= self.max_retries:
+                    attempts += 1
+                    try:
+                        cache_hit = False
+                        if self.cache is not None:
+                            cache_hit = await self._synthesize_cached(job)
+                        else:
+                            await self._synthesize(job)
+                        if cache_hit:
+                            metrics.cache_hits += 1
+                        latency = time.perf_counter() - started
+                        metrics.succeeded += 1
+                        metrics.characters += len(job.text)
+                        metrics.latencies.append(latency)
+                        return {
+                            "index": job.index,
+                            "status": "success",
+                            "attempts": attempts,
+                            "cached": cache_hit,
+                            "audio_path": job.audio_path,
+                            "latency_seconds": round(latency, 3),
+                        }
+                    except Exception as e:
+                        last_error = e
+                        if attempts > self.max_retries:
+                            break
+                        metrics.retries += 1
+                        delay = self.backoff_base * (2 ** (attempts - 1))
+                        self.logger.warning(
+                            f"TTS line {job.index} failed (attempt {attempts}), retry in {delay:.1f}s: {e}"
+                        )
+                        await asyncio.sleep(delay)
+            finally:
+                in_flight[0] -= 1
+
+        metrics.failed += 1
+        self.logger.error(f"TTS line {job.index} failed after {attempts} attempts: {last_error}")
+        return {
+            "index": job.index,
+            "status": "failed",
+            "attempts": attempts,
+            "audio_path": job.audio_path,
+            "error": str(last_error),
+        }
+
+    async def synthesize_all(self, jobs: List[TTSJob]) -> Dict:
+        """
+        并发合成所有任务
+
+        :return: {"results": 按index排序的每条状态, "metrics": 吞吐统计}
+        """
+        metrics = TTSMetrics(total=len(jobs))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        in_flight = [0]
+        started = time.perf_counter()
+        with self.cache.run() if self.cache is not None else contextlib.nullcontext():
+            results = await asyncio.gather(
+                *(self._run_job(job, semaphore, metrics, in_flight) for job in jobs)
+            )
+        metrics.elapsed_seconds = time.perf_counter() - started
+        results = sorted(results, key=lambda r: r["index"])
+        summary = metrics.to_dict()
+        self.logger.info(f"TTS finished: {summary}")
+        return {"results": results, "metrics": summary}
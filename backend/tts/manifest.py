@@ -0,0 +1,92 @@
+"""
+音频目录清单
+记录每个片段音频对应的合成参数哈希，只有文本或语音参数变化的片段才需要重新合成。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 片段音频及其时间戳文件名：{i}.mp3 / {i}.json
+_FRAGMENT_FILE = re.compile(r"^(\d+)\.(mp3|json)$")
+
+
+def synthesis_hash(text: str, voice: str, rate: str, pitch: str) -> str:
+    """合成参数哈希"""
+    payload = json.dumps([text, voice, rate, pitch], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioManifest:
+    """audio_dir 下的 manifest.json 读写"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return {}
+            return data.get("entries", {})
+        except Exception as e:
+            self.logger.warning(f"read audio manifest failed, rebuilding: {e}")
+            return {}
+
+    def is_current(self, index: int, digest: str) -> bool:
+        """片段音频存在且哈希一致"""
+        entry = self.entries.get(str(index))
+        return (
+            entry is not None
+            and entry.get("hash") == digest
+            and os.path.exists(os.path.join(self.directory, f"{index}.mp3"))
+        )
+
+    def record(self, index: int, digest: str, text: str):
+        self.entries[str(index)] = {"hash": digest, "chars": len(text)}
+
+    def forget(self, index: int):
+        self.entries.pop(str(index), None)
+        self.remove_fragment_files(index)
+
+    def remove_fragment_files(self, index: int):
+        for ext in ("mp3", "json"):
+            path = os.path.join(self.directory, f"{index}.{ext}")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def collect_garbage(self, live_indexes: Iterable[int]) -> int:
+        """删除不属于当前片段的音频与时间戳文件，返回删除的文件数"""
+        live = {str(i) for i in live_indexes}
+        removed = 0
+        for key in list(self.entries):
+            if key not in live:
+                del self.entries[key]
+        for name in os.listdir(self.directory):
+            match = _FRAGMENT_FILE.match(name)
+            if match and match.group(1) not in live:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "entries": self.entries},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.path)
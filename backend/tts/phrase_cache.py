@@ -0,0 +1,90 @@
+"""
+跨项目共享的TTS短句缓存
+以 (文本, 语音, 语速, 音调) 为键缓存合成结果，命中时硬链接到项目音频目录，
+相同的台词在任何项目、任何入口都只合成一次。
+"""
+
+import logging
+import os
+import shutil
+import threading
+from typing import Optional, Tuple
+
+from backend.util.constant import base_dir
+from backend.util.file_cache import FileCache
+
+TTS_CACHE_DIR = os.path.join(base_dir, ".cache", "tts")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 缓存格式版本，修改合成结果格式时递增
+CACHE_VERSION = 1
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def link_or_copy(src_path: str, dest_path: str):
+    """硬链接到目标路径，跨设备等无法链接时退化为复制"""
+    if os.path.exists(dest_path):
+        # 必须先删除：原地写入会破坏与缓存共享的inode
+        os.remove(dest_path)
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    try:
+        os.link(src_path, dest_path)
+    except OSError:
+        shutil.copyfile(src_path, dest_path)
+
+
+class TTSPhraseCache:
+    """TTS合成结果缓存，mp3与逐词时间戳分别作为两个缓存条目"""
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache = FileCache(cache_dir, max_bytes=max_bytes)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def make_key(text: str, voice: str, rate: str, pitch: str) -> str:
+        return FileCache.make_key("edge_tts", CACHE_VERSION, text, voice, rate, pitch)
+
+    def lookup(self, key: str, need_timings: bool = True) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        查找缓存
+
+        :return: (mp3路径, 时间戳路径或None)，未命中返回None
+        """
+        audio_path = self.cache.get(key, ".mp3")
+        if not audio_path:
+            return None
+        timing_path = self.cache.get(key, ".json")
+        if need_timings and not timing_path:
+            return None
+        return audio_path, timing_path
+
+    def reserve(self, key: str) -> Tuple[str, str]:
+        """获取写入合成结果用的临时路径 (mp3, 时间戳)"""
+        return self.cache.tmp_path(key, ".mp3"), self.cache.tmp_path(key, ".json")
+
+    def commit(self, key: str, tmp_audio: str, tmp_timing: Optional[str]) -> Tuple[str, Optional[str]]:
+        """提交合成结果，返回缓存中的 (mp3路径, 时间戳路径)"""
+        timing_path = None
+        if tmp_timing and os.path.exists(tmp_timing):
+            timing_path = self.cache.commit(tmp_timing, key, ".json")
+        audio_path = self.cache.commit(tmp_audio, key, ".mp3")
+        return audio_path, timing_path
+
+    def run(self):
+        """一批合成的作用域：淘汰推迟到结束后执行，本批用到的条目不会被淘汰"""
+        return self.cache.run()
+
+    def discard(self, *tmp_paths):
+        for path in tmp_paths:
+            self.cache.discard(path)
+
+
+def get_tts_cache() -> TTSPhraseCache:
+    """进程内共享的TTS缓存实例"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TTSPhraseCache()
+        return _shared_cache
@@ -8,8 +8,12 @@ from backend.tts.edge_tts import by_edge_tts
 
 def generate_audio_files():
     try:
-        asyncio.run(by_edge_tts())
-        return jsonify("suc"), 200
+        report = asyncio.run(by_edge_tts())
+        # 未变化而跳过的台词不算失败
+        failed = [r for r in report["results"] if r["status"] == "failed"]
+        if failed:
+            logging.warning(f"generate_audio_files: {len(failed)} lines failed")
+        return jsonify({"success": not failed, **report}), 200
     except Exception as e:
         logging.error(f"generate_audio_files error: {e}")
         return jsonify(f"failed {e}"), 500
@@ -0,0 +1,85 @@
+"""
+配置服务
+config.json 解析后缓存在内存中，调用方拿到的是可修改、可序列化的深拷贝。
+每次读取只比较文件的修改时间和大小，文件变化或通过 update 保存后才重新解析。
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from backend.util.constant import config_path
+
+DEFAULT_CONFIG = {
+    "address1": "",
+    "address2": "",
+    "address3": "",
+    "address3Type": "",
+    "comfyuiNodeApi": "",
+}
+
+
+class ConfigService:
+    """线程安全的配置缓存"""
+
+    def __init__(self, path: str = config_path, defaults: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.defaults = dict(defaults if defaults is not None else DEFAULT_CONFIG)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._raw: Dict[str, Any] = {}
+        self._signature = None
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _ensure_file(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(self.defaults, file)
+
+    def _reload_locked(self):
+        self._ensure_file()
+        signature = self._file_signature()
+        with open(self.path, "r", encoding="utf-8") as file:
+            raw = json.load(file)
+        self._raw = raw
+        self._signature = signature
+
+    def as_dict(self) -> Dict[str, Any]:
+        """获取配置的深拷贝（文件变化时自动重新加载），调用方可以自由修改和序列化"""
+        with self._lock:
+            if self._signature is None or self._file_signature() != self._signature:
+                self._reload_locked()
+            return copy.deepcopy(self._raw)
+
+    def update(self, key: str, value: Any):
+        """修改单个配置项并写回文件"""
+        with self._lock:
+            self._reload_locked()
+            raw = copy.deepcopy(self._raw)
+            raw[key] = value
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(raw, file, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.path)
+            self._reload_locked()
+
+    def invalidate(self):
+        """丢弃缓存，下次读取时重新解析"""
+        with self._lock:
+            self._signature = None
+
+
+_service = ConfigService()
+
+
+def get_config_service() -> ConfigService:
+    return _service
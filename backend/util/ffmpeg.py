@@ -0,0 +1,151 @@
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+
+
+def get_ffmpeg_binary():
+    """获取ffmpeg可执行文件路径，优先使用moviepy配置的ffmpeg"""
+    try:
+        from moviepy.config import get_setting
+
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
+
+
+def run_ffmpeg(args):
+    """
+    执行ffmpeg命令
+
+    :param args: ffmpeg参数列表（不包含可执行文件本身）
+    :return: subprocess.CompletedProcess
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", *args]
+    logging.debug(f"run ffmpeg: {cmd}")
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg执行失败: {stderr}")
+    return result
+
+
+def concat_videos(video_paths, output_path):
+    """
+    使用concat demuxer无损拼接视频（不重新编码）
+
+    所有输入必须具有相同的编码参数（分辨率、帧率、编码器、音轨布局）。
+
+    :param video_paths: 待拼接的视频文件路径列表
+    :param output_path: 输出文件路径
+    :return: 输出文件路径
+    """
+    if not video_paths:
+        raise ValueError("没有可拼接的视频片段")
+
+    output_dir = os.path.dirname(output_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # concat列表文件中单引号需要转义
+    fd, list_file = tempfile.mkstemp(suffix=".txt", dir=output_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for path in video_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        run_ffmpeg(
+            [
+                "-f", "concat",
+                "-safe", "0",
+                "-i", list_file,
+                "-c", "copy",
+                "-movflags", "+faststart",
+                output_path,
+            ]
+        )
+    finally:
+        if os.path.exists(list_file):
+            os.remove(list_file)
+
+    return output_path
+
+
+def decode_audio_pcm(audio_path, sample_rate=24000, channels=1):
+    """
+    将音频解码为16位小端PCM数据
+
+    :param audio_path: 音频文件路径
+    :param sample_rate: 输出采样率
+    :param channels: 输出声道数
+    :return: PCM字节数据
+    """
+    result = run_ffmpeg(
+        [
+            "-i", audio_path,
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "-ar", str(sample_rate),
+            "-ac", str(channels),
+            "-",
+        ]
+    )
+    return result.stdout
+
+
+def decode_pcm_stream(chunks, input_format, sample_rate=24000, channels=1, block_size=64 * 1024):
+    """
+    用单个ffmpeg进程把输入数据流式解码为16位小端PCM
+
+    :param chunks: 输入数据块的可迭代对象（在后台线程中写入ffmpeg）
+    :param input_format: 输入格式，如 "mp3"
+    :param sample_rate: 输出采样率
+    :param channels: 输出声道数
+    :return: 逐块产出PCM字节的生成器
+    """
+    cmd = [
+        get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+        "-f", input_format, "-i", "pipe:0",
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-ac", str(channels),
+        "pipe:1",
+    ]
+    logging.debug(f"run ffmpeg: {cmd}")
+    stderr = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+
+    def feed():
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except OSError:
+            # 读取端提前结束时ffmpeg会关闭管道
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    finished = False
+    try:
+        while True:
+            block = proc.stdout.read(block_size)
+            if not block:
+                break
+            yield block
+        finished = True
+    finally:
+        proc.stdout.close()
+        feeder.join()
+        returncode = proc.wait()
+        stderr.seek(0)
+        message = stderr.read().decode("utf-8", errors="replace").strip()
+        stderr.close()
+        if finished and returncode != 0:
+            raise RuntimeError(f"ffmpeg执行失败: {message}")
@@ -1,11 +1,10 @@
-import json
 import logging
 import os
 import re
 import shutil
 from typing import List
 
-from backend.util.constant import config_path
+from backend.util.config_service import get_config_service
 
 
 def read_lines_from_directory_utf8(directory):
@@ -151,6 +150,14 @@ def read_file(path):
         return content
 
 
+def save_file(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
 def get_project_dir(project_name, sub_dir=None):
     """
     获取项目目录路径
@@ -173,20 +180,5 @@ def get_project_dir(project_name, sub_dir=None):
 
 
 def get_config():
-    if not os.path.exists(config_path) or os.path.getsize(config_path) == 0:
-        with open(config_path, "w", encoding="utf-8") as file:
-            json.dump(
-                {
-                    "address1": "",
-                    "address2": "",
-                    "address3": "",
-                    "address3Type": "",
-                    "comfyuiNodeApi": "",
-                },
-                file,
-            )
-    try:
-        with open(config_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except Exception as e:
-        raise
+    """获取配置（缓存于内存，config.json变化时自动重新加载），返回可修改的副本"""
+    return get_config_service().as_dict()
@@ -0,0 +1,229 @@
+"""
+文件缓存
+基于目录的内容寻址缓存，按缓存总大小进行LRU淘汰
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# 文件摘要缓存：(路径, 大小, 修改时间) -> sha1，避免重复读取未变化的文件
+_digest_cache = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """计算文件内容的sha1摘要（按文件大小和修改时间缓存）"""
+    stat = os.stat(path)
+    cache_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digest_cache.get(cache_key)
+    if digest:
+        return digest
+
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(chunk)
+    digest = sha1.hexdigest()
+
+    with _digest_lock:
+        _digest_cache[cache_key] = digest
+    return digest
+
+
+class _CacheIndex:
+    """同一缓存目录的内存索引（进程内共享）：路径 -> (大小, 最近使用时间)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = None
+        self.total = 0
+        # 进行中的运行数量及其用到的条目，运行期间推迟淘汰且不淘汰这些条目
+        self.runs = 0
+        self.pinned = set()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_for(cache_dir: str) -> _CacheIndex:
+    with _indexes_lock:
+        return _indexes.setdefault(os.path.abspath(cache_dir), _CacheIndex())
+
+
+class FileCache:
+    """内容寻址的文件缓存目录
+
+    - 缓存键由调用方提供的各部分参数哈希生成
+    - 命中时刷新文件修改时间，作为LRU时钟
+    - 总大小由内存索引维护（首次需要时扫描目录建立），提交条目不再遍历目录
+    - 超过上限时重新扫描目录，按最久未使用顺序批量淘汰到上限的 EVICT_LOW_WATER
+    - run() 期间推迟淘汰到运行结束，并保留本次运行用到的条目
+    """
+
+    TMP_MARKER = ".tmp-"
+    EVICT_LOW_WATER = 0.9
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._index = _index_for(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """根据任意可序列化参数生成缓存键"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, suffix: str) -> str:
+        """缓存条目的最终路径"""
+        return os.path.join(self.cache_dir, key[:2], key + suffix)
+
+    def get(self, key: str, suffix: str):
+        """查找缓存条目，命中时返回路径并刷新LRU时间，否则返回None"""
+        path = self.path_for(key, suffix)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        index = self._index
+        with index.lock:
+            if index.runs:
+                index.pinned.add(os.path.abspath(path))
+            if index.entries is not None and path in index.entries:
+                index.entries[path] = (index.entries[path][0], time.time())
+        return path
+
+    def tmp_path(self, key: str, suffix: str) -> str:
+        """获取写入用的临时路径（与最终路径同目录，保留扩展名）"""
+        final_path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        return os.path.join(
+            os.path.dirname(final_path),
+            f"{key}{self.TMP_MARKER}{uuid.uuid4().hex}{suffix}",
+        )
+
+    def commit(self, tmp_path: str, key: str, suffix: str) -> str:
+        """将临时文件原子地提交为缓存条目，超过上限时执行淘汰"""
+        final_path = self.path_for(key, suffix)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, final_path)
+
+        index = self._index
+        with index.lock:
+            if index.runs:
+                index.pinned.add(os.path.abspath(final_path))
+            if index.entries is None:
+                self._load_index()
+            else:
+                previous = index.entries.get(final_path)
+                index.total += size - (previous[0] if previous else 0)
+                index.entries[final_path] = (size, time.time())
+            over_limit = self._over_limit() and not index.runs
+        if over_limit:
+            self.evict(keep=final_path)
+        return final_path
+
+    def put_file(self, src_path: str, key: str, suffix: str) -> str:
+        """复制已有文件到缓存中"""
+        tmp_path = self.tmp_path(key, suffix)
+        shutil.copyfile(src_path, tmp_path)
+        return self.commit(tmp_path, key, suffix)
+
+    def discard(self, tmp_path: str):
+        """删除未提交的临时文件"""
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @contextmanager
+    def run(self):
+        """
+        一次运行（如一次视频合成、一批TTS）的作用域：
+        期间用到的条目不会被淘汰，淘汰推迟到运行结束后批量执行
+        """
+        index = self._index
+        with index.lock:
+            index.runs += 1
+        try:
+            yield self
+        finally:
+            with index.lock:
+                index.runs -= 1
+                last_run = not index.runs
+                over_limit = self._over_limit()
+            if last_run and over_limit:
+                # 本次运行用到的条目仍然保留，只淘汰其他条目
+                self.evict()
+            if last_run:
+                with index.lock:
+                    if not index.runs:
+                        index.pinned.clear()
+
+    def total_size(self) -> int:
+        """当前缓存总大小（字节）"""
+        with self._index.lock:
+            if self._index.entries is None:
+                self._load_index()
+            return self._index.total
+
+    def _over_limit(self) -> bool:
+        return bool(self.max_bytes and self.max_bytes > 0 and self._index.total > self.max_bytes)
+
+    def _load_index(self):
+        """扫描缓存目录重建索引（调用方持有索引锁）"""
+        entries = {}
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if self.TMP_MARKER in name:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries[path] = (stat.st_size, stat.st_mtime)
+        self._index.entries = entries
+        self._index.total = sum(size for size, _ in entries.values())
+
+    def evict(self, keep: str = None):
+        """按LRU顺序批量淘汰，直到缓存总大小不超过上限的 EVICT_LOW_WATER"""
+        if self.max_bytes is None or self.max_bytes <= 0:
+            return
+        index = self._index
+        with index.lock:
+            # 其他进程也可能写入同一目录，淘汰前以磁盘为准重建索引
+            self._load_index()
+            if index.total <= self.max_bytes:
+                return
+
+            target = int(self.max_bytes * self.EVICT_LOW_WATER)
+            protected = set(index.pinned)
+            if keep:
+                protected.add(os.path.abspath(keep))
+            for path, (size, _) in sorted(index.entries.items(), key=lambda item: item[1][1]):
+                if index.total <= target:
+                    break
+                if os.path.abspath(path) in protected:
+                    continue
+                try:
+                    os.remove(path)
+                    del index.entries[path]
+                    index.total -= size
+                    self.logger.info(f"缓存淘汰: {path} ({size} bytes)")
+                except OSError as e:
+                    self.logger.warning(f"缓存淘汰失败 {path}: {e}")
@@ -0,0 +1,158 @@
+"""
+增量JSON解析
+LLM流式输出时逐段喂入文本，目标数组中的对象一旦闭合就立即解析并返回，
+不必等待整个JSON生成完毕。
+
+目标路径写法："storyboard[*]"、"subjects.characters[*]"，
+表示根对象下对应数组中的每个元素。
+JSON之前的说明文字、```json 代码块标记会被忽略。
+"""
+
+import bisect
+import json
+import logging
+from typing import Any, Iterable, List, Optional, Tuple
+
+def _parse_target(target: str) -> Tuple[str, ...]:
+    path = []
+    for part in target.split("."):
+        if part.endswith("[*]"):
+            path.extend([part[:-3], "*"])
+        else:
+            path.append(part)
+    return tuple(p for p in path if p)
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "start", "key", "expect_key")
+
+    def __init__(self, kind: str, path: Tuple[str, ...], start: int):
+        self.kind = kind
+        self.path = path
+        self.start = start
+        self.key: Optional[str] = None
+        self.expect_key = kind == "object"
+
+
+class IncrementalJSONParser:
+    """增量JSON解析器：feed() 返回本次新闭合的目标对象 [(目标路径, 对象), ...]"""
+
+    def __init__(self, targets: Iterable[str]):
+        self.logger = logging.getLogger(__name__)
+        self._targets = {_parse_target(t): t for t in targets}
+        # 收到的文本按分段保存，避免每个增量都复制一遍全文
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._done = False
+        self._root_start = 0
+        self._root_end = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self.counts = {t: 0 for t in self._targets.values()}
+
+    @property
+    def text(self) -> str:
+        """目前收到的全部文本"""
+        return self._slice(0, self._length)
+
+    @property
+    def done(self) -> bool:
+        """根节点是否已经闭合"""
+        return self._done
+
+    def _child_path(self) -> Tuple[str, ...]:
+        if not self._stack:
+            return ()
+        top = self._stack[-1]
+        if top.kind == "array":
+            return top.path + ("*",)
+        return top.path + (top.key or "",)
+
+    def _slice(self, start: int, end: int) -> str:
+        """取全文中 [start, end) 的片段，只拼接涉及的分段"""
+        if start >= end:
+            return ""
+        first = bisect.bisect_right(self._offsets, start) - 1
+        last = bisect.bisect_left(self._offsets, end) - 1
+        base = self._offsets[first]
+        return "".join(self._chunks[first:last + 1])[start - base:end - base]
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        if not chunk:
+            return []
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+        if self._done:
+            return []
+        emitted = []
+        j = 0
+        end = len(chunk)
+        while j < end and not self._done:
+            c = chunk[j]
+            i = base + j
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    top = self._stack[-1] if self._stack else None
+                    if top is not None and top.kind == "object" and top.expect_key:
+                        try:
+                            top.key = json.loads(self._slice(self._string_start, i + 1))
+                        except ValueError:
+                            top.key = self._slice(self._string_start + 1, i)
+                j += 1
+                continue
+
+            if not self._started:
+                # 跳过JSON之前的说明文字
+                if c in "{[":
+                    self._started = True
+                    self._root_start = i
+                else:
+                    j += 1
+                    continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._stack.append(_Frame("object" if c == "{" else "array", self._child_path(), i))
+            elif c in "}]":
+                if not self._stack:
+                    self._done = True
+                    break
+                frame = self._stack.pop()
+                if frame.kind == "object" and frame.path in self._targets:
+                    target = self._targets[frame.path]
+                    try:
+                        emitted.append((target, json.loads(self._slice(frame.start, i + 1))))
+                        self.counts[target] += 1
+                    except ValueError as e:
+                        self.logger.warning(f"skip malformed {target} item: {e}")
+                if not self._stack:
+                    self._done = True
+                    self._root_end = i + 1
+            elif c == ":":
+                if self._stack:
+                    self._stack[-1].expect_key = False
+            elif c == ",":
+                if self._stack and self._stack[-1].kind == "object":
+                    self._stack[-1].expect_key = True
+                    self._stack[-1].key = None
+            j += 1
+        return emitted
+
+    def result(self) -> Any:
+        """解析完整的根节点（忽略前后的说明文字），失败时抛出 json.JSONDecodeError"""
+        if self._done:
+            return json.loads(self._slice(self._root_start, self._root_end))
+        return json.loads(self._slice(self._root_start if self._started else 0, self._length))
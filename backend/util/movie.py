@@ -5,6 +5,12 @@ import re
 from moviepy.editor import AudioFileClip, ImageClip, concatenate_videoclips
 
 from backend.util.constant import audio_dir, image_dir, video_dir
+from backend.util.subtitle import (
+    build_fragment_cues,
+    load_word_timings,
+    subtitle_burn_filter,
+    write_subtitle_sidecars,
+)
 
 
 def extract_number(filename):
@@ -12,15 +18,38 @@ def extract_number(filename):
     return int(match.group()) if match else float("inf")
 
 
-def create_video_with_audio_images():
+def _master_narration(audio_paths, fragments, sample_rate=44100):
+    """
+    将配音片段按片段时长逐样本拼接为一条音轨，做响度归一和限幅，
+    返回处理后的音频clip，失败时返回None（沿用未处理的片段音频）。
+    """
+    try:
+        from backend.audio.mastering import concat_fragments, master, write_wav
+
+        track = concat_fragments(
+            [(path, fragment["duration"]) for path, fragment in zip(audio_paths, fragments)],
+            sample_rate,
+        )
+        mastered, stats = master(track, sample_rate)
+        narration_path = os.path.join(video_dir, "narration.wav")
+        write_wav(narration_path, mastered, sample_rate)
+        logging.info(f"narration mastered: {stats}")
+        return AudioFileClip(narration_path)
+    except Exception as e:
+        logging.warning(f"narration mastering failed, using raw audio: {e}")
+        return None
+
+
+def create_video_with_audio_images(burn_subtitles=False, master_audio=True):
     """
     根据提供的图片集长度，生成一个视频。
     图片和音频列表将在函数内部生成。
+    同时根据TTS逐词时间戳在视频旁生成 video.srt / video.ass 字幕，
+    burn_subtitles为True时在同一次ffmpeg编码中烧录字幕。
 
     Parameters:
-    - length: 图片集的长度，也是音频文件的数量。
-    - txt_name: 视频名称。
-    - lang: 音频的语言（'en' 或 'cn'）。
+    - burn_subtitles: 是否将字幕烧录进视频画面。
+    - master_audio: 是否对拼接后的配音做响度归一和限幅。
     """
     try:
         images = [
@@ -37,6 +66,7 @@ def create_video_with_audio_images():
         ]
         audios.sort(key=lambda x: extract_number(os.path.basename(x)))
         clips = []
+        fragments = []
 
         for img_path, audio_path in zip(images, audios):
             audio_clip = AudioFileClip(audio_path)
@@ -46,12 +76,34 @@ def create_video_with_audio_images():
                 .set_audio(audio_clip)
             )
             clips.append(image_clip)
+            timings = load_word_timings(os.path.splitext(audio_path)[0] + ".json")
+            fragments.append(
+                {
+                    "duration": audio_clip.duration,
+                    "text": (timings or {}).get("text", ""),
+                    "timings": timings,
+                }
+            )
         final_clip = concatenate_videoclips(clips, method="compose")
+
+        if master_audio and clips:
+            narration = _master_narration(audios[: len(clips)], fragments)
+            if narration is not None:
+                final_clip = final_clip.set_audio(narration)
+
+        # 字幕文件
+        width, height = final_clip.size
+        cues = build_fragment_cues(fragments)
+        sidecars = write_subtitle_sidecars(
+            cues, os.path.join(video_dir, "video"), width, height
+        )
+
+        ffmpeg_params = None
+        if burn_subtitles and cues:
+            ffmpeg_params = ["-vf", subtitle_burn_filter(sidecars["ass"])]
+
         video = os.path.join(video_dir, "video.mp4")
-        final_clip.write_videofile(video, fps=24)
+        final_clip.write_videofile(video, fps=24, ffmpeg_params=ffmpeg_params)
     except Exception as e:
         logging.error(f"gen video failed{e}")
         raise
-
-
-# todo 字幕 网站https://news.miracleplus.com/share_link/45459
@@ -0,0 +1,100 @@
+"""
+MP3帧解析
+只读取帧头，不解码音频：用于统计采样数、去掉ID3标签和Xing/Info头帧，
+以便把多段MP3拼成一条原始帧流交给单个解码进程，并精确知道每段的采样边界。
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# (MPEG版本位) -> 采样率表
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+# Layer III 比特率表（kbps），索引0为free format，15为非法
+_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+_VBR_TAGS = (b"Xing", b"Info", b"VBRI")
+
+
+@dataclass(frozen=True)
+class MP3Frame:
+    """一个Layer III音频帧"""
+
+    offset: int
+    length: int
+    samples: int
+    sample_rate: int
+    channels: int
+
+    @property
+    def stream_format(self) -> Tuple[int, int]:
+        """同一解码流内必须一致的参数 (采样率, 声道数)"""
+        return self.sample_rate, self.channels
+
+
+def _parse_header(data: bytes, pos: int):
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+    if version == 3:
+        bitrate = _BITRATES_V1[bitrate_index] * 1000
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        bitrate = _BITRATES_V2[bitrate_index] * 1000
+        length = 72 * bitrate // sample_rate + padding
+        samples = 576
+    channels = 1 if b3 >> 6 == 3 else 2
+    return MP3Frame(pos, length, samples, sample_rate, channels)
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def mp3_frames(data: bytes) -> List[MP3Frame]:
+    """
+    解析MP3数据中的音频帧
+
+    跳过开头的ID3v2标签、无法识别的字节以及第一帧的Xing/Info/VBRI头帧（不含音频），
+    返回的帧拼接后解码得到的采样数即各帧 samples 之和。
+    """
+    frames = []
+    pos = _skip_id3v2(data)
+    first = True
+    while pos + 4 <= len(data):
+        frame = _parse_header(data, pos)
+        if frame is not None and pos + frame.length > len(data):
+            # 末尾被截断的帧
+            break
+        if frame is None:
+            if data[pos:pos + 3] == b"TAG":
+                break
+            # 失步时逐字节重新同步
+            pos += 1
+            continue
+        if first:
+            first = False
+            if any(tag in data[pos + 4:pos + 40] for tag in _VBR_TAGS):
+                pos += frame.length
+                continue
+        frames.append(frame)
+        pos += frame.length
+    return frames
+
@@ -0,0 +1,165 @@
+"""
+字幕生成
+根据TTS合成时记录的逐词时间戳生成SRT/ASS字幕，并提供ffmpeg烧录滤镜
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+# 断句标点
+_BREAK_PUNCTUATION = set("，。！？；：、,.!?;:…")
+
+
+def load_word_timings(timing_path: str) -> Optional[Dict]:
+    """读取TTS生成的逐词时间戳文件"""
+    if not os.path.exists(timing_path):
+        return None
+    try:
+        with open(timing_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"read word timings {timing_path} failed: {e}")
+        return None
+
+
+def group_words_into_cues(words: List[Dict], max_chars: int = 16, max_gap: float = 0.6) -> List[Dict]:
+    """
+    将逐词时间戳合并为字幕条目
+
+    :param words: [{"start": 秒, "end": 秒, "text": 词}]
+    :param max_chars: 单条字幕最大字符数
+    :param max_gap: 词间停顿超过该值（秒）时断开
+    :return: [{"start": 秒, "end": 秒, "text": 文本}]
+    """
+    cues = []
+    current = None
+    for word in words:
+        text = word.get("text", "")
+        if not text.strip():
+            continue
+        if current is not None and (
+            len(current["text"]) + len(text) > max_chars
+            or word["start"] - current["end"] > max_gap
+        ):
+            cues.append(current)
+            current = None
+        if current is None:
+            current = {"start": word["start"], "end": word["end"], "text": text}
+        else:
+            current["text"] += text
+            current["end"] = word["end"]
+        if text[-1] in _BREAK_PUNCTUATION:
+            cues.append(current)
+            current = None
+    if current is not None:
+        cues.append(current)
+    return cues
+
+
+def build_fragment_cues(fragments: List[Dict], max_chars: int = 16) -> List[Dict]:
+    """
+    按片段顺序拼接字幕，每个片段的时间偏移为之前片段时长之和
+
+    :param fragments: [{"duration": 片段音频时长, "text": 片段文本, "timings": 逐词时间戳数据或None}]
+    :return: 全片字幕条目
+    """
+    cues = []
+    offset = 0.0
+    for fragment in fragments:
+        duration = fragment["duration"]
+        timings = fragment.get("timings") or {}
+        words = timings.get("words") or []
+        if words:
+            for cue in group_words_into_cues(words, max_chars=max_chars):
+                cues.append(
+                    {
+                        "start": offset + cue["start"],
+                        "end": offset + min(cue["end"], duration),
+                        "text": cue["text"],
+                    }
+                )
+        elif fragment.get("text", "").strip():
+            # 没有逐词时间戳时，整段文本覆盖整个片段
+            cues.append({"start": offset, "end": offset + duration, "text": fragment["text"].strip()})
+        offset += duration
+    return cues
+
+
+def _format_srt_time(seconds: float) -> str:
+    millis = int(round(max(seconds, 0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _format_ass_time(seconds: float) -> str:
+    centis = int(round(max(seconds, 0) * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def to_srt(cues: List[Dict]) -> str:
+    """生成SRT字幕文本"""
+    blocks = []
+    for i, cue in enumerate(cues, start=1):
+        blocks.append(
+            f"{i}\n{_format_srt_time(cue['start'])} --> {_format_srt_time(cue['end'])}\n{cue['text']}\n"
+        )
+    return "\n".join(blocks)
+
+
+def to_ass(cues: List[Dict], width: int = 1920, height: int = 1080, font: str = "Microsoft YaHei") -> str:
+    """生成ASS字幕文本（底部居中，白字黑边）"""
+    font_size = max(16, height // 18)
+    margin_v = max(10, height // 20)
+    header = (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {width}\n"
+        f"PlayResY: {height}\n"
+        "WrapStyle: 2\n"
+        "\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Default,{font},{font_size},&H00FFFFFF,&H000000FF,&H00000000,&H64000000,"
+        f"0,0,0,0,100,100,0,0,1,2,0,2,20,20,{margin_v},1\n"
+        "\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+    lines = []
+    for cue in cues:
+        text = cue["text"].replace("\n", "\\N").replace("{", "(").replace("}", ")")
+        lines.append(
+            f"Dialogue: 0,{_format_ass_time(cue['start'])},{_format_ass_time(cue['end'])},Default,,0,0,0,,{text}"
+        )
+    return header + "\n".join(lines) + "\n"
+
+
+def write_subtitle_sidecars(cues: List[Dict], base_path: str, width: int = 1920, height: int = 1080) -> Dict[str, str]:
+    """
+    写出SRT和ASS字幕文件
+
+    :param base_path: 不含扩展名的输出路径
+    :return: {"srt": 路径, "ass": 路径}
+    """
+    srt_path = base_path + ".srt"
+    ass_path = base_path + ".ass"
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write(to_srt(cues))
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write(to_ass(cues, width, height))
+    return {"srt": srt_path, "ass": ass_path}
+
+
+def subtitle_burn_filter(subtitle_path: str) -> str:
+    """生成ffmpeg字幕烧录滤镜（处理Windows路径中的反斜杠和盘符冒号）"""
+    escaped = os.path.abspath(subtitle_path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    return f"subtitles='{escaped}'"
@@ -0,0 +1,99 @@
+"""
+合成前的图片预处理
+每张源图片按目标分辨率只缩放一次，结果按分辨率缓存，
+交给编码器的图片已是最终尺寸，避免moviepy逐帧缩放。
+"""
+
+import logging
+import os
+
+from PIL import Image
+
+from backend.util.file_cache import FileCache, file_digest
+
+logger = logging.getLogger(__name__)
+
+# 预处理算法版本，修改处理逻辑时递增以使旧缓存失效
+PREP_VERSION = 1
+
+# 支持的适配模式
+FIT_MODES = ("stretch", "letterbox", "cover")
+
+
+def _fit_image(img: Image.Image, width: int, height: int, fit: str) -> Image.Image:
+    """按适配模式将图片调整到目标尺寸"""
+    src_w, src_h = img.size
+
+    if fit == "stretch":
+        return img.resize((width, height), Image.Resampling.BICUBIC, reducing_gap=3.0)
+
+    if fit == "cover":
+        scale = max(width / src_w, height / src_h)
+    else:
+        scale = min(width / src_w, height / src_h)
+
+    new_w = max(1, round(src_w * scale))
+    new_h = max(1, round(src_h * scale))
+    resized = img.resize((new_w, new_h), Image.Resampling.BICUBIC, reducing_gap=3.0)
+
+    if fit == "cover":
+        # 居中裁剪
+        left = (new_w - width) // 2
+        top = (new_h - height) // 2
+        return resized.crop((left, top, left + width, top + height))
+
+    # letterbox: 居中放置在黑色画布上
+    canvas = Image.new("RGB", (width, height), (0, 0, 0))
+    canvas.paste(resized, ((width - new_w) // 2, (height - new_h) // 2))
+    return canvas
+
+
+def prepare_image(
+    image_path: str,
+    width: int,
+    height: int,
+    cache_root: str,
+    fit: str = "stretch",
+    max_bytes: int = 1024 * 1024 * 1024,
+) -> str:
+    """
+    将图片预处理为目标分辨率，并写入按分辨率划分的缓存
+
+    Args:
+        image_path: 源图片路径
+        width: 目标宽度
+        height: 目标高度
+        cache_root: 缓存根目录，实际缓存位于 cache_root/<width>x<height>
+        fit: 适配模式 stretch(拉伸) / letterbox(留黑边) / cover(裁剪铺满)
+        max_bytes: 该分辨率缓存的总大小上限
+
+    Returns:
+        预处理后的图片路径
+    """
+    if fit not in FIT_MODES:
+        raise ValueError(f"不支持的图片适配模式: {fit}")
+
+    cache = FileCache(os.path.join(cache_root, f"{width}x{height}"), max_bytes=max_bytes)
+    key = FileCache.make_key("prepared_image", PREP_VERSION, file_digest(image_path), width, height, fit)
+
+    cached_path = cache.get(key, ".png")
+    if cached_path:
+        return cached_path
+
+    tmp_path = cache.tmp_path(key, ".png")
+    try:
+        with Image.open(image_path) as img:
+            # JPEG可在解码阶段按DCT缩放，显著减少大图的解码开销
+            img.draft("RGB", (width, height))
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            fitted = _fit_image(img, width, height, fit)
+        # 低压缩级别：只需快速写出无损结果
+        fitted.save(tmp_path, format="PNG", compress_level=1)
+        prepared_path = cache.commit(tmp_path, key, ".png")
+    except Exception:
+        cache.discard(tmp_path)
+        raise
+
+    logger.info(f"图片预处理完成: {os.path.basename(image_path)} -> {width}x{height} ({fit})")
+    return prepared_path
@@ -0,0 +1,215 @@
+"""
+镜头运动效果引擎（Ken Burns / 推拉摇移）
+将分镜的 camera_movement 描述编译为 ffmpeg zoompan 滤镜表达式，
+运动完全在ffmpeg内部计算，不产生逐帧的Python开销。
+"""
+
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 运动类型
+MOTION_STATIC = "static"
+MOTION_ZOOM_IN = "zoom_in"
+MOTION_ZOOM_OUT = "zoom_out"
+MOTION_PAN_LEFT = "pan_left"
+MOTION_PAN_RIGHT = "pan_right"
+MOTION_TILT_UP = "tilt_up"
+MOTION_TILT_DOWN = "tilt_down"
+
+# 默认运动参数
+DEFAULT_MOTION_OPTIONS = {
+    "zoom": 1.2,  # 推拉的最大缩放倍数，摇移时的固定缩放倍数（留出移动空间）
+    "supersample": 2,  # 缩放前先放大的倍数，减少zoompan取整造成的抖动
+    "easing": True,  # 使用平滑缓动曲线
+}
+
+
+def get_camera_movement(storyboard: Dict) -> str:
+    """从分镜数据中读取镜头运动描述"""
+    for source in (storyboard, storyboard.get("script") or {}):
+        if isinstance(source, dict):
+            movement = source.get("camera_movement") or source.get("cameraMovement")
+            if movement:
+                return str(movement)
+    return ""
+
+
+def parse_camera_movement(movement: str) -> str:
+    """
+    将镜头运动描述解析为运动类型
+
+    支持 generate_storyboard_script 生成的中文描述（静止/推拉/摇移/升降等）及常见英文描述，
+    描述中包含多个运动时以最先出现的为准。
+    """
+    if not movement:
+        return MOTION_STATIC
+
+    text = movement.strip().lower()
+    if any(word in text for word in ("静止", "固定", "static", "still")):
+        return MOTION_STATIC
+
+    candidates = []
+
+    def add(keywords, motion):
+        positions = [text.find(k) for k in keywords if text.find(k) >= 0]
+        if positions:
+            candidates.append((min(positions), motion))
+
+    add(("推", "zoom in", "push", "dolly in"), MOTION_ZOOM_IN)
+    add(("拉", "zoom out", "pull", "dolly out"), MOTION_ZOOM_OUT)
+    add(("升", "tilt up", "crane up"), MOTION_TILT_UP)
+    add(("降", "tilt down", "crane down"), MOTION_TILT_DOWN)
+
+    # 摇/移/跟：根据方向词决定左右上下，默认向右
+    pan_positions = [text.find(k) for k in ("摇", "移", "跟", "pan", "track") if text.find(k) >= 0]
+    if pan_positions:
+        if "左" in text or "left" in text:
+            pan = MOTION_PAN_LEFT
+        elif "上" in text or "up" in text:
+            pan = MOTION_TILT_UP
+        elif "下" in text or "down" in text:
+            pan = MOTION_TILT_DOWN
+        else:
+            pan = MOTION_PAN_RIGHT
+        candidates.append((min(pan_positions), pan))
+
+    if not candidates:
+        return MOTION_STATIC
+    return min(candidates)[1]
+
+
+def build_motion_filter(
+    motion: str,
+    width: int,
+    height: int,
+    fps: float,
+    duration: float,
+    options: Optional[Dict] = None,
+) -> str:
+    """
+    生成单张图片的运动滤镜链（输入为已预处理为目标尺寸的图片）
+
+    运动进度按 输出帧号/(总帧数-1) 归一化，因此同一种运动在任意片段时长下
+    起止画面和速度曲线完全一致。
+
+    Args:
+        motion: 运动类型
+        width: 输出宽度
+        height: 输出高度
+        fps: 输出帧率
+        duration: 片段时长（秒）
+        options: 运动参数，见 DEFAULT_MOTION_OPTIONS
+
+    Returns:
+        ffmpeg滤镜链字符串
+    """
+    opts = dict(DEFAULT_MOTION_OPTIONS)
+    if options:
+        opts.update(options)
+
+    frames = max(1, int(round(duration * fps)))
+    supersample = max(1, int(opts["supersample"]))
+    zoom = float(opts["zoom"])
+
+    # 归一化进度 p∈[0,1]，可选smoothstep缓动
+    progress = f"min(on/{max(frames - 1, 1)},1)"
+    if opts["easing"]:
+        progress = f"({progress})*({progress})*(3-2*({progress}))"
+
+    center_x = "iw/2-(iw/zoom/2)"
+    center_y = "ih/2-(ih/zoom/2)"
+
+    if motion == MOTION_ZOOM_IN:
+        z, x, y = f"1+{zoom - 1:.4f}*{progress}", center_x, center_y
+    elif motion == MOTION_ZOOM_OUT:
+        z, x, y = f"{zoom:.4f}-{zoom - 1:.4f}*{progress}", center_x, center_y
+    elif motion == MOTION_PAN_RIGHT:
+        z, x, y = f"{zoom:.4f}", f"(iw-iw/zoom)*{progress}", center_y
+    elif motion == MOTION_PAN_LEFT:
+        z, x, y = f"{zoom:.4f}", f"(iw-iw/zoom)*(1-{progress})", center_y
+    elif motion == MOTION_TILT_UP:
+        z, x, y = f"{zoom:.4f}", center_x, f"(ih-ih/zoom)*(1-{progress})"
+    elif motion == MOTION_TILT_DOWN:
+        z, x, y = f"{zoom:.4f}", center_x, f"(ih-ih/zoom)*{progress}"
+    else:
+        z, x, y = "1", "0", "0"
+
+    filters = []
+    if motion != MOTION_STATIC and supersample > 1:
+        filters.append(f"scale={width * supersample}:{height * supersample}:flags=bicubic")
+    filters.append(
+        f"zoompan=z='{z}':x='{x}':y='{y}':d={frames}:s={width}x{height}:fps={fps}"
+    )
+    filters.append("setsar=1")
+    filters.append("format=yuv420p")
+    return ",".join(filters)
+
+
+def build_motion_render_args(
+    image_path: str,
+    output_path: str,
+    motion: str,
+    width: int,
+    height: int,
+    fps: float,
+    duration: float,
+    audio: Optional[Dict] = None,
+    options: Optional[Dict] = None,
+) -> list:
+    """
+    生成一次性原生渲染分镜片段的ffmpeg参数
+
+    Args:
+        image_path: 已预处理为目标尺寸的图片
+        output_path: 输出视频路径
+        motion: 运动类型
+        width/height/fps/duration: 输出参数
+        audio: 音频参数（可选）:
+            {"path": 音频文件, "start": 开始时间, "end": 结束时间,
+             "fade_in": 淡入, "fade_out": 淡出, "total_duration": 音频总时长,
+             "sample_rate": 采样率, "channels": 声道数}
+            path为None时生成静音音轨
+        options: 运动参数
+
+    Returns:
+        ffmpeg参数列表
+    """
+    video_filter = build_motion_filter(motion, width, height, fps, duration, options)
+    args = ["-i", image_path]
+    filter_parts = [f"[0:v]{video_filter}[v]"]
+    maps = ["-map", "[v]"]
+    audio_args = []
+
+    if audio is not None:
+        sample_rate = int(audio.get("sample_rate", 44100))
+        channels = int(audio.get("channels", 2))
+        if audio.get("path"):
+            args += ["-i", audio["path"]]
+            # 淡入淡出作用于完整音轨，再裁剪区间，与moviepy路径效果一致
+            chain = []
+            if audio.get("fade_in", 0) > 0:
+                chain.append(f"afade=t=in:st=0:d={audio['fade_in']}")
+            if audio.get("fade_out", 0) > 0 and audio.get("total_duration"):
+                fade_start = max(0.0, audio["total_duration"] - audio["fade_out"])
+                chain.append(f"afade=t=out:st={fade_start:.3f}:d={audio['fade_out']}")
+            chain.append(f"atrim=start={audio['start']:.3f}:end={audio['end']:.3f}")
+            chain.append("asetpts=PTS-STARTPTS")
+            filter_parts.append(f"[1:a]{','.join(chain)}[a]")
+        else:
+            layout = "mono" if channels == 1 else "stereo"
+            filter_parts.append(f"anullsrc=r={sample_rate}:cl={layout}[a]")
+        maps += ["-map", "[a]"]
+        audio_args = ["-c:a", "aac", "-ar", str(sample_rate), "-ac", str(channels)]
+
+    return args + [
+        "-filter_complex", ";".join(filter_parts),
+        *maps,
+        "-t", f"{duration:.3f}",
+        "-r", str(fps),
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        *audio_args,
+        output_path,
+    ]
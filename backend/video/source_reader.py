@@ -0,0 +1,126 @@
+"""
+原视频读取与批量裁剪
+- SharedVideoReaders: 一次生成任务内共享的原视频读取器（引用计数）
+- batch_cut_ranges: 单次解复用即可裁剪出多个时间区间
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend.util.ffmpeg import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVideoReaders:
+    """共享的原视频读取器缓存
+
+    同一个视频文件在一次生成任务中只打开一次（一个容器、一个ffmpeg读取进程），
+    各分镜通过 acquire/release 借用。任务结束时（close 或退出 with 块）统一关闭。
+    """
+
+    def __init__(self):
+        self._clips = {}
+        self._refs = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def acquire(self, video_path: str):
+        """借用视频读取器，首次借用时打开文件"""
+        from moviepy.editor import VideoFileClip
+
+        key = os.path.abspath(video_path)
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is None:
+                logger.info(f"打开原视频: {video_path}")
+                clip = VideoFileClip(video_path)
+                self._clips[key] = clip
+                self._refs[key] = 0
+            self._refs[key] += 1
+            return clip
+
+    def release(self, video_path: str):
+        """归还视频读取器（读取器保持打开，供后续分镜复用）"""
+        key = os.path.abspath(video_path)
+        with self._lock:
+            if self._refs.get(key, 0) > 0:
+                self._refs[key] -= 1
+
+    def close(self):
+        """关闭所有读取器"""
+        with self._lock:
+            for key, clip in self._clips.items():
+                if self._refs.get(key, 0) > 0:
+                    logger.warning(f"视频读取器仍有 {self._refs[key]} 个引用未归还: {key}")
+                try:
+                    clip.close()
+                except Exception as e:
+                    logger.warning(f"关闭视频读取器失败 {key}: {e}")
+            self._clips.clear()
+            self._refs.clear()
+
+
+def batch_cut_ranges(
+    video_path: str,
+    ranges: List[Tuple[float, float, str]],
+    fps: Optional[float] = None,
+    max_outputs_per_pass: int = 8,
+) -> Dict[str, bool]:
+    """
+    批量裁剪视频片段，每一组输出只需一次解复用/解码
+
+    Args:
+        video_path: 原视频路径
+        ranges: (开始时间, 结束时间, 输出路径) 列表
+        fps: 输出帧率（可选，默认保持原帧率）
+        max_outputs_per_pass: 单次ffmpeg调用的最大输出数量，限制并发编码器的内存占用
+
+    Returns:
+        输出路径 -> 是否成功
+    """
+    results = {}
+    ordered = sorted(ranges, key=lambda r: r[0])
+
+    for group_start in range(0, len(ordered), max_outputs_per_pass):
+        group = ordered[group_start:group_start + max_outputs_per_pass]
+        # 输入端快速定位到本组最早的起点，避免解码无关的前段内容
+        seek_base = group[0][0]
+
+        args = ["-ss", f"{seek_base:.3f}", "-i", video_path]
+        for start_time, end_time, output_path in group:
+            # 清理旧文件，避免失败时误判为成功
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            args += [
+                "-map", "0:v:0",
+                "-map", "0:a:0?",
+                "-ss", f"{start_time - seek_base:.3f}",
+                "-t", f"{end_time - start_time:.3f}",
+            ]
+            if fps:
+                args += ["-r", str(fps)]
+            args += [
+                "-c:v", "libx264",
+                "-pix_fmt", "yuv420p",
+                "-c:a", "aac",
+                output_path,
+            ]
+
+        try:
+            run_ffmpeg(args)
+            for _, _, output_path in group:
+                results[output_path] = os.path.exists(output_path)
+        except Exception as e:
+            logger.error(f"批量裁剪失败: {e}")
+            for _, _, output_path in group:
+                results[output_path] = False
+
+    return results
@@ -44,7 +44,7 @@ from backend.rest_handler.comfyui_lora_manager import (
 )
 from backend.rest_handler.video import generate_video, get_video
 from backend.tts.tts import generate_audio_files
-from backend.util.constant import image_dir, video_dir
+from backend.util.constant import audio_dir, image_dir, video_dir
 
 app = Flask(__name__)
 CORS(app)
@@ -692,6 +692,11 @@ def serve_videos(filename):
     return send_from_directory(video_dir, filename)
 
 
+@app.route("/api/audio/<path:filename>")
+def serve_audio(filename):
+    return send_from_directory(audio_dir, filename)
+
+
 @app.route("/images/<path:filename>")
 def serve_images(filename):
     logging.info(f"Requested image: {filename}")
@@ -776,6 +781,25 @@ def api_get_lora_manager_status():
     return get_lora_manager_status()
 
 
+@app.route("/api/unified/generate/stream", methods=["POST"])
+def api_stream_unified_generation():
+    from backend.rest_handler.unified_generation import stream_unified_subjects_and_storyboard
+    return stream_unified_subjects_and_storyboard()
+
+
+# 专业功能接口
+@app.route("/api/professional/dialogue/render", methods=["POST"])
+def api_render_scene_dialogue_audio():
+    from backend.rest_handler.professional_features import render_scene_dialogue_audio
+    return render_scene_dialogue_audio()
+
+
+@app.route("/api/llm/status", methods=["GET"])
+def api_get_llm_status():
+    from backend.rest_handler.llm_status import get_llm_status
+    return get_llm_status()
+
+
 @app.route("/api/lora/recommendations/save", methods=["POST"])
 def api_save_lora_recommendations():
     from backend.rest_handler.lora_manager import save_lora_recommendations
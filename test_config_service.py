@@ -0,0 +1,53 @@
+"""
+测试配置服务：返回可修改、可序列化的副本，文件变化后自动重新加载
+运行: python -m pytest -q test_config_service.py
+"""
+
+import copy
+import json
+import os
+
+from backend.util.config_service import ConfigService
+
+
+def _write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_returns_plain_copies(tmp_path):
+    path = str(tmp_path / "config.json")
+    _write(path, {"comfyuiNodeApi": {"3": {"inputs": {"seed": 1}}}, "models": ["a"]})
+    service = ConfigService(path)
+
+    config = service.as_dict()
+    # ComfyUI 生成会深拷贝并序列化节点配置
+    copy.deepcopy(config["comfyuiNodeApi"])
+    json.dumps(config)
+
+    config["comfyuiNodeApi"]["3"]["inputs"]["seed"] = 2
+    config["models"].append("b")
+    assert service.as_dict() == {"comfyuiNodeApi": {"3": {"inputs": {"seed": 1}}}, "models": ["a"]}
+
+
+def test_reloads_when_file_changes(tmp_path):
+    path = str(tmp_path / "config.json")
+    _write(path, {"model": "a"})
+    service = ConfigService(path)
+    assert service.as_dict()["model"] == "a"
+
+    _write(path, {"model": "bb"})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert service.as_dict()["model"] == "bb"
+
+
+def test_update_and_defaults(tmp_path):
+    path = str(tmp_path / "config.json")
+    service = ConfigService(path, defaults={"address1": ""})
+    assert service.as_dict() == {"address1": ""}
+
+    service.update("address1", "http://127.0.0.1:8188")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["address1"] == "http://127.0.0.1:8188"
+    assert service.as_dict()["address1"] == "http://127.0.0.1:8188"
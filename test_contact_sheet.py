@@ -0,0 +1,64 @@
+"""
+测试关键帧拼图：图片token估算、网格形状与按预算选择拼图尺寸
+运行: python -m pytest -q test_contact_sheet.py
+"""
+
+import base64
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from backend.ai.contact_sheet import build_contact_sheet, choose_sheet_size, estimate_image_tokens, grid_shape
+
+
+@pytest.mark.parametrize("width, height, tokens", [
+    (512, 512, 255),
+    (1024, 1024, 765),
+    (1536, 864, 1105),
+    (4096, 1024, 765),
+])
+def test_estimate_image_tokens(width, height, tokens):
+    assert estimate_image_tokens(width, height) == tokens
+
+
+def test_grid_shape_is_near_square():
+    assert [grid_shape(n) for n in (1, 2, 3, 4, 5, 9, 10)] == [
+        (1, 1), (1, 2), (2, 2), (2, 2), (2, 3), (3, 3), (3, 4)
+    ]
+
+
+def test_choose_sheet_size_picks_largest_within_budget():
+    assert choose_sheet_size(2, 2, 16 / 9, 765) == (1024, 576)
+    assert choose_sheet_size(2, 2, 16 / 9, 10000) == (1536, 864)
+    # 竖屏帧纵向排列时按高度取尺寸
+    assert choose_sheet_size(3, 2, 9 / 16, 765) == (384, 1024)
+
+
+def test_choose_sheet_size_falls_back_to_smallest():
+    assert choose_sheet_size(2, 2, 16 / 9, 100) == (512, 288)
+
+
+def test_build_contact_sheet(tmp_path):
+    paths = []
+    for i in range(3):
+        image = np.full((90, 160, 3), i * 80, dtype=np.uint8)
+        ok, encoded = cv2.imencode(".png", image)
+        assert ok
+        path = tmp_path / f"帧{i}.png"
+        encoded.tofile(str(path))
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.png"))
+    (tmp_path / "missing.png").write_bytes(b"")
+
+    encoded, info = build_contact_sheet(paths, token_budget=765)
+    assert info["labels"] == ["f1", "f2", "f3"]
+    assert (info["rows"], info["cols"]) == (2, 2)
+    assert info["estimated_image_tokens"] <= 765
+    sheet = cv2.imdecode(np.frombuffer(base64.b64decode(encoded), dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert sheet.shape[:2] == (info["height"], info["width"])
+
+
+def test_build_contact_sheet_without_frames():
+    assert build_contact_sheet([]) == (None, {})
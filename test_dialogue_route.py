@@ -0,0 +1,60 @@
+"""
+测试场景台词渲染接口：经 main.py 注册的路由解析台词并交给渲染器
+运行: python -m pytest -q test_dialogue_route.py
+"""
+
+import pytest
+
+pytest.importorskip("flask")
+main = pytest.importorskip("main")
+
+from backend.tts import backends, dialogue
+
+ROUTE = "/api/professional/dialogue/render"
+
+
+class FakeRenderer:
+    calls = []
+
+    def __init__(self, project_name, backend=None, sample_rate=24000):
+        self.project_name = project_name
+        self.sample_rate = sample_rate
+
+    def render(self, lines, output_path, gap=0.35, voice_profiles=None):
+        FakeRenderer.calls.append((self.project_name, [(l.speaker, l.text) for l in lines], output_path, gap))
+        return {"success": True, "output_path": output_path, "duration": 1.0, "lines": []}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    FakeRenderer.calls = []
+    monkeypatch.setattr(dialogue, "DialogueRenderer", FakeRenderer)
+    monkeypatch.setattr(backends, "get_tts_backend", lambda name=None: None)
+    return main.app.test_client()
+
+
+def test_render_dialogue_through_route(client):
+    response = client.post(ROUTE, json={
+        "projectName": "demo",
+        "sceneId": "scene_1",
+        "dialogue": "小明：你好。\n语调：轻快\n小红：（笑）早上好！",
+        "gap": 0.5,
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["audioUrl"] == "/api/audio/demo/dialogues/scene_1_dialogue.wav"
+    project, lines, output_path, gap = FakeRenderer.calls[0]
+    assert project == "demo"
+    assert lines == [("小明", "你好。"), ("小红", "早上好！")]
+    assert output_path.endswith("scene_1_dialogue.wav") and gap == 0.5
+
+
+def test_render_dialogue_requires_scene_id(client):
+    response = client.post(ROUTE, json={"projectName": "demo", "dialogue": "小明：你好"})
+    assert response.status_code == 400
+    assert FakeRenderer.calls == []
+
+
+def test_render_dialogue_without_speaker_lines(client):
+    response = client.post(ROUTE, json={"projectName": "demo", "sceneId": "s", "dialogue": "没有说话人的旁白"})
+    assert response.status_code == 400
@@ -0,0 +1,78 @@
+"""
+测试文件缓存：内存索引、LRU淘汰与运行期间的推迟淘汰
+运行: python -m pytest -q test_file_cache.py
+"""
+
+import os
+
+from backend.util.file_cache import FileCache
+
+
+def _put(cache, name, size):
+    key = FileCache.make_key(name)
+    tmp_path = cache.tmp_path(key, ".bin")
+    with open(tmp_path, "wb") as f:
+        f.write(b"x" * size)
+    return cache.commit(tmp_path, key, ".bin")
+
+
+def _age(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_make_key_is_stable_and_order_sensitive():
+    assert FileCache.make_key("a", 1) == FileCache.make_key("a", 1)
+    assert FileCache.make_key("a", 1) != FileCache.make_key(1, "a")
+
+
+def test_commit_and_get(tmp_path):
+    cache = FileCache(str(tmp_path), max_bytes=1000)
+    path = _put(cache, "a", 10)
+    assert cache.get(FileCache.make_key("a"), ".bin") == path
+    assert cache.get(FileCache.make_key("missing"), ".bin") is None
+    assert cache.total_size() == 10
+
+
+def test_index_tracks_overwrite(tmp_path):
+    cache = FileCache(str(tmp_path), max_bytes=1000)
+    _put(cache, "a", 10)
+    _put(cache, "a", 30)
+    assert cache.total_size() == 30
+
+
+def test_evicts_least_recently_used_down_to_low_water(tmp_path):
+    cache = FileCache(str(tmp_path), max_bytes=100)
+    old = _put(cache, "old", 40)
+    _age(old, 100)
+    recent = _put(cache, "recent", 40)
+    _age(recent, 50)
+    # 刷新 "old" 的使用时间后，最久未使用的是 "recent"
+    cache.get(FileCache.make_key("old"), ".bin")
+    newest = _put(cache, "newest", 40)
+    assert os.path.exists(old)
+    assert not os.path.exists(recent)
+    assert os.path.exists(newest)
+    assert cache.total_size() <= 100 * FileCache.EVICT_LOW_WATER
+
+
+def test_run_defers_eviction_and_pins_used_entries(tmp_path):
+    cache = FileCache(str(tmp_path), max_bytes=100)
+    stale = _put(cache, "stale", 40)
+    _age(stale, 100)
+    with cache.run():
+        first = _put(cache, "first", 40)
+        _age(first, 200)
+        second = _put(cache, "second", 40)
+        # 运行期间超出上限也不淘汰
+        assert all(os.path.exists(p) for p in (stale, first, second))
+    # 运行结束后只淘汰未被本次运行使用的条目
+    assert not os.path.exists(stale)
+    assert os.path.exists(first) and os.path.exists(second)
+
+
+def test_instances_share_index_per_directory(tmp_path):
+    _put(FileCache(str(tmp_path), max_bytes=1000), "a", 10)
+    other = FileCache(str(tmp_path), max_bytes=1000)
+    _put(other, "b", 20)
+    assert other.total_size() == 30
@@ -0,0 +1,77 @@
+"""
+测试增量JSON解析：任意切分方式下目标对象的输出与一次性解析一致
+运行: python -m pytest -q test_json_stream.py
+"""
+
+import json
+import random
+
+from backend.util.json_stream import IncrementalJSONParser
+
+TARGETS = ["subjects.characters[*]", "storyboard[*]"]
+
+DOCUMENT = {
+    "summary": "含有 {括号}、[方括号]、\"引号\" 和 \\ 反斜杠的概要",
+    "subjects": {
+        "characters": [
+            {"name": "小明", "tags": ["a", {"nested": "}"}]},
+            {"name": "李\"四\"", "description": "说：\"走吧}\""},
+        ],
+        "scenes": [{"name": "街道"}],
+    },
+    "storyboard": [
+        {"scene_id": 1, "required_subjects": {"characters": ["@小明"]}},
+        {"scene_id": 2, "dialogue": "\\n不是换行"},
+    ],
+}
+
+
+def _feed_all(text, sizes):
+    parser = IncrementalJSONParser(TARGETS)
+    emitted = []
+    pos = 0
+    for size in sizes:
+        emitted.extend(parser.feed(text[pos:pos + size]))
+        pos += size
+    emitted.extend(parser.feed(text[pos:]))
+    return parser, emitted
+
+
+def _expected():
+    return [("subjects.characters[*]", c) for c in DOCUMENT["subjects"]["characters"]] + [
+        ("storyboard[*]", s) for s in DOCUMENT["storyboard"]
+    ]
+
+
+def test_random_chunking_matches_full_parse():
+    text = "好的，结果如下：\n```json\n" + json.dumps(DOCUMENT, ensure_ascii=False, indent=2) + "\n```"
+    rng = random.Random(0)
+    for _ in range(50):
+        sizes = [rng.randint(1, 9) for _ in range(len(text))]
+        parser, emitted = _feed_all(text, sizes)
+        assert emitted == _expected()
+        assert parser.done
+        assert parser.text == text
+        assert parser.result() == DOCUMENT
+        assert parser.counts == {"subjects.characters[*]": 2, "storyboard[*]": 2}
+
+
+def test_single_character_chunks():
+    text = json.dumps(DOCUMENT, ensure_ascii=True)
+    _, emitted = _feed_all(text, [1] * len(text))
+    assert emitted == _expected()
+
+
+def test_items_are_emitted_before_document_closes():
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    cut = text.index('"scene_id": 2')
+    parser = IncrementalJSONParser(TARGETS)
+    emitted = parser.feed(text[:cut])
+    assert [target for target, _ in emitted] == ["subjects.characters[*]"] * 2 + ["storyboard[*]"]
+    assert not parser.done
+
+
+def test_non_target_objects_are_not_emitted():
+    parser = IncrementalJSONParser(["storyboard[*]"])
+    emitted = parser.feed(json.dumps({"storyboard": [[{"a": 1}], 3, {"b": 2}], "other": [{"c": 3}]}))
+    assert emitted == [("storyboard[*]", {"b": 2})]
@@ -0,0 +1,56 @@
+"""
+测试LLM批量执行器：按输入顺序返回、并发上限、失败不重试
+运行: python -m pytest -q test_llm_batch.py
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from backend.llm.batch import LLMBatchExecutor
+
+
+def test_results_and_callbacks_follow_input_order():
+    rng = random.Random(0)
+    delays = [rng.uniform(0, 0.02) for _ in range(12)]
+    ready = []
+
+    def work(i):
+        time.sleep(delays[i])
+        return i * i
+
+    results = LLMBatchExecutor(max_in_flight=4).run(work, list(range(12)), lambda i, r: ready.append((i, r)))
+    assert results == [i * i for i in range(12)]
+    assert ready == list(enumerate(results))
+
+
+def test_max_in_flight_is_respected():
+    lock = threading.Lock()
+    state = {"current": 0, "peak": 0}
+
+    def work(_):
+        with lock:
+            state["current"] += 1
+            state["peak"] = max(state["peak"], state["current"])
+        time.sleep(0.01)
+        with lock:
+            state["current"] -= 1
+
+    LLMBatchExecutor(max_in_flight=3).run(work, range(12))
+    assert state["peak"] == 3
+
+
+def test_failures_are_not_retried():
+    calls = []
+
+    def work(i):
+        calls.append(i)
+        if i == 1:
+            raise RuntimeError("boom")
+        return i
+
+    with pytest.raises(RuntimeError):
+        LLMBatchExecutor(max_in_flight=1).run(work, [0, 1, 2])
+    assert calls.count(1) == 1
@@ -0,0 +1,99 @@
+"""
+测试母带处理：响度测量、增益、前视限幅与闪避
+运行: python -m pytest -q test_mastering.py
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.audio.mastering import (
+    _moving_average,
+    _sliding_min,
+    duck_under,
+    integrated_loudness,
+    limit_peaks,
+    master,
+)
+
+SAMPLE_RATE = 48000
+
+
+def _sine(amplitude, seconds=2.0, freq=1000.0, channels=1):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    wave = (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return np.repeat(wave[:, None], channels, axis=1)
+
+
+def test_full_scale_sine_loudness():
+    # BS.1770：单声道0dBFS的1kHz正弦约为-3.01 LUFS
+    assert integrated_loudness(_sine(1.0), SAMPLE_RATE) == pytest.approx(-3.01, abs=0.5)
+
+
+def test_loudness_sums_channels():
+    mono = integrated_loudness(_sine(0.1), SAMPLE_RATE)
+    stereo = integrated_loudness(_sine(0.1, channels=2), SAMPLE_RATE)
+    assert stereo - mono == pytest.approx(10 * np.log10(2), abs=0.01)
+
+
+def test_silence_is_negative_infinity():
+    silence = np.zeros((SAMPLE_RATE, 2), dtype=np.float32)
+    assert integrated_loudness(silence, SAMPLE_RATE) == float("-inf")
+    processed, stats = master(silence, SAMPLE_RATE)
+    assert processed is silence
+    assert stats == {"input_lufs": None, "gain_db": 0.0, "output_lufs": None}
+
+
+def test_master_reaches_target():
+    samples = _sine(10 ** (-23 / 20))
+    _, stats = master(samples, SAMPLE_RATE, target_lufs=-16.0)
+    assert stats["gain_db"] == pytest.approx(-16.0 - stats["input_lufs"], abs=0.02)
+    assert stats["output_lufs"] == pytest.approx(-16.0, abs=0.05)
+
+
+def test_master_gain_is_clamped():
+    _, stats = master(_sine(1e-3), SAMPLE_RATE, target_lufs=-16.0, max_gain_db=20.0)
+    assert stats["gain_db"] == 20.0
+
+
+def test_sliding_min_and_moving_average_match_brute_force():
+    rng = np.random.default_rng(0)
+    values = rng.random(50)
+    window = 7
+    expected_min = [values[i:i + window].min() for i in range(values.size)]
+    expected_avg = [values[max(0, i - window + 1):i + 1].mean() for i in range(values.size)]
+    np.testing.assert_allclose(_sliding_min(values, window), expected_min)
+    np.testing.assert_allclose(_moving_average(values, window), expected_avg)
+
+
+def test_limiter_reduces_only_around_peaks():
+    ceiling = 10 ** (-1.0 / 20)
+    lookahead = int(SAMPLE_RATE * 5.0 / 1000)
+    samples = np.full((SAMPLE_RATE, 2), 0.5, dtype=np.float32)
+    spike = 4800 - 10
+    samples[spike] = 1.5
+
+    out = limit_peaks(samples, SAMPLE_RATE, ceiling_db=-1.0, lookahead_ms=5.0, chunk_seconds=0.1)
+    assert np.abs(out).max() <= ceiling + 1e-6
+    # 增益在峰值处恰好降到所需值，不依赖最后的削波
+    assert out[spike, 0] == pytest.approx(ceiling, rel=1e-4)
+    np.testing.assert_array_equal(out[:spike - lookahead + 1], 0.5)
+    np.testing.assert_array_equal(out[spike + lookahead:], 0.5)
+    # 分块处理与整体处理结果一致
+    whole = limit_peaks(samples, SAMPLE_RATE, ceiling_db=-1.0, lookahead_ms=5.0, chunk_seconds=10.0)
+    np.testing.assert_allclose(out, whole, atol=1e-6)
+
+
+def test_duck_under_dialogue():
+    rate = 8000
+    effects = np.ones((rate * 3, 1), dtype=np.float32)
+    dialogue = np.zeros((rate * 3, 1), dtype=np.float32)
+    dialogue[rate:2 * rate, 0] = 0.5
+    ducked = duck_under(effects, dialogue, rate, duck_db=-12.0, release_ms=300.0)
+
+    assert ducked[int(0.1 * rate), 0] == pytest.approx(1.0)
+    # 对白开始时已完全压低
+    assert ducked[rate, 0] == pytest.approx(10 ** (-12 / 20), rel=1e-4)
+    assert ducked[int(1.5 * rate), 0] == pytest.approx(10 ** (-12 / 20), rel=1e-4)
+    assert ducked[int(2.9 * rate), 0] == pytest.approx(1.0)
+    assert ducked.dtype == effects.dtype
@@ -0,0 +1,128 @@
+"""
+测试模型路由：打分、熔断/半开状态转换与独立探测
+运行: python -m pytest -q test_model_router.py
+"""
+
+import time
+
+from backend.llm.model_router import (
+    DEFAULT_LATENCY_PRIOR,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    ModelRouter,
+)
+
+
+def _pick(router):
+    model, _ = router.acquire()
+    return model
+
+
+def _warm(router, model, latency):
+    assert _pick(router) == model
+    router.release(model, success=True, latency=latency)
+
+
+def test_untried_models_get_first_requests_then_lowest_score_wins():
+    router = ModelRouter(["a", "b"])
+    _warm(router, "a", 2.0)
+    _warm(router, "b", 1.0)
+    assert _pick(router) == "b"
+    # b 有一个在途请求后得分 1.0*2 与 a 的 2.0 相同，再加一个在途请求后 a 更优
+    assert _pick(router) in ("a", "b")
+    router.release("b", success=True, latency=1.0)
+
+
+def test_unsampled_model_uses_prior_instead_of_zero():
+    router = ModelRouter(["a", "b"])
+    _warm(router, "a", 1.0)
+    # b 尚无样本，第一个请求仍优先给 b
+    assert _pick(router) == "b"
+    # b 在途且无样本时按先验（a的平均延迟1.0）计分：1.0*2 > a 的 1.0，并发请求不再全部涌向 b
+    assert _pick(router) == "a"
+    stats = router.stats()
+    assert stats["b"]["score"] == 2.0
+
+
+def test_default_prior_without_any_samples():
+    router = ModelRouter(["a"])
+    router.acquire()
+    assert router.stats()["a"]["score"] == DEFAULT_LATENCY_PRIOR * 2
+
+
+def test_circuit_opens_after_threshold_and_half_open_probe_recovers():
+    router = ModelRouter(["a", "b"], failure_threshold=2, base_cooldown=0.05)
+    _warm(router, "a", 1.0)
+    _warm(router, "b", 5.0)
+    for _ in range(2):
+        assert _pick(router) == "a"
+        router.release("a", success=False)
+    assert router.stats()["a"]["state"] == STATE_OPEN
+    assert _pick(router) == "b"
+    router.release("b", success=True, latency=5.0)
+
+    time.sleep(0.06)
+    # 冷却结束后第一个请求作为探测
+    assert router.acquire() == ("a", True)
+    assert router.stats()["a"]["state"] == STATE_HALF_OPEN
+    router.release("a", success=True, latency=1.0, probe=True)
+    assert router.stats()["a"]["state"] == STATE_CLOSED
+
+
+def test_failed_probe_doubles_cooldown():
+    router = ModelRouter(["a"], failure_threshold=1, base_cooldown=0.02, max_cooldown=1.0)
+    router.acquire()
+    router.release("a", success=False)
+    time.sleep(0.03)
+    assert router.acquire() == ("a", True)
+    router.release("a", success=False, probe=True)
+    assert router._models["a"].cooldown == 0.04
+    assert router.stats()["a"]["state"] == STATE_OPEN
+
+
+def test_independent_prober_keeps_user_traffic_off_open_models():
+    probed = []
+
+    def prober(model):
+        probed.append(model)
+        return True
+
+    router = ModelRouter(["a", "b"], failure_threshold=1, base_cooldown=0.01, prober=prober, probe_interval=60)
+    _warm(router, "a", 1.0)
+    _warm(router, "b", 5.0)
+    router.acquire()
+    router.release("a", success=False)
+    time.sleep(0.02)
+    # 冷却已结束，但用户请求不会被用作探测
+    assert router.acquire() == ("b", False)
+    router.release("b", success=True, latency=5.0)
+
+    assert router.probe_due_models() == {"a": True}
+    assert probed == ["a"]
+    assert router.stats()["a"]["state"] == STATE_CLOSED
+    assert _pick(router) == "a"
+
+
+def test_non_probe_failure_does_not_end_half_open_probe():
+    router = ModelRouter(["a", "b"], failure_threshold=1, base_cooldown=0.02)
+    _warm(router, "a", 1.0)
+    _warm(router, "b", 5.0)
+    # 两个请求同时在 a 上，第一个失败触发熔断，第二个仍在途
+    assert router.acquire() == ("a", False)
+    assert router.acquire() == ("a", False)
+    router.release("a", success=False)
+    assert router.stats()["a"]["state"] == STATE_OPEN
+
+    time.sleep(0.03)
+    assert router.acquire() == ("a", True)
+    # 熔断前发出的请求失败：不能结束探测，也不能放行第二个探测
+    router.release("a", success=False)
+    assert router.stats()["a"]["state"] == STATE_HALF_OPEN
+    assert router._models["a"].probe_in_flight
+    assert router.acquire() == ("b", False)
+    router.release("b", success=True, latency=5.0)
+
+    router.release("a", success=True, latency=1.0, probe=True)
+    assert router.stats()["a"]["state"] == STATE_CLOSED
+    assert not router._models["a"].probe_in_flight
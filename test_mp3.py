@@ -0,0 +1,56 @@
+"""
+测试MP3帧解析：采样数、ID3/Xing头跳过与失步重同步
+运行: python -m pytest -q test_mp3.py
+"""
+
+from backend.util.mp3 import mp3_frames
+
+
+def _frame(version_bits=2, bitrate_index=6, rate_index=1, mono=True, padding=0, payload=b""):
+    """构造一个Layer III帧（默认MPEG-2 24kHz 48kbps 单声道，与edge-tts输出一致）"""
+    header = bytes([
+        0xFF,
+        0xE0 | (version_bits << 3) | (1 << 1) | 1,
+        (bitrate_index << 4) | (rate_index << 2) | (padding << 1),
+        0xC0 if mono else 0x00,
+    ])
+    frame = next(iter(mp3_frames(header + bytes(2000))))
+    body = (payload + bytes(frame.length))[: frame.length - 4]
+    return header + body
+
+
+def test_counts_mpeg2_frames():
+    data = _frame() * 5
+    frames = mp3_frames(data)
+    assert len(frames) == 5
+    assert frames[0].length == 72 * 48000 // 24000
+    assert sum(f.samples for f in frames) == 5 * 576
+    assert frames[0].stream_format == (24000, 1)
+
+
+def test_mpeg1_stereo_frame():
+    frames = mp3_frames(_frame(version_bits=3, bitrate_index=9, rate_index=0, mono=False) * 2)
+    assert len(frames) == 2
+    assert frames[0].samples == 1152
+    assert frames[0].stream_format == (44100, 2)
+    assert frames[0].length == 144 * 128000 // 44100
+
+
+def test_skips_id3v2_and_xing_header():
+    id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + bytes(20)
+    xing = _frame(payload=bytes(13) + b"Xing")
+    frames = mp3_frames(id3 + xing + _frame() * 3)
+    assert len(frames) == 3
+    assert frames[0].offset == len(id3) + len(xing)
+
+
+def test_resyncs_after_garbage_and_ignores_truncated_tail():
+    frame = _frame()
+    data = b"junk" + frame + b"\x00\x01" + frame + frame[:10]
+    frames = mp3_frames(data)
+    assert [f.offset for f in frames] == [4, 4 + len(frame) + 2]
+
+
+def test_empty_and_non_mp3_data():
+    assert mp3_frames(b"") == []
+    assert mp3_frames(b"RIFF....WAVEfmt ") == []
@@ -0,0 +1,62 @@
+"""
+测试长篇小说分块生成：章节切分与跨分块主体去重
+运行: python -m pytest -q test_novel_map_reduce.py
+"""
+
+from backend.ai.novel_map_reduce import build_chunks, merge_partial_results, merge_subjects
+
+
+def test_build_chunks_keeps_chapters_within_limit():
+    text = "".join(f"第{i}章 标题\n" + "内容。" * 30 + "\n" for i in range(1, 6))
+    chunks = build_chunks(text, 200)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert all(chunk.startswith("第") for chunk in chunks)
+
+
+def test_contained_name_is_not_merged():
+    items = [
+        {"name": "小明", "description": "十岁的男孩，活泼好动，喜欢踢足球"},
+        {"name": "小明的母亲", "description": "温柔的中年女性，在医院当护士"},
+    ]
+    merged, aliases = merge_subjects(items)
+    assert [item["name"] for item in merged] == ["小明", "小明的母亲"]
+    assert aliases == {}
+
+
+def test_contained_name_with_same_description_is_merged():
+    description = "十岁的男孩，活泼好动，喜欢踢足球"
+    merged, aliases = merge_subjects([
+        {"name": "小明", "description": description},
+        {"name": "小明同学", "description": description},
+    ])
+    assert len(merged) == 1
+    assert aliases == {"小明同学": "小明"}
+
+
+def test_alias_match_merges_and_rewrites_references():
+    partials = [
+        {
+            "summary": "上",
+            "subjects": {"characters": [{"name": "张三", "aliases": ["老张"], "description": "村长"}]},
+            "storyboard": [{"scene_id": 1, "required_subjects": {"characters": ["@张三"]}}],
+        },
+        {
+            "summary": "下",
+            "subjects": {"characters": [{"name": "老张", "description": "满脸皱纹的老人"}]},
+            "storyboard": [{"scene_id": 1, "required_subjects": {"characters": ["@老张", "@张三"]}}],
+        },
+    ]
+    result = merge_partial_results(partials)
+    characters = result["subjects"]["characters"]
+    assert [c["name"] for c in characters] == ["张三"]
+    assert characters[0]["aliases"] == ["老张"]
+    assert [s["scene_id"] for s in result["storyboard"]] == [1, 2]
+    assert result["storyboard"][1]["required_subjects"]["characters"] == ["@张三"]
+    assert result["summary"] == "上\n下"
+
+
+def test_exact_name_ignores_case_and_whitespace():
+    merged, _ = merge_subjects([{"name": "Old Town"}, {"name": "old town", "description": "石板路"}])
+    assert len(merged) == 1
+    assert merged[0]["description"] == "石板路"
@@ -0,0 +1,104 @@
+"""
+测试LLM限流：令牌桶速率与AIMD并发控制
+运行: python -m pytest -q test_rate_limit.py
+"""
+
+import pytest
+
+from backend.llm import rate_limit
+from backend.llm.rate_limit import ProviderLimiter, TokenBucket, call_with_limits, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_token_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(rate_per_second=2.0, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_second=1.0, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 100
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_aimd_additive_increase_and_multiplicative_decrease(clock):
+    limiter = ProviderLimiter("test", rpm=600, max_concurrency=8, initial_concurrency=4)
+    expected = 4.0
+    for _ in range(4):
+        limiter.on_success()
+        expected += 1.0 / expected
+    # 一轮并发上限个成功请求后上限约加1
+    assert limiter.limit == pytest.approx(expected)
+    assert 4.9 < limiter.limit < 5.0
+    limiter.on_throttle(retry_after=3)
+    assert limiter.limit == pytest.approx(expected / 2)
+    assert limiter.paused_until == pytest.approx(clock.now + 3)
+    for _ in range(3):
+        limiter.on_throttle()
+    assert limiter.limit == 1.0
+
+
+def test_aimd_limit_is_capped(clock):
+    limiter = ProviderLimiter("test", rpm=600, max_concurrency=2, initial_concurrency=2)
+    for _ in range(50):
+        limiter.on_success()
+    assert limiter.limit == 2.0
+
+
+def test_retry_after_pause_is_capped(clock):
+    limiter = ProviderLimiter("test", rpm=600, max_concurrency=4, initial_concurrency=4)
+    limiter.on_throttle(retry_after=3600)
+    assert limiter.paused_until == pytest.approx(clock.now + rate_limit.MAX_BACKOFF_SECONDS)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_call_with_limits_reports_throttle(monkeypatch):
+    limiter = ProviderLimiter("test", rpm=6000, max_concurrency=4, initial_concurrency=4)
+    monkeypatch.setattr(rate_limit, "get_rate_limiter", lambda provider, model=None: limiter)
+
+    class Throttled(Exception):
+        status_code = 429
+
+    with pytest.raises(Throttled):
+        call_with_limits("test", None, lambda: (_ for _ in ()).throw(Throttled()))
+    assert limiter.throttles == 1 and limiter.limit == 2.0 and limiter.in_flight == 0
+    limiter.paused_until = 0.0
+    assert call_with_limits("test", None, lambda: "ok") == "ok"
+    assert limiter.successes == 1
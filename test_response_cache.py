@@ -0,0 +1,38 @@
+"""
+测试LLM响应缓存：键规范化、TTL与多线程下的命中统计
+运行: python -m pytest -q test_response_cache.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.llm import response_cache
+from backend.llm.response_cache import LLMResponseCache, build_messages, make_key
+
+
+def test_key_ignores_trailing_whitespace_but_not_temperature():
+    a = make_key("openai", "m", build_messages("系统", "你好 \r\n世界\n"), 0)
+    b = make_key("openai", "m", build_messages("系统", "你好\n世界"), 0)
+    assert a == b
+    assert a != make_key("openai", "m", build_messages("系统", "你好\n世界"), 0.7)
+
+
+def test_expired_entries_miss(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=10)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    now = response_cache.time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 11)
+    assert cache.get("k") is None
+
+
+def test_hit_counters_are_exact_under_threads(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("present", "v")
+
+    def lookup(i):
+        return cache.get("present" if i % 2 else "missing")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lookup, range(400)))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (200, 200, 1)
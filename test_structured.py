@@ -0,0 +1,64 @@
+"""
+测试LLM结构化输出：JSON容错修复与只追问缺失字段
+运行: python -m pytest -q test_structured.py
+"""
+
+import pytest
+
+from backend.llm.structured import get_structured_output_stats, parse_json, repair_json, resolve_structured
+
+REQUIRED = {"description": str, "subjects": list}
+
+
+def test_parse_json_strips_prose_and_code_fence():
+    data, method = parse_json('好的：\n```json\n{"a": [1, 2]}\n```\n以上。')
+    assert data == {"a": [1, 2]}
+    assert method == "strict"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ('{"a": "截断的字符', {"a": "截断的字符"}),
+    ('{"a": [{"x": 1}, {"x": 2', {"a": [{"x": 1}, {"x": 2}]}),
+    ('[1, 2, {"k": "v"', [1, 2, {"k": "v"}]),
+    ('{"a": 1, "b": tru', {"a": 1}),
+])
+def test_repair_json(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_repair_json_without_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("没有JSON")
+
+
+def test_resolve_reasks_only_missing_fields():
+    instructions = []
+
+    def reask(instruction):
+        instructions.append(instruction)
+        return '{"subjects": ["a"], "description": "不应覆盖"}'
+
+    result = resolve_structured("test_reask", '{"description": "原描述"}', REQUIRED, reask=reask)
+    assert result.ok
+    assert result.data == {"description": "原描述", "subjects": ["a"]}
+    assert result.reasks == 1
+    assert "subjects" in instructions[0] and "description" not in instructions[0]
+
+
+def test_resolve_uses_supplement_before_reask():
+    def reask(_instruction):
+        raise AssertionError("should not re-ask")
+
+    result = resolve_structured(
+        "test_supplement", '{"description": "d"}', REQUIRED, reask=reask, supplement={"subjects": ["s"]}
+    )
+    assert result.ok and result.reasks == 0
+
+
+def test_resolve_failure_is_recorded():
+    result = resolve_structured("test_failure", "完全不是JSON", REQUIRED, reask=lambda _: None)
+    assert not result.ok
+    assert result.missing == list(REQUIRED)
+    stats = get_structured_output_stats()["test_failure"]
+    assert stats["failed"] == 1 and stats["reasked"] == 1
@@ -0,0 +1,81 @@
+"""
+测试统一生成：分块失败时跳过并报告；追问时带上一轮回答；空响应返回基本结构
+运行: python -m pytest -q test_unified_generation.py
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+
+from backend.rest_handler import unified_generation
+from backend.rest_handler.unified_generation import UnifiedGenerationHandler
+
+
+def _chunk_result(name):
+    return json.dumps({
+        "summary": name,
+        "subjects": {"characters": [{"name": name, "description": f"{name}的描述"}]},
+        "storyboard": [{"scene_id": 1, "description": name}],
+    }, ensure_ascii=False)
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setattr(unified_generation, "get_config", lambda: {"novelChunkChars": 40, "llmMaxInFlight": 2})
+    handler = UnifiedGenerationHandler()
+    monkeypatch.setattr(handler, "_save_raw_llm_response", lambda *args: None)
+    monkeypatch.setattr(handler, "_save_generation_result", lambda *args: None)
+    return handler
+
+
+def _novel():
+    return "".join(f"第{i}章\n" + "内容。" * 10 + "\n" for i in range(1, 4))
+
+
+def test_failed_chunks_are_skipped_and_reported(handler, monkeypatch):
+    def fake_query(user_prompt, system_prompt, model_name, temperature, cache=None):
+        if "第2/3部分" in user_prompt:
+            raise RuntimeError("upstream error")
+        if "第3/3部分" in user_prompt:
+            return None
+        return _chunk_result("小明")
+
+    monkeypatch.setattr(unified_generation, "query_llm", fake_query)
+    result = handler.generate_subjects_and_storyboard_from_novel("demo", _novel(), map_reduce=True)
+    assert result["success"]
+    assert result["failedChunks"] == [1, 2]
+    assert [c["name"] for c in result["data"]["subjects"]["characters"]] == ["小明"]
+    assert len(result["data"]["storyboard"]) == 1
+
+
+def test_all_chunks_failing_is_an_error(handler, monkeypatch):
+    monkeypatch.setattr(unified_generation, "query_llm", lambda *args, **kwargs: "不是JSON")
+    monkeypatch.setattr(unified_generation, "query_llm_messages", lambda *args, **kwargs: "仍然不是JSON")
+    result = handler.generate_subjects_and_storyboard_from_novel("demo", _novel(), map_reduce=True)
+    assert not result["success"]
+
+
+def test_reask_sends_previous_answer_as_assistant_turn(handler, monkeypatch):
+    sent = []
+
+    def fake_messages(messages, model_name, temperature, cache=None):
+        sent.append(messages)
+        return json.dumps({"storyboard": [{"scene_id": 1}]})
+
+    monkeypatch.setattr(unified_generation, "query_llm_messages", fake_messages)
+    first = json.dumps({"summary": "概要", "subjects": {"characters": []}})
+    result = handler._resolve_result("test", first, "原始问题", "系统提示", "unified_generation")
+    assert result["storyboard"] == [{"scene_id": 1}]
+    roles = [m["role"] for m in sent[0]]
+    assert roles == ["system", "user", "assistant", "user"]
+    assert sent[0][1]["content"] == "原始问题"
+    assert sent[0][2]["content"] == first
+
+
+def test_empty_response_returns_default_structure(handler, monkeypatch):
+    monkeypatch.setattr(unified_generation, "query_llm_messages", lambda *args, **kwargs: pytest.fail("no reask"))
+    result = handler._resolve_result("test", None, "问题", "系统提示", "unified_generation")
+    assert result["summary"] == "解析失败"
+    assert result["storyboard"] == []